@@ -0,0 +1,256 @@
+"""
+Crash-safe output helpers and batch checkpoint journal
+Atomic file writes plus an append-only journal used by --resume
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = ".split_checkpoint.jsonl"
+PARTIAL_SUFFIX = ".part"
+
+
+def _default_mode() -> int:
+    """Permissions open() would give a new file under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once: os.umask() briefly changes process state, unsafe once threads run
+_FILE_MODE = _default_mode()
+
+
+def atomic_write(path, write_fn: Callable, mode: str = 'wb', encoding: str = None):
+    """
+    Write a file through a temporary sibling and rename it into place
+
+    Args:
+        path: Final file path
+        write_fn: Callable receiving the open temporary file
+        mode: 'wb' for binary output, 'w' for text
+        encoding: Text encoding (text mode only)
+    """
+    import tempfile   # pulls in shutil, random and the compression modules
+
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=PARTIAL_SUFFIX, dir=str(path.parent))
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files; give outputs the usual permissions
+        os.chmod(tmp_name, _FILE_MODE)
+        os.replace(tmp_name, str(path))
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def remove_partial_files(directory) -> int:
+    """Delete temporary files left behind by an interrupted run"""
+    removed = 0
+    directory = Path(directory)
+    if not directory.is_dir():
+        return 0
+    for leftover in directory.glob(f".*{PARTIAL_SUFFIX}"):
+        try:
+            leftover.unlink()
+            removed += 1
+        except OSError as e:
+            logger.debug(f"Could not remove {leftover.name}: {e}")
+    if removed:
+        logger.info(f"Removed {removed} partial file(s) from {directory}")
+    return removed
+
+
+def file_fingerprint(path) -> str:
+    """Cheap identity of an input file (size + modification time)"""
+    st = Path(path).stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class BatchCheckpoint:
+    """
+    Append-only journal of finished documents and sections
+
+    Only the records replayed on resume are kept whole; a document finished
+    in this run is remembered by the journal offset of its record and read
+    back when asked for, so memory does not grow with the batch.
+    """
+
+    def __init__(self, journal_path, resume: bool = False):
+        """
+        Open a checkpoint journal
+
+        Args:
+            journal_path: Journal file path
+            resume: Keep previous entries (otherwise start a fresh journal)
+        """
+        self.path = Path(journal_path)
+        self.documents = {}   # input path -> 'document' record replayed on resume
+        self._offsets = {}    # input path -> journal offset of a record written since
+        self.sections = {}    # input path -> set of finished file names
+        self.started = {}     # input path -> fingerprint of the last attempt
+
+        if resume:
+            self._load()
+        elif self.path.exists():
+            self.path.unlink()
+
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self._open()
+
+    def _open(self):
+        # Unbuffered append: each entry is a single write, so worker
+        # processes sharing the journal (see for_document) never interleave
+        self._fh = open(self.path, 'ab', buffering=0)
+
+    @classmethod
+    def for_document(cls, journal_path, input_pdf, started: str = None,
+                     sections=()) -> 'BatchCheckpoint':
+        """
+        Journal handle for a worker process splitting one document
+
+        Appends to the batch's journal with just that document's state
+        (from state_for()), without replaying the file.
+        """
+        checkpoint = cls.__new__(cls)
+        checkpoint.path = Path(journal_path)
+        checkpoint.documents = {}
+        checkpoint._offsets = {}
+        key = str(input_pdf)
+        checkpoint.sections = {key: set(sections)} if sections else {}
+        checkpoint.started = {key: started} if started else {}
+        checkpoint._open()
+        return checkpoint
+
+    def state_for(self, input_pdf) -> Dict:
+        """for_document() arguments of a document (picklable)"""
+        key = str(input_pdf)
+        return {'journal_path': str(self.path), 'input_pdf': key,
+                'started': self.started.get(key),
+                'sections': sorted(self.sections.get(key, ()))}
+
+    def _load(self):
+        """Replay an existing journal"""
+        if not self.path.exists():
+            logger.info("No checkpoint found, starting a fresh batch")
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-append
+                    continue
+                key = entry.get('input')
+                if entry.get('event') == 'section':
+                    self.sections.setdefault(key, set()).add(entry['file'])
+                elif entry.get('event') == 'document':
+                    self.documents[key] = entry
+                elif entry.get('event') == 'start':
+                    # A new attempt on a changed input invalidates its sections
+                    if self.started.get(key) != entry.get('fingerprint'):
+                        self.sections.pop(key, None)
+                    self.started[key] = entry.get('fingerprint')
+
+        logger.info(f"Resuming from checkpoint: {len(self.documents)} document(s) "
+                    f"already finished")
+
+    def _append(self, entry: Dict) -> int:
+        """Write one entry; returns its offset in the journal"""
+        data = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        self._fh.write(data)
+        os.fsync(self._fh.fileno())
+        # Appends land at the end even when workers wrote in between
+        return self._fh.tell() - len(data)
+
+    def _document(self, key: str) -> Optional[Dict]:
+        """Latest 'document' record of an input, or None"""
+        offset = self._offsets.get(key)
+        if offset is None:
+            return self.documents.get(key)
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def is_document_done(self, input_pdf, patterns: str = None) -> bool:
+        """
+        True if the document finished with the same input file
+
+        Args:
+            patterns: Digest of the detection patterns now in use; a document
+                      split with other patterns is not done (journals that
+                      predate the digest are trusted)
+        """
+        done = self._document(str(input_pdf))
+        if not done or not done.get('success'):
+            return False
+        if patterns and done.get('patterns') not in (None, patterns):
+            return False
+        try:
+            if done.get('fingerprint') != file_fingerprint(input_pdf):
+                return False
+        except OSError:
+            return False
+        return all(Path(p).exists() for p in done.get('created_files', []))
+
+    def finished_result(self, input_pdf) -> Dict:
+        """Stored result of a finished document"""
+        return dict(self._document(str(input_pdf)), input_file=str(input_pdf), resumed=True)
+
+    def finished_sections(self, input_pdf) -> Set[str]:
+        """File names already written for the current version of a document"""
+        key = str(input_pdf)
+        try:
+            if self.started.get(key) != file_fingerprint(input_pdf):
+                return set()
+        except OSError:
+            return set()
+        return self.sections.get(key, set())
+
+    def start_document(self, input_pdf):
+        key = str(input_pdf)
+        fingerprint = file_fingerprint(input_pdf)
+        if self.started.get(key) != fingerprint:
+            self.sections.pop(key, None)
+        self.started[key] = fingerprint
+        self._append({'event': 'start', 'input': key, 'fingerprint': fingerprint})
+
+    def section_done(self, input_pdf, filename: str):
+        key = str(input_pdf)
+        self.sections.setdefault(key, set()).add(filename)
+        self._append({'event': 'section', 'input': key, 'file': filename})
+
+    def document_done(self, input_pdf, result: Dict):
+        key = str(input_pdf)
+        entry = {
+            'event': 'document',
+            'input': key,
+            'fingerprint': file_fingerprint(input_pdf),
+            'success': bool(result.get('success')),
+            'output_dir': result.get('output_dir'),
+            'sections_found': result.get('sections_found', 0),
+            'files_created': result.get('files_created', 0),
+            'created_files': result.get('created_files', []),
+            'report_path': result.get('report_path'),
+            'patterns': result.get('patterns_digest'),
+        }
+        self.documents.pop(key, None)
+        self._offsets[key] = self._append(entry)
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
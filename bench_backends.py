@@ -0,0 +1,136 @@
+"""
+Benchmark PDF backends against each other
+Times scanning and splitting with every installed backend and checks that
+the detections match the PyPDF2 reference
+"""
+
+import time
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from split_agreement import AgreementSplitter
+from pdf_backend import PyPDF2Backend, available_backends
+
+logger = logging.getLogger(__name__)
+
+REFERENCE = PyPDF2Backend.name
+
+
+def run_backend(pdf: Path, backend: str, granularity: str = 'section') -> Dict:
+    """Scan and split one document in memory; returns timings and detections"""
+    splitter = AgreementSplitter(str(pdf), granularity=granularity, backend=backend)
+    started = time.monotonic()
+    markers = splitter.find_all_sections()
+    scanned = time.monotonic()
+    sections = splitter.build_sections(markers)
+    written = sum(len(data) for _, _, data in splitter.iter_section_pdfs(sections))
+    finished = time.monotonic()
+    return {
+        'backend': backend,
+        'scan_seconds': scanned - started,
+        'split_seconds': finished - scanned,
+        'bytes_written': written,
+        'detections': [(d['page'], d['type'], d['confidence']) for d in splitter.detections],
+    }
+
+
+def compare_detections(reference: List, other: List) -> List[str]:
+    """Human readable differences between two detection lists (1-based pages)"""
+    ref = {page: (stype, conf) for page, stype, conf in reference}
+    got = {page: (stype, conf) for page, stype, conf in other}
+    lines = []
+    for page in sorted(set(ref) | set(got)):
+        if ref.get(page) != got.get(page):
+            lines.append(f"p{page + 1}: {ref.get(page)} -> {got.get(page)}")
+    return lines
+
+
+def run_benchmark(pdfs: List[Path], backends: Optional[List[str]] = None,
+                  granularity: str = 'section') -> List[Dict]:
+    """
+    Benchmark every backend on every document
+
+    Returns one dict per (document, backend) with timings and a 'differences'
+    list against the PyPDF2 backend (empty = identical detections).
+    """
+    backends = backends or available_backends()
+    if REFERENCE not in backends:
+        backends = [REFERENCE] + backends
+
+    # Per-page logging would dominate the timings
+    logging.getLogger('split_agreement').setLevel(logging.WARNING)
+
+    rows = []
+    for pdf in pdfs:
+        results = {name: run_backend(pdf, name, granularity) for name in backends}
+        reference = results[REFERENCE]['detections']
+        for name in backends:
+            row = results[name]
+            row['file'] = pdf.name
+            row['differences'] = compare_detections(reference, row.pop('detections'))
+            rows.append(row)
+    return rows
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Compare speed and detections of the PDF backends',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Every installed backend on a folder
+  python bench_backends.py ./Agreements
+
+  # Article granularity, two backends, show the differing pages
+  python bench_backends.py ./Agreements --granularity article --backends pypdf2,pdfium -v
+        """
+    )
+
+    parser.add_argument('input', help='PDF file or directory of PDFs')
+    parser.add_argument('--backends', help='Comma-separated backends (default: all installed)')
+    parser.add_argument('--granularity', choices=['section', 'article'], default='section',
+                        help='Detection granularity (default: section)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='List every differing detection')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    input_path = Path(args.input)
+    if input_path.is_dir():
+        pdfs = sorted(list(input_path.glob("*.pdf")) + list(input_path.glob("*.PDF")))
+    else:
+        pdfs = [input_path]
+    backends = [b.strip() for b in args.backends.split(',')] if args.backends else None
+
+    rows = run_benchmark(pdfs, backends, args.granularity)
+
+    print(f"\n{'file':<40} {'backend':<8} {'scan s':>7} {'split s':>8} {'KB out':>8} {'detections':>11}")
+    totals = {}
+    for r in rows:
+        status = 'identical' if not r['differences'] else f"{len(r['differences'])} differ"
+        print(f"{r['file'][:40]:<40} {r['backend']:<8} {r['scan_seconds']:>7.2f} "
+              f"{r['split_seconds']:>8.2f} {r['bytes_written'] / 1024:>8.0f} {status:>11}")
+        if args.verbose:
+            for line in r['differences']:
+                print(f"    {line}")
+        total = totals.setdefault(r['backend'], [0.0, 0.0, 0])
+        total[0] += r['scan_seconds']
+        total[1] += r['split_seconds']
+        total[2] += len(r['differences'])
+
+    print()
+    for name, (scan, split, diffs) in totals.items():
+        print(f"{name:<8} scan {scan:6.2f}s  split {split:6.2f}s  "
+              f"{'identical detections' if not diffs else f'{diffs} differing detection(s)'}")
+
+
+if __name__ == '__main__':
+    main()
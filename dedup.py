@@ -0,0 +1,146 @@
+"""
+Content-addressed deduplication of batch inputs
+Identical PDFs under different names are split once; the other copies get
+their output folders filled with links to the first copy's section files
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from batch_checkpoint import PARTIAL_SUFFIX, atomic_write
+from incremental import CHANGES_NAME, PAGE_INDEX_NAME
+from json_output import ANALYSIS_NAME, dump_json, file_sha256
+from manifest import MANIFEST_NAME
+
+logger = logging.getLogger(__name__)
+
+REPORT_NAME = "analysis_report.txt"
+# Result key and name of each small per-document output file
+_SMALL_FILES = (
+    ('report_path', REPORT_NAME),
+    ('analysis_path', ANALYSIS_NAME),
+    ('manifest_path', MANIFEST_NAME),
+    ('page_index_path', PAGE_INDEX_NAME),
+    ('changes_path', CHANGES_NAME),
+)
+
+
+class DuplicateIndex:
+    """
+    Finds inputs whose content matches an earlier one
+
+    Files are only hashed once another file of the same size shows up, so a
+    folder without duplicates costs one stat() per PDF.
+    """
+
+    def __init__(self):
+        self._by_size: Dict[int, List[Path]] = {}
+        self._hashes: Dict[Path, str] = {}
+
+    def _hash(self, path: Path) -> str:
+        if path not in self._hashes:
+            self._hashes[path] = file_sha256(path)
+        return self._hashes[path]
+
+    def original_of(self, path) -> Optional[Path]:
+        """
+        Earlier file with identical content, or None (path is then registered)
+        """
+        path = Path(path)
+        try:
+            size = path.stat().st_size
+            candidates = self._by_size.setdefault(size, [])
+            if candidates:
+                digest = self._hash(path)
+                for earlier in candidates:
+                    if self._hash(earlier) == digest:
+                        return earlier
+        except OSError as e:
+            logger.debug(f"Could not hash {path}: {e}")
+            return None
+        candidates.append(path)
+        return None
+
+
+def link_or_copy(src, dst):
+    """Hard-link src to dst (copy when linking is not possible), replacing dst"""
+    src, dst = Path(src), Path(dst)
+    try:
+        if os.path.samefile(src, dst):
+            # Linked by an earlier run (renaming a link onto itself is a no-op)
+            return
+    except OSError:
+        pass
+    tmp = dst.with_name(f".{dst.name}.link{PARTIAL_SUFFIX}")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        import shutil
+
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _copy_for(source: Path, target: Path, original: str, duplicate: str):
+    """
+    Write a small output file of the original anew for the duplicate
+
+    Reports and indexes name their input document, so they are rewritten
+    with the duplicate's name rather than linked.
+    """
+    data = source.read_bytes()
+    if source.suffix == '.json':
+        content = json.loads(data.decode('utf-8'))
+        if content.get('input_file') == original:
+            content['input_file'] = duplicate
+        atomic_write(target, lambda f: dump_json(content, f), 'w', 'utf-8')
+        return
+    if source.name == REPORT_NAME:
+        data = data.replace(f"Document Analysis: {Path(original).name}".encode('utf-8'),
+                            f"Document Analysis: {Path(duplicate).name}".encode('utf-8'), 1)
+    atomic_write(target, lambda f: f.write(data))
+
+
+def materialize_duplicate(original_result: Dict, input_pdf, output_dir) -> Dict:
+    """
+    Fill a duplicate's output folder from the original's result
+
+    Section PDFs are linked; the report, page index, manifest, change
+    report and analysis.json found in the original's folder get their own
+    copies naming the duplicate.
+
+    Returns:
+        Result dict for the duplicate (same shape as AgreementSplitter.process())
+    """
+    result = dict(original_result, input_file=str(input_pdf),
+                  duplicate_of=original_result['input_file'])
+    result.pop('resumed', None)
+    result.pop('analysis', None)
+    if not original_result.get('success'):
+        return result
+
+    source_dir = Path(original_result['output_dir'])
+    output_dir = Path(output_dir)
+    output_dir.mkdir(exist_ok=True, parents=True)
+
+    def relocate(path):
+        target = output_dir / Path(path).name
+        link_or_copy(path, target)
+        return str(target)
+
+    result['output_dir'] = str(output_dir)
+    result['created_files'] = [relocate(f) for f in original_result.get('created_files', [])]
+    for key, name in _SMALL_FILES:
+        source = source_dir / name
+        if not source.exists():
+            result.pop(key, None)
+            continue
+        target = output_dir / name
+        _copy_for(source, target, original_result['input_file'], str(input_pdf))
+        result[key] = str(target)
+    logger.info(f"Duplicate of {Path(original_result['input_file']).name}: "
+                f"linked {len(result['created_files'])} file(s) from {source_dir}")
+    return result
@@ -0,0 +1,277 @@
+"""
+Section detection as a cascade of detectors, cheapest first
+The first stage looks at the first line of a page only; deeper stages run
+only when a cheap pre-check says the page could still hold a header
+"""
+
+import re
+import abc
+import json
+import hashlib
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from normalize import normalize_line, normalize_lines, normalize_pattern, compile_patterns
+
+# (section type, confidence, matched line)
+Detection = Tuple[str, int, str]
+
+# Compiled sets by content hash: a splitter (and its cascade) is created per
+# document, but each distinct pattern set is compiled once per process
+_compiled_sets: Dict[str, Tuple[Dict[str, List[Tuple[Pattern, int]]], Optional[Pattern]]] = {}
+_COMPILED_SETS_LIMIT = 64
+
+
+class PageLines:
+    """
+    Lines of one page's text, found and normalized on demand
+
+    Significant ("key") lines are collected only as far down the page as a
+    detector asks, so a first-line match never walks the whole page.
+    """
+
+    def __init__(self, text: str, apostrophes: bool = True):
+        """
+        Args:
+            text: Extracted page text
+            apostrophes: Fold typographic apostrophes to ' (see normalize_line)
+        """
+        self.text = text
+        self.apostrophes = apostrophes
+        self._raw = iter(text.split('\n'))
+        self._key_lines: List[str] = []
+        self._complete = False
+        self._normalized = {}
+        self.loose_lines = None   # cache for LooseDetector
+
+    def has_line(self, index: int) -> bool:
+        """True if the page has more than index key lines"""
+        while len(self._key_lines) <= index and not self._complete:
+            line = next(self._raw, None)
+            if line is None:
+                self._complete = True
+                break
+            line = line.strip()
+            # Same test as key_lines: skip empty, pure numbers (page numbers), or very short lines
+            if line and not line.isdigit() and len(line) > 2:
+                self._key_lines.append(line)
+        return index < len(self._key_lines)
+
+    def line(self, index: int) -> str:
+        self.has_line(index)
+        return self._key_lines[index]
+
+    @property
+    def key_lines(self) -> List[str]:
+        """All significant lines of the page"""
+        if not self._complete:
+            self._key_lines.extend(line for line in (raw.strip() for raw in self._raw)
+                                   if line and not line.isdigit() and len(line) > 2)
+            self._complete = True
+        return self._key_lines
+
+    def normalized(self, index: int) -> str:
+        """Normalized form of key line index (see normalize.py)"""
+        if index not in self._normalized:
+            self._normalized[index] = normalize_line(self.line(index), self.apostrophes)
+        return self._normalized[index]
+
+    def head(self, count: int = 3) -> List[str]:
+        """Normalized first key lines (fewer if the page has fewer)"""
+        return [self.normalized(i) for i in range(count) if self.has_line(i)]
+
+
+def _typed(section_type: str, match) -> str:
+    """Append the 'num' group, if any, to the type (Article_07)"""
+    num = match.groupdict().get('num')
+    return f"{section_type}_{int(num):02d}" if num else section_type
+
+
+def _prefilter(patterns: Dict[str, List[Tuple[str, int]]], flags: int = 0) -> Optional[Pattern]:
+    """
+    One alternation of every pattern, to rule a line out with a single search
+
+    None when the patterns cannot be combined (the stage then always runs).
+    """
+    sources = [re.sub(r'\(\?P<\w+>', '(?:', normalize_pattern(p))
+               for entries in patterns.values() for p, _ in entries]
+    # Keep an all-anchored set anchored, or every position of the line is tried
+    anchored = all(s.startswith('^') for s in sources)
+    if anchored:
+        sources = [s[1:] for s in sources]
+    alternation = '|'.join(f'(?:{s})' for s in sources)
+    try:
+        return re.compile(f'^(?:{alternation})' if anchored else alternation, flags)
+    except re.error:
+        return None
+
+
+def compiled_set(patterns: Dict[str, List[Tuple[str, int]]], flags: int = 0
+                 ) -> Tuple[Dict[str, List[Tuple[Pattern, int]]], Optional[Pattern]]:
+    """(compile_patterns(patterns), prefilter alternation), cached by content"""
+    key = hashlib.sha256(json.dumps([patterns, flags]).encode('utf-8')).hexdigest()
+    found = _compiled_sets.get(key)
+    if found is None:
+        found = (compile_patterns(patterns), _prefilter(patterns, flags))
+        if len(_compiled_sets) >= _COMPILED_SETS_LIMIT:
+            _compiled_sets.pop(next(iter(_compiled_sets)))
+        _compiled_sets[key] = found
+    return found
+
+
+class Detector(abc.ABC):
+    """One stage of a cascade; subclasses implement detect()"""
+
+    name = 'detector'
+
+    def __init__(self, patterns: Dict[str, List[Tuple[str, int]]]):
+        """
+        Args:
+            patterns: {section type: [(regex, confidence), ...]} matched
+                      against normalized (upper case, accent-free) lines
+        """
+        self.patterns = patterns
+        # Most lines match nothing: one search of the alternation (_any) says so
+        self.compiled, self._any = compiled_set(patterns)
+
+    def may_match(self, page: PageLines) -> bool:
+        """Cheap pre-check; False means detect() cannot find anything"""
+        return True
+
+    def _match_line(self, line_norm: str, raw: str, penalty: int = 0) -> Optional[Detection]:
+        if self._any is not None and not self._any.search(line_norm):
+            return None
+        for section_type, patterns in self.compiled.items():
+            for pattern, confidence in patterns:
+                match = pattern.search(line_norm)
+                if match:
+                    return _typed(section_type, match), confidence - penalty, raw[:80]
+        return None
+
+    @abc.abstractmethod
+    def detect(self, page: PageLines) -> Optional[Detection]:
+        """(section type, confidence, header) of a section starting on the page, or None"""
+
+
+class FirstLineDetector(Detector):
+    """Anchored patterns against the first significant line (V2 style)"""
+
+    name = 'first-line'
+
+    def detect(self, page: PageLines) -> Optional[Detection]:
+        if not page.has_line(0):
+            return None
+        return self._match_line(page.normalized(0), page.line(0))
+
+
+class SecondLineDetector(Detector):
+    """The same patterns one line further down, at lower confidence"""
+
+    name = 'second-line'
+
+    def __init__(self, patterns, line: int = 1, penalty: int = 10):
+        super().__init__(patterns)
+        self.line = line
+        self.penalty = penalty
+
+    def may_match(self, page: PageLines) -> bool:
+        if not page.has_line(self.line):
+            return False
+        return self._any is None or bool(self._any.search(page.normalized(self.line)))
+
+    def detect(self, page: PageLines) -> Optional[Detection]:
+        return self._match_line(page.normalized(self.line), page.line(self.line),
+                                self.penalty)
+
+
+class BodyDetector(Detector):
+    """
+    Headings anywhere below the first lines (article granularity)
+
+    Only lines containing keyword are normalized and matched.
+    """
+
+    name = 'body'
+
+    def __init__(self, patterns, keyword: str, start: int = 2, penalty: int = 10):
+        super().__init__(patterns)
+        self.keyword = keyword.upper()
+        self.start = start
+        self.penalty = penalty
+
+    def _candidates(self, page: PageLines) -> List[int]:
+        return [i for i in range(self.start, len(page.key_lines))
+                if self.keyword in page.key_lines[i].upper()]
+
+    def may_match(self, page: PageLines) -> bool:
+        return bool(self._candidates(page))
+
+    def detect(self, page: PageLines) -> Optional[Detection]:
+        for i in self._candidates(page):
+            found = self._match_line(page.normalized(i), page.key_lines[i], self.penalty)
+            if found:
+                return found
+        return None
+
+
+class LooseDetector(Detector):
+    """
+    Unanchored patterns anywhere in the first lines (original PDFSplitter)
+
+    Matches in the first three lines keep the pattern's confidence; further
+    down it drops by 30.
+    """
+
+    name = 'loose'
+
+    def __init__(self, patterns, max_lines: int = 10):
+        super().__init__(patterns)
+        self.max_lines = max_lines
+        _, self._lines_any = compiled_set(patterns, re.MULTILINE)
+
+    def _lines(self, page: PageLines) -> List[Tuple[int, str, str]]:
+        """(position, line, normalized line) of the non-empty first lines"""
+        if page.loose_lines is None:
+            lines = [raw.strip() for raw in page.text.split('\n', self.max_lines)[:self.max_lines]]
+            page.loose_lines = [(i, line, norm) for i, (line, norm)
+                                in enumerate(zip(lines, normalize_lines(lines, page.apostrophes)))
+                                if line]
+        return page.loose_lines
+
+    def may_match(self, page: PageLines) -> bool:
+        if self._lines_any is None:
+            return True
+        return bool(self._lines_any.search('\n'.join(norm for _, _, norm in self._lines(page))))
+
+    def detect(self, page: PageLines) -> Optional[Detection]:
+        for i, line, line_norm in self._lines(page):
+            found = self._match_line(line_norm, line, 0 if i < 3 else 30)
+            if found:
+                return found
+        return None
+
+
+class DetectorCascade:
+    """
+    Runs detectors in order until one finds a section start
+
+    A later stage only runs when its may_match() pre-check passes, so most
+    pages are settled by the first (cheapest) stage. decided_by counts, per
+    stage, the pages it was the last one to look at.
+    """
+
+    def __init__(self, detectors: List[Detector]):
+        self.detectors = detectors
+        self.decided_by: Dict[str, int] = {d.name: 0 for d in detectors}
+
+    def detect(self, page: PageLines) -> Optional[Detection]:
+        last = self.detectors[0].name
+        for index, detector in enumerate(self.detectors):
+            if index and not detector.may_match(page):
+                continue
+            last = detector.name
+            found = detector.detect(page)
+            if found:
+                self.decided_by[last] += 1
+                return found
+        self.decided_by[last] += 1
+        return None
@@ -0,0 +1,67 @@
+"""
+Streaming discovery of input PDFs
+Walks folders with os.scandir and yields matches as they are found, so
+processing of huge archive trees starts right away
+"""
+
+import os
+import logging
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INCLUDE = ['*.pdf']
+# Our own output folders, lease/checkpoint folders and other hidden entries
+DEFAULT_EXCLUDE = ['*_split', '.*']
+
+
+def _matches(name: str, rel_path: str, patterns: List[str]) -> bool:
+    """Case-insensitive glob match against the entry name or its relative path"""
+    name, rel_path = name.lower(), rel_path.lower()
+    return any(fnmatch(name, p) or fnmatch(rel_path, p) for p in patterns)
+
+
+def iter_pdfs(root, recursive: bool = False, include: Optional[List[str]] = None,
+              exclude: Optional[List[str]] = None) -> Iterator[Path]:
+    """
+    Yield input files under root, depth first, each folder in name order
+
+    Args:
+        root: Folder to search
+        recursive: Descend into subfolders
+        include: Globs a file must match (default: *.pdf, any case)
+        exclude: Globs for files and folders to skip, matched against the
+                 name and the path relative to root (default: *_split, .*)
+    """
+    include = [p.lower() for p in (include or DEFAULT_INCLUDE)]
+    exclude = [p.lower() for p in (DEFAULT_EXCLUDE if exclude is None else exclude)]
+    root = Path(root)
+
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"Cannot list {folder}: {e}")
+            continue
+
+        subfolders = []
+        for entry in entries:
+            rel_path = os.path.relpath(entry.path, root).replace(os.sep, '/')
+            if _matches(entry.name, rel_path, exclude):
+                continue
+            try:
+                if entry.is_dir():
+                    if recursive:
+                        subfolders.append(Path(entry.path))
+                elif entry.is_file() and _matches(entry.name, rel_path, include):
+                    yield Path(entry.path)
+            except OSError as e:
+                logger.debug(f"Skipping {entry.path}: {e}")
+
+        # Reversed so folders are visited in name order
+        stack.extend(reversed(subfolders))
@@ -0,0 +1,151 @@
+"""
+Supervised text extraction with per-page and per-document time budgets
+A malformed page that makes extraction spin is killed instead of stalling a batch
+"""
+
+import time
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(source, conn, backend: str):
+    """Child process: extract text for page numbers received over the pipe"""
+    import io
+    from pdf_backend import open_backend
+
+    pdf = open_backend(io.BytesIO(source) if isinstance(source, bytes) else source, backend)
+    # The parent starts a page's clock only once the document is open
+    conn.send(None)
+    while True:
+        page_num = conn.recv()
+        if page_num is None:
+            break
+        conn.send(pdf.page_text(page_num))
+    conn.close()
+
+
+class PageTimeout(Exception):
+    """Raised when a page exceeds its extraction budget"""
+
+
+class SupervisedExtractor:
+    """
+    Extracts page text in a child process that is killed and replaced
+    when a page runs over its time budget
+    """
+
+    def __init__(self, pdf_path, page_timeout: Optional[float] = None,
+                 doc_timeout: Optional[float] = None, backend: str = 'pypdf2'):
+        """
+        Args:
+            pdf_path: PDF opened by the worker process (path, or the document bytes)
+            page_timeout: Seconds allowed per page (None = no limit)
+            doc_timeout: Seconds allowed for the whole document (None = no limit)
+            backend: PDF backend name used by the worker (see pdf_backend.py)
+        """
+        self.pdf_path = pdf_path if isinstance(pdf_path, bytes) else str(Path(pdf_path))
+        self.page_timeout = page_timeout
+        self.doc_timeout = doc_timeout
+        self.backend = backend
+        self.started = time.monotonic()
+        self._process = None
+        self._conn = None
+
+    def _start(self) -> bool:
+        """
+        Start a worker and wait until it has opened the document
+
+        Start-up and opening count against the document budget only, not
+        against the page that needed the worker. Returns False if the worker
+        died while opening.
+        """
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_worker_main, args=(self.pdf_path, child_conn, self.backend), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        remaining = self.remaining()
+        try:
+            if not self._conn.poll(None if remaining is None else max(remaining, 0)):
+                self._kill()
+                raise PageTimeout(f"document budget of {self.doc_timeout}s exhausted "
+                                  f"opening the PDF")
+            self._conn.recv()
+        except (EOFError, OSError) as e:
+            logger.debug(f"Extraction worker died opening the PDF: {e}")
+            self._kill()
+            return False
+        return True
+
+    def _kill(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left in the document budget (None = unlimited)"""
+        if self.doc_timeout is None:
+            return None
+        return self.doc_timeout - (time.monotonic() - self.started)
+
+    def budget_exhausted(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def extract(self, page_num: int) -> str:
+        """
+        Extract one page's text
+
+        Raises:
+            PageTimeout: the page (or the rest of the document budget) ran out
+        """
+        if self.budget_exhausted():
+            raise PageTimeout(f"document budget of {self.doc_timeout}s exhausted")
+        if self._process is None or not self._process.is_alive():
+            if not self._start():
+                return ""
+
+        limit = self.page_timeout
+        remaining = self.remaining()
+        if remaining is not None:
+            limit = remaining if limit is None else min(limit, remaining)
+
+        try:
+            self._conn.send(page_num)
+            if self._conn.poll(limit):
+                return self._conn.recv()
+        except (EOFError, OSError) as e:
+            # Worker crashed on this page; replace it and treat page as empty
+            logger.debug(f"Extraction worker died on page {page_num + 1}: {e}")
+            self._kill()
+            return ""
+
+        logger.warning(f"Page {page_num + 1}: extraction exceeded {limit:.1f}s, "
+                       f"restarting worker")
+        self._kill()
+        raise PageTimeout(f"page {page_num + 1} exceeded {limit:.1f}s")
+
+    def close(self):
+        """Stop the worker process"""
+        if self._process is not None and self._process.is_alive():
+            try:
+                self._conn.send(None)
+                self._process.join(1)
+            except OSError:
+                pass
+        self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
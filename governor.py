@@ -0,0 +1,373 @@
+"""
+Memory-aware concurrency for batches
+Documents are split in worker processes; a new one starts only while the
+machine has memory to spare for it, so a batch uses the whole box on small
+agreements and backs off when several huge scans come up together
+"""
+
+import os
+import time
+import signal
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# Memory kept free for the system: a share of RAM, at least MIN_RESERVE
+RESERVE_FRACTION = 0.10
+MIN_RESERVE = 512 * MB
+# A priori peak RSS of a worker: interpreter and libraries, plus the parsed
+# file and per-page objects. Observed peaks correct it (see MemoryGovernor).
+WORKER_BASE = 80 * MB
+BYTES_PER_FILE_BYTE = 1.5
+BYTES_PER_PAGE = 256 * 1024
+# Recent documents whose observed/predicted peak ratio sets the correction
+_HISTORY = 16
+# Times a document may be stopped for lack of memory; after that it runs on
+MAX_SHEDS = 2
+
+
+def _read_meminfo() -> Optional[Dict[str, int]]:
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            return {line.split(':')[0]: int(line.split()[1]) * 1024 for line in f
+                    if line.split(':')[0] in ('MemTotal', 'MemAvailable')}
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def system_memory() -> Optional[Tuple[int, int]]:
+    """
+    (total, available) bytes of RAM, or None when they cannot be read
+
+    /proc on Linux; elsewhere psutil when it is installed.
+    """
+    info = _read_meminfo()
+    if info and 'MemAvailable' in info:
+        return info['MemTotal'], info['MemAvailable']
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.virtual_memory()
+    return memory.total, memory.available
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """Resident set size of a process in bytes, or None"""
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss
+    except ImportError:
+        return None
+    except Exception:   # psutil.Error: the process is gone
+        return None
+
+
+def _child_pids(pid: int) -> Optional[List[int]]:
+    """Direct children of a process from /proc, or None without /proc"""
+    try:
+        tasks = os.listdir(f'/proc/{pid}/task')
+    except FileNotFoundError:
+        return [] if os.path.isdir('/proc/self/task') else None
+    except OSError:
+        return None
+    children = []
+    for task in tasks:
+        try:
+            with open(f'/proc/{pid}/task/{task}/children', 'r') as f:
+                children.extend(int(c) for c in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return children
+
+
+def descendants(pid: int) -> List[int]:
+    """
+    PIDs of every child and grandchild of a process
+
+    /proc on Linux; elsewhere psutil when it is installed (else none).
+    """
+    children = _child_pids(pid)
+    if children is None:
+        try:
+            import psutil
+
+            return [c.pid for c in psutil.Process(pid).children(recursive=True)]
+        except ImportError:
+            return []
+        except Exception:   # psutil.Error: the process is gone
+            return []
+    found = []
+    while children:
+        child = children.pop()
+        if child not in found:
+            found.append(child)
+            children.extend(_child_pids(child) or [])
+    return found
+
+
+def tree_rss(pid: int) -> Optional[int]:
+    """
+    Resident set size of a process and all its descendants, or None
+
+    A worker's page-timeout extraction runs in a child process (see
+    extract_worker.py), which counts against the document too.
+    """
+    total = process_rss(pid)
+    if total is None:
+        return None
+    return total + sum(process_rss(child) or 0 for child in descendants(pid))
+
+
+class Job:
+    """One document to split in a worker process"""
+
+    def __init__(self, key: Path, size: int, pages: Optional[int], args: Tuple):
+        self.key = key
+        self.size = size
+        self.pages = pages
+        self.args = args           # passed to the worker target after its pipe end
+        self.estimate = 0          # predicted peak RSS, set when queued
+        self.peak = 0              # highest RSS seen while it ran
+        self.seconds = 0.0
+        self.exitcode = None
+        self.retried = False
+        self.sheds = 0             # times stopped for lack of memory
+
+
+class MemoryGovernor:
+    """
+    Decides when another document may start
+
+    Below min_jobs running documents one always may; at max_jobs none may.
+    In between, a document starts only if its predicted peak RSS fits in
+    the available memory minus the reserve and minus what the running
+    workers are still expected to grow by. Predictions start from size and
+    page count (prior()) and are scaled by the highest observed/predicted
+    ratio of recent documents, so the model errs on the safe side.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None, min_jobs: int = 1,
+                 reserve: Optional[int] = None):
+        """
+        Args:
+            max_jobs: Most documents at once (default: CPU count)
+            min_jobs: Documents allowed at once whatever the memory
+            reserve: Bytes to keep free (default: 10% of RAM, at least 512 MB)
+        """
+        self.max_jobs = max(max_jobs or os.cpu_count() or 1, 1)
+        self.min_jobs = min(max(min_jobs, 1), self.max_jobs)
+        memory = system_memory()
+        self.measured = memory is not None
+        if reserve is None:
+            reserve = MIN_RESERVE
+            if memory is not None:
+                reserve = max(reserve, int(memory[0] * RESERVE_FRACTION))
+        self.reserve = reserve
+        self._ratios = deque(maxlen=_HISTORY)
+
+        if not self.measured and self.max_jobs > self.min_jobs:
+            logger.warning(f"System memory cannot be read (install psutil); running "
+                           f"{self.min_jobs} document(s) at a time")
+
+    @staticmethod
+    def prior(size: int, pages: Optional[int]) -> int:
+        """Peak RSS model before any document was observed"""
+        return int(WORKER_BASE + size * BYTES_PER_FILE_BYTE + (pages or 0) * BYTES_PER_PAGE)
+
+    @property
+    def correction(self) -> float:
+        return max(self._ratios) if self._ratios else 1.0
+
+    def estimate(self, size: int, pages: Optional[int]) -> int:
+        """Predicted peak RSS of a worker splitting a document"""
+        return int(self.prior(size, pages) * self.correction)
+
+    def learn(self, job: Job):
+        """Correct the model with the peak a finished document reached"""
+        if job.peak:
+            self._ratios.append(job.peak / self.prior(job.size, job.pages))
+
+    def headroom(self, running: List[Job]) -> Optional[int]:
+        """Bytes a new document may still use, or None if memory is not measured"""
+        memory = system_memory()
+        if memory is None:
+            return None
+        growth = sum(max(0, j.estimate - j.peak) for j in running)
+        return memory[1] - self.reserve - growth
+
+    def admit(self, job: Job, running: List[Job]) -> bool:
+        if len(running) < self.min_jobs:
+            return True
+        if len(running) >= self.max_jobs:
+            return False
+        room = self.headroom(running)
+        return room is not None and job.estimate <= room
+
+    def overloaded(self, running: List[Job]) -> bool:
+        """True when less than half the reserve is left and a worker can be shed"""
+        if len(running) <= self.min_jobs:
+            return False
+        memory = system_memory()
+        return memory is not None and memory[1] < self.reserve / 2
+
+
+class GovernedRunner:
+    """
+    Runs jobs in worker processes, as many at once as the governor allows
+
+    Jobs start in the order given; one that does not fit waits (and holds
+    back those after it) until memory frees up. Under memory pressure the
+    most recently started worker is stopped and its document queued again
+    (at most MAX_SHEDS times per document), as is (once) a document whose
+    worker was killed, e.g. by the OOM killer. Memory is measured over each
+    worker's whole process tree.
+
+    target(conn, *job.args, cancel_event) runs in the worker and sends one
+    picklable payload through conn.
+    """
+
+    def __init__(self, governor: MemoryGovernor, target: Callable, cancel=None,
+                 interval: float = 0.5):
+        import multiprocessing
+
+        self.governor = governor
+        self.target = target
+        self.cancel = cancel
+        self.interval = interval
+        self.context = multiprocessing.get_context()
+        self.cancel_event = self.context.Event()
+        self._queue = deque()
+
+    def _start(self, job: Job) -> Dict:
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=self.target,
+                                       args=(sender,) + job.args + (self.cancel_event,),
+                                       name=f"split-{job.key.name}")
+        process.start()
+        sender.close()
+        job.peak = 0
+        return {'job': job, 'process': process, 'conn': receiver, 'started': time.monotonic()}
+
+    @staticmethod
+    def _stop(worker: Dict):
+        """Terminate a worker and whatever it started (page-timeout extraction)"""
+        children = descendants(worker['process'].pid)
+        worker['process'].terminate()
+        worker['process'].join()
+        for pid in children:
+            try:
+                os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+            except OSError:
+                pass
+
+    def _requeue(self, queue: deque, job: Job, reason: str):
+        job.estimate = max(job.estimate, int(job.peak * 1.25))
+        queue.appendleft(job)
+        logger.warning(f"{reason}: {job.key.name} queued again "
+                       f"(needs ~{job.estimate // MB} MB)")
+
+    def submit(self, job: Job):
+        """Add a job while run() is iterating, e.g. from its consumer"""
+        job.estimate = self.governor.estimate(job.size, job.pages)
+        self._queue.append(job)
+
+    def run(self, jobs: Iterator[Job]) -> Iterator[Tuple[Job, object]]:
+        """
+        Run jobs, yielding (job, payload) as each finishes
+
+        jobs is read lazily, one job ahead; submit() adds more. The payload
+        is None when the worker died without sending one (job.exitcode
+        says how).
+        """
+        from multiprocessing.connection import wait
+
+        queue = self._queue
+        running: Dict[object, Dict] = {}
+        exhausted = False
+        waiting_for = None
+        shown = 0
+
+        try:
+            while True:
+                # Admit documents while they fit
+                while not (self.cancel is not None and self.cancel.cancelled):
+                    if not queue and not exhausted:
+                        job = next(jobs, None)
+                        if job is None:
+                            exhausted = True
+                            break
+                        job.estimate = self.governor.estimate(job.size, job.pages)
+                        queue.append(job)
+                    if not queue:
+                        break
+                    active = [w['job'] for w in running.values()]
+                    if not self.governor.admit(queue[0], active):
+                        if waiting_for is not queue[0] and len(active) < self.governor.max_jobs:
+                            waiting_for = queue[0]
+                            logger.info(f"Waiting for memory before {queue[0].key.name} "
+                                        f"(needs ~{queue[0].estimate // MB} MB)")
+                        break
+                    worker = self._start(queue.popleft())
+                    running[worker['conn']] = worker
+
+                if self.cancel is not None and self.cancel.cancelled:
+                    self.cancel_event.set()
+                if len(running) != shown:
+                    shown = len(running)
+                    logger.debug(f"{shown} document(s) running")
+                metrics.WORKERS.set(len(running))
+                if not running:
+                    break
+
+                for conn in wait(list(running), timeout=self.interval):
+                    worker = running.pop(conn)
+                    job = worker['job']
+                    try:
+                        payload = conn.recv()
+                    except (EOFError, OSError):
+                        payload = None
+                    conn.close()
+                    worker['process'].join()
+                    job.exitcode = worker['process'].exitcode
+                    job.seconds = time.monotonic() - worker['started']
+                    if payload is None and job.exitcode and job.exitcode < 0 \
+                            and not job.retried and not self.cancel_event.is_set():
+                        job.retried = True
+                        self._requeue(queue, job, f"Worker killed (signal {-job.exitcode})")
+                        continue
+                    self.governor.learn(job)
+                    yield job, payload
+
+                # Per-worker memory, children included
+                for worker in running.values():
+                    rss = tree_rss(worker['process'].pid)
+                    if rss:
+                        worker['job'].peak = max(worker['job'].peak, rss)
+
+                active = [w['job'] for w in running.values()]
+                sheddable = [item for item in running.items()
+                             if item[1]['job'].sheds < MAX_SHEDS]
+                if sheddable and self.governor.overloaded(active):
+                    conn, worker = max(sheddable, key=lambda item: item[1]['started'])
+                    del running[conn]
+                    self._stop(worker)
+                    conn.close()
+                    worker['job'].sheds += 1
+                    self._requeue(queue, worker['job'], "Memory is short")
+        finally:
+            for worker in running.values():
+                self._stop(worker)
+            metrics.WORKERS.set(0)
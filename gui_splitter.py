@@ -8,30 +8,156 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 from pathlib import Path
 import threading
 import logging
-from split_agreement import AgreementSplitter, batch_process
+import time
+import queue
+import shutil
+import tempfile
+import multiprocessing
+from progress import CancelToken, ProcessingCancelled, format_progress
+
+# The splitter (and PyPDF2) is imported on first use so the window opens
+# without waiting for it
 
 # Configure logging for GUI
 class TextHandler(logging.Handler):
-    """Custom logging handler to display logs in GUI"""
-    def __init__(self, text_widget):
+    """
+    Logging handler that displays records in a text widget
+    
+    Records are queued by emit() (any thread) and flushed to the widget in
+    batches on a timer, so a chatty worker thread cannot flood the Tk event
+    loop. The widget keeps only the most recent lines; the full log is
+    spooled to a temporary file and can be saved with save().
+    """
+    def __init__(self, text_widget, max_lines: int = 2000, flush_interval: int = 100,
+                 max_batch: int = 500):
         super().__init__()
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.records = queue.SimpleQueue()
+        self.spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.text_widget.after(self.flush_interval, self._flush)
+    
+    def emit(self, record):
+        try:
+            self.records.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+    
+    def _drain(self):
+        lines = []
+        while len(lines) < self.max_batch:
+            try:
+                lines.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        return lines
+    
+    def _flush(self):
+        """Append queued records to the widget (Tk thread)"""
+        lines = self._drain()
+        if lines:
+            chunk = '\n'.join(lines) + '\n'
+            self.spool.write(chunk)
+            
+            widget = self.text_widget
+            widget.configure(state='normal')
+            widget.insert(tk.END, chunk)
+            excess = int(widget.index('end-1c').split('.')[0]) - 1 - self.max_lines
+            if excess > 0:
+                widget.delete('1.0', f'{excess + 1}.0')
+            widget.configure(state='disabled')
+            widget.see(tk.END)
+        
+        # Come back sooner while a backlog remains
+        delay = 1 if len(lines) >= self.max_batch else self.flush_interval
+        self.text_widget.after(delay, self._flush)
+    
+    def save(self, path):
+        """Write the complete log (not just the visible lines) to a file"""
+        for line in self._drain():
+            self.spool.write(line + '\n')
+        self.spool.flush()
+        self.spool.seek(0)
+        with open(path, 'w', encoding='utf-8') as f:
+            shutil.copyfileobj(self.spool, f)
+        self.spool.seek(0, 2)
+    
+    def clear(self):
+        """Forget the spooled log"""
+        self.spool.seek(0)
+        self.spool.truncate()
+    
+    def close(self):
+        self.spool.close()
+        super().close()
+
+
+class _JobLogHandler(logging.Handler):
+    """Forwards a job process's log lines to the GUI"""
+    def __init__(self, messages, job_id):
+        super().__init__()
+        self.messages = messages
+        self.job_id = job_id
     
     def emit(self, record):
-        msg = self.format(record)
-        def append():
-            self.text_widget.configure(state='normal')
-            self.text_widget.insert(tk.END, msg + '\n')
-            self.text_widget.configure(state='disabled')
-            self.text_widget.see(tk.END)
-        self.text_widget.after(0, append)
+        try:
+            self.messages.put(('log', self.job_id, self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+
+def run_job(job, messages, cancel_event):
+    """
+    Run one queued job in a pool process
+    
+    Log lines and (throttled) progress updates are sent to the GUI through
+    the messages queue; cancel_event stops the job within one page.
+    """
+    from split_agreement import AgreementSplitter, batch_process
+    
+    handler = _JobLogHandler(messages, job['id'])
+    handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [handler]
+    root_logger.setLevel(logging.INFO)
+    
+    last = [0.0]
+    def progress(info):
+        now = time.monotonic()
+        if info['phase'] == 'done' or now - last[0] >= 0.2:
+            last[0] = now
+            messages.put(('progress', job['id'], info))
+    
+    cancel = CancelToken(cancel_event)
+    if job['batch']:
+        results = batch_process(job['input'], job['output'], job['min_pages'],
+                                job['merge_gap'], progress=progress, cancel=cancel)
+        return {
+            'success': bool(results) and all(r.get('success') for r in results),
+            'cancelled': cancel.cancelled,
+            'documents': len(results),
+            'files_created': sum(r.get('files_created', 0) for r in results),
+        }
+    
+    splitter = AgreementSplitter(job['input'], job['output'], job['min_pages'],
+                                 job['merge_gap'], progress=progress, cancel=cancel)
+    result = splitter.process()
+    return {
+        'success': result['success'],
+        'cancelled': bool(result.get('cancelled')),
+        'documents': 1,
+        'files_created': result.get('files_created', 0),
+        'error': result.get('error'),
+    }
 
 
 class PDFSplitterGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("PDF Labor Agreement Splitter")
-        self.root.geometry("800x600")
+        self.root.geometry("800x750")
         
         # Variables
         self.input_path = tk.StringVar()
@@ -39,10 +165,31 @@ class PDFSplitterGUI:
         self.min_pages = tk.IntVar(value=2)
         self.merge_gap = tk.IntVar(value=5)
         self.batch_mode = tk.BooleanVar(value=False)
+        self.status_text = tk.StringVar(value="Ready")
         self.processing = False
+        self.cancel_token = None
+        self._progress_info = None
+        self._scan = None  # (scan key, splitter, markers) of the analyzed file
+        self._pending_scan = None
+        
+        # Job queue (runs on a process pool)
+        self.concurrency = tk.IntVar(value=max(1, min(4, multiprocessing.cpu_count())))
+        self.jobs = {}  # job id -> job dict (with 'future', 'cancel', 'status')
+        self._job_counter = 0
+        self._executor = None
+        self._pool_size = 0
+        self._manager = None
+        self._job_messages = None
+        self._polling_jobs = False
         
         self.create_widgets()
         self.setup_logging()
+        
+        # Regroup the cached scan whenever the grouping options change
+        self.min_pages.trace_add('write', self._on_options_changed)
+        self.merge_gap.trace_add('write', self._on_options_changed)
+        self.input_path.trace_add('write', self._on_options_changed)
+        self.batch_mode.trace_add('write', self._on_options_changed)
     
     def create_widgets(self):
         # Main frame
@@ -87,27 +234,85 @@ class PDFSplitterGUI:
         ttk.Spinbox(options_frame, from_=1, to=20, textvariable=self.merge_gap, 
                    width=10).grid(row=0, column=3, sticky=tk.W, padx=5)
         
+        notebook = ttk.Notebook(main_frame)
+        notebook.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        
+        # Section preview (single file, after Analyze)
+        preview_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(preview_frame, text="Sections Preview")
+        
+        columns = ('type', 'pages', 'count', 'confidence', 'header')
+        self.preview = ttk.Treeview(preview_frame, columns=columns, show='headings', 
+                                    height=6)
+        for col, heading, width in (('type', 'Section', 120), ('pages', 'Pages', 90),
+                                    ('count', 'Count', 60), ('confidence', 'Confidence', 80),
+                                    ('header', 'Header', 300)):
+            self.preview.heading(col, text=heading)
+            self.preview.column(col, width=width, stretch=(col == 'header'))
+        self.preview.pack(fill=tk.X, expand=True)
+        
+        # Job queue
+        jobs_frame = ttk.Frame(notebook, padding="5")
+        notebook.add(jobs_frame, text="Job Queue")
+        
+        columns = ('input', 'status', 'progress', 'detail')
+        self.jobs_view = ttk.Treeview(jobs_frame, columns=columns, show='headings', 
+                                      height=5)
+        for col, heading, width in (('input', 'Input', 200), ('status', 'Status', 80),
+                                    ('progress', 'Progress', 70), ('detail', 'Detail', 300)):
+            self.jobs_view.heading(col, text=heading)
+            self.jobs_view.column(col, width=width, stretch=(col == 'detail'))
+        self.jobs_view.grid(row=0, column=0, columnspan=6, sticky=(tk.W, tk.E))
+        jobs_frame.columnconfigure(5, weight=1)
+        
+        ttk.Button(jobs_frame, text="Add Files...", command=self.add_file_jobs).grid(
+            row=1, column=0, padx=2, pady=5)
+        ttk.Button(jobs_frame, text="Add Folder...", command=self.add_folder_job).grid(
+            row=1, column=1, padx=2, pady=5)
+        ttk.Label(jobs_frame, text="Concurrency:").grid(row=1, column=2, padx=2)
+        ttk.Spinbox(jobs_frame, from_=1, to=max(1, multiprocessing.cpu_count()), 
+                   textvariable=self.concurrency, width=5).grid(row=1, column=3, padx=2)
+        ttk.Button(jobs_frame, text="Cancel Jobs", command=self.cancel_jobs).grid(
+            row=1, column=4, padx=2, pady=5)
+        ttk.Button(jobs_frame, text="Clear Finished", command=self.clear_finished_jobs).grid(
+            row=1, column=5, padx=2, pady=5, sticky=tk.W)
+        
         # Buttons frame
         button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=5, column=0, columnspan=3, pady=10)
+        button_frame.grid(row=6, column=0, columnspan=3, pady=10)
+        
+        self.analyze_btn = ttk.Button(button_frame, text="Analyze", 
+                                      command=self.analyze_file, width=12)
+        self.analyze_btn.grid(row=0, column=0, padx=5)
         
-        self.process_btn = ttk.Button(button_frame, text="Process", 
-                                      command=self.process_files, width=15)
-        self.process_btn.grid(row=0, column=0, padx=5)
+        self.process_btn = ttk.Button(button_frame, text="Split", 
+                                      command=self.process_files, width=12)
+        self.process_btn.grid(row=0, column=1, padx=5)
+        
+        self.cancel_btn = ttk.Button(button_frame, text="Cancel", 
+                                     command=self.cancel_processing, width=12,
+                                     state='disabled')
+        self.cancel_btn.grid(row=0, column=2, padx=5)
         
         ttk.Button(button_frame, text="Clear Log", command=self.clear_log, 
-                  width=15).grid(row=0, column=1, padx=5)
+                  width=12).grid(row=0, column=3, padx=5)
+        
+        ttk.Button(button_frame, text="Save Log...", command=self.save_log, 
+                  width=12).grid(row=0, column=4, padx=5)
         
-        ttk.Button(button_frame, text="Exit", command=self.root.quit, 
-                  width=15).grid(row=0, column=2, padx=5)
+        ttk.Button(button_frame, text="Exit", command=self.shutdown, 
+                  width=12).grid(row=0, column=5, padx=5)
         
         # Progress bar
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
-        self.progress.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=1.0)
+        self.progress.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Label(main_frame, textvariable=self.status_text).grid(
+            row=8, column=0, columnspan=3, sticky=tk.W)
         
         # Log area
         log_frame = ttk.LabelFrame(main_frame, text="Processing Log", padding="5")
-        log_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), 
+        log_frame.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), 
                       pady=5)
         
         self.log_text = scrolledtext.ScrolledText(log_frame, height=15, state='disabled', 
@@ -118,7 +323,7 @@ class PDFSplitterGUI:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(1, weight=1)
-        main_frame.rowconfigure(7, weight=1)
+        main_frame.rowconfigure(9, weight=1)
     
     def setup_logging(self):
         """Setup logging to display in GUI"""
@@ -130,9 +335,9 @@ class PDFSplitterGUI:
             logger.removeHandler(handler)
         
         # Add GUI handler
-        text_handler = TextHandler(self.log_text)
-        text_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-        logger.addHandler(text_handler)
+        self.text_handler = TextHandler(self.log_text)
+        self.text_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+        logger.addHandler(self.text_handler)
     
     def browse_input(self):
         """Browse for input file or folder"""
@@ -157,33 +362,185 @@ class PDFSplitterGUI:
         self.log_text.configure(state='normal')
         self.log_text.delete('1.0', tk.END)
         self.log_text.configure(state='disabled')
+        self.text_handler.clear()
     
-    def process_files(self):
-        """Process the PDFs"""
+    def save_log(self):
+        """Save the full processing log to a file"""
+        path = filedialog.asksaveasfilename(
+            title="Save log",
+            defaultextension=".log",
+            filetypes=[("Log files", "*.log"), ("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            try:
+                self.text_handler.save(path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save log:\n{e}")
+    
+    def _check_input(self) -> bool:
+        """Validate the input path, telling the user what is wrong"""
         if self.processing:
             messagebox.showwarning("Processing", "Already processing files!")
-            return
+            return False
         
         input_path = self.input_path.get()
         if not input_path:
             messagebox.showerror("Error", "Please select an input file or folder!")
-            return
+            return False
         
         if not Path(input_path).exists():
             messagebox.showerror("Error", "Input path does not exist!")
+            return False
+        
+        return True
+    
+    @staticmethod
+    def _scan_key(input_path):
+        """Identity of an input file; changes when the file is replaced"""
+        path = Path(input_path).resolve()
+        return (str(path), path.stat().st_mtime_ns)
+    
+    def _cached_scan(self):
+        """The cached (key, splitter, markers) for the current input, if any"""
+        if self._scan is None or self.batch_mode.get():
+            return None
+        try:
+            key = self._scan_key(self.input_path.get())
+        except OSError:
+            return None
+        return self._scan if self._scan[0] == key else None
+    
+    def analyze_file(self):
+        """Scan the selected file once and preview its sections"""
+        if self.batch_mode.get():
+            messagebox.showinfo("Analyze", "Analyze works on a single file.\n"
+                                "Turn off Batch Mode to preview sections.")
+            return
+        if not self._check_input():
             return
+        self._start_worker(self._analyze_thread)
+    
+    def _analyze_thread(self):
+        """Scanning thread for Analyze"""
+        from split_agreement import AgreementSplitter
         
-        # Start processing in a separate thread
+        try:
+            input_path = self.input_path.get()
+            output_path = self.output_path.get() or None
+            key = self._scan_key(input_path)
+            splitter = AgreementSplitter(input_path, output_path,
+                                         self.min_pages.get(), self.merge_gap.get(),
+                                         progress=self._on_progress,
+                                         cancel=self.cancel_token)
+            markers = splitter.find_all_sections()
+            self.root.after(0, lambda: self._store_scan(key, splitter, markers))
+        
+        except ProcessingCancelled:
+            pass
+        
+        except Exception as e:
+            self.root.after(0, lambda: messagebox.showerror(
+                "Error", f"An error occurred:\n{str(e)}"))
+        
+        finally:
+            # Keep the preview summary in the status line
+            self.root.after(0, lambda: self._processing_complete(status=None))
+    
+    def _store_scan(self, key, splitter, markers):
+        self._scan = (key, splitter, markers)
+        self.refresh_preview()
+    
+    def _on_options_changed(self, *args):
+        if not self.processing:
+            self.refresh_preview()
+    
+    def refresh_preview(self):
+        """Regroup the cached markers with the current options (no rescan)"""
+        self.preview.delete(*self.preview.get_children())
+        cached = self._cached_scan()
+        if cached is None:
+            return
+        
+        try:
+            min_pages = self.min_pages.get()
+            merge_gap = self.merge_gap.get()
+        except tk.TclError:
+            return  # Spinbox is being edited
+        
+        _, splitter, markers = cached
+        splitter.min_pages = min_pages
+        splitter.merge_threshold = merge_gap
+        sections = splitter.build_sections(markers)
+        
+        kept = 0
+        for sec in sections:
+            pages = sec['end_page'] - sec['start_page'] + 1
+            written = pages >= min_pages
+            kept += written
+            self.preview.insert('', tk.END, values=(
+                sec['type'] if written else f"({sec['type']})",
+                f"{sec['start_page'] + 1}-{sec['end_page'] + 1}",
+                pages,
+                f"{sec['confidence']}%",
+                sec.get('header', '')))
+        
+        self.status_text.set(f"{len(sections)} section(s), {kept} file(s) to write "
+                             f"- press Split to create them")
+    
+    def process_files(self):
+        """Process the PDFs"""
+        if not self._check_input():
+            return
+        self._start_worker(self._process_thread)
+    
+    def _start_worker(self, target):
+        """Run target on a background thread with progress and cancel wired up"""
         self.processing = True
+        self.cancel_token = CancelToken()
+        self._progress_info = None
+        self._pending_scan = self._cached_scan()
         self.process_btn.config(state='disabled')
-        self.progress.start()
+        self.analyze_btn.config(state='disabled')
+        self.cancel_btn.config(state='normal')
+        self.progress['value'] = 0
+        self.status_text.set("Starting...")
         
-        thread = threading.Thread(target=self._process_thread)
+        thread = threading.Thread(target=target)
         thread.daemon = True
         thread.start()
+        self._poll_progress()
+    
+    def cancel_processing(self):
+        """Ask the worker thread to stop after the current page"""
+        if self.cancel_token:
+            self.cancel_token.cancel()
+            self.cancel_btn.config(state='disabled')
+            self.status_text.set("Cancelling...")
+    
+    def _on_progress(self, info):
+        """Progress callback (worker thread): keep only the latest update"""
+        self._progress_info = info
+    
+    def _poll_progress(self):
+        """Refresh the progress bar from the latest update"""
+        info = self._progress_info
+        if info and not self.cancel_token.cancelled:
+            fraction = info['pages_done'] / info['pages_total'] if info['pages_total'] else 1.0
+            # Scanning is most of the work; splitting fills the rest
+            if info['phase'] == 'scan':
+                fraction *= 0.8
+            else:
+                fraction = 0.8 + 0.2 * fraction
+            if info.get('documents_total'):
+                fraction = (info['documents_done'] + fraction) / info['documents_total']
+            self.progress['value'] = fraction
+            self.status_text.set(format_progress(info))
+        if self.processing:
+            self.root.after(100, self._poll_progress)
     
     def _process_thread(self):
         """Processing thread"""
+        from split_agreement import AgreementSplitter, batch_process
+        
         try:
             input_path = self.input_path.get()
             output_path = self.output_path.get() if self.output_path.get() else None
@@ -192,7 +549,9 @@ class PDFSplitterGUI:
             
             if self.batch_mode.get():
                 # Batch processing
-                results = batch_process(input_path, output_path, min_pages, merge_gap)
+                results = batch_process(input_path, output_path, min_pages, merge_gap,
+                                        progress=self._on_progress,
+                                        cancel=self.cancel_token)
                 success = sum(1 for r in results if r.get('success'))
                 total_files = sum(r.get('files_created', 0) for r in results)
                 
@@ -202,21 +561,27 @@ class PDFSplitterGUI:
                     f"Processed: {len(results)} PDFs\n"
                     f"Successful: {success}\n"
                     f"Files created: {total_files}"))
+            elif self._pending_scan:
+                # Already analyzed: regroup and write without rescanning
+                _, splitter, markers = self._pending_scan
+                splitter.min_pages = min_pages
+                splitter.merge_threshold = merge_gap
+                splitter.cancel = self.cancel_token
+                if output_path:
+                    splitter.output_dir = Path(output_path)
+                else:
+                    splitter.output_dir = (splitter.input_pdf.parent / 
+                                           f"{splitter.input_pdf.stem}_split")
+                splitter.output_dir.mkdir(exist_ok=True, parents=True)
+                result = splitter.process(markers)
+                self._show_result(result)
             else:
                 # Single file processing
-                splitter = AgreementSplitter(input_path, output_path, min_pages, merge_gap)
+                splitter = AgreementSplitter(input_path, output_path, min_pages, merge_gap,
+                                             progress=self._on_progress,
+                                             cancel=self.cancel_token)
                 result = splitter.process()
-                
-                if result['success']:
-                    self.root.after(0, lambda: messagebox.showinfo(
-                        "Success", 
-                        f"Processing complete!\n\n"
-                        f"Files created: {result['files_created']}\n"
-                        f"Output folder: {result['output_dir']}"))
-                else:
-                    self.root.after(0, lambda: messagebox.showerror(
-                        "Error", 
-                        f"Processing failed:\n{result.get('error')}"))
+                self._show_result(result)
         
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror(
@@ -225,16 +590,182 @@ class PDFSplitterGUI:
         finally:
             self.root.after(0, self._processing_complete)
     
-    def _processing_complete(self):
+    def _show_result(self, result):
+        """Report a single-file result (worker thread)"""
+        if result['success']:
+            self.root.after(0, lambda: messagebox.showinfo(
+                "Success", 
+                f"Processing complete!\n\n"
+                f"Files created: {result['files_created']}\n"
+                f"Output folder: {result['output_dir']}"))
+        elif not result.get('cancelled'):
+            self.root.after(0, lambda: messagebox.showerror(
+                "Error", 
+                f"Processing failed:\n{result.get('error')}"))
+    
+    def add_file_jobs(self):
+        """Queue one job per selected PDF"""
+        paths = filedialog.askopenfilenames(
+            title="Select PDF files",
+            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")])
+        for path in paths:
+            self.add_job(path, batch=False)
+    
+    def add_folder_job(self):
+        """Queue a batch job for a folder"""
+        path = filedialog.askdirectory(title="Select folder containing PDFs")
+        if path:
+            self.add_job(path, batch=True)
+    
+    def add_job(self, input_path, batch: bool):
+        """Queue a job with the current options and start it when a slot frees"""
+        try:
+            min_pages = self.min_pages.get()
+            merge_gap = self.merge_gap.get()
+        except tk.TclError:
+            messagebox.showerror("Error", "Invalid options!")
+            return
+        
+        self._ensure_pool()
+        self._job_counter += 1
+        job_id = f"job{self._job_counter}"
+        output = self.output_path.get() or None
+        if output and not batch:
+            output = str(Path(output) / f"{Path(input_path).stem}_split")
+        job = {
+            'id': job_id,
+            'input': input_path,
+            'output': output,
+            'batch': batch,
+            'min_pages': min_pages,
+            'merge_gap': merge_gap,
+        }
+        cancel_event = self._manager.Event()
+        future = self._executor.submit(run_job, job, self._job_messages, cancel_event)
+        self.jobs[job_id] = dict(job, future=future, cancel=cancel_event, status='Queued')
+        
+        name = Path(input_path).name + (" (folder)" if batch else "")
+        self.jobs_view.insert('', tk.END, iid=job_id, values=(name, 'Queued', '', ''))
+        logging.getLogger(__name__).info(f"Queued: {name}")
+        
+        if not self._polling_jobs:
+            self._polling_jobs = True
+            self.root.after(100, self._poll_jobs)
+    
+    def _ensure_pool(self):
+        """Create the process pool (re-created when concurrency changed while idle)"""
+        try:
+            workers = max(1, self.concurrency.get())
+        except tk.TclError:
+            workers = 1
+        busy = any(j['status'] in ('Queued', 'Running') for j in self.jobs.values())
+        
+        if self._executor is not None and not busy and self._pool_size != workers:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+            self._job_messages = self._manager.Queue()
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            self._pool_size = workers
+    
+    def _poll_jobs(self):
+        """Apply job messages and completions to the job table"""
+        for _ in range(500):
+            try:
+                kind, job_id, payload = self._job_messages.get_nowait()
+            except queue.Empty:
+                break
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            name = Path(job['input']).name
+            if kind == 'log':
+                self.text_handler.records.put(f"[{name}] {payload}")
+            elif kind == 'progress' and job['status'] in ('Queued', 'Running'):
+                job['status'] = 'Running'
+                fraction = (payload['pages_done'] / payload['pages_total']
+                            if payload['pages_total'] else 1.0)
+                fraction = fraction * 0.8 if payload['phase'] == 'scan' else 0.8 + 0.2 * fraction
+                if payload.get('documents_total'):
+                    fraction = (payload['documents_done'] + fraction) / payload['documents_total']
+                self.jobs_view.item(job_id, values=(
+                    self.jobs_view.item(job_id, 'values')[0], 'Running',
+                    f"{fraction:.0%}", format_progress(payload)))
+        
+        for job_id, job in self.jobs.items():
+            if job['status'] in ('Queued', 'Running') and job['future'].done():
+                job['status'], detail = self._job_outcome(job)
+                self.jobs_view.item(job_id, values=(
+                    self.jobs_view.item(job_id, 'values')[0], job['status'],
+                    '100%' if job['status'] == 'Done' else '', detail))
+        
+        if any(j['status'] in ('Queued', 'Running') for j in self.jobs.values()):
+            self.root.after(100, self._poll_jobs)
+        else:
+            self._polling_jobs = False
+    
+    @staticmethod
+    def _job_outcome(job):
+        """(status, detail) of a finished job"""
+        if job['future'].cancelled():
+            return 'Cancelled', ''
+        try:
+            result = job['future'].result()
+        except Exception as e:
+            return 'Failed', str(e)
+        if result['cancelled']:
+            return 'Cancelled', ''
+        detail = f"{result['files_created']} file(s) from {result['documents']} PDF(s)"
+        if not result['success']:
+            return 'Failed', result.get('error') or detail
+        return 'Done', detail
+    
+    def cancel_jobs(self):
+        """Cancel queued jobs and stop running ones within one page"""
+        for job in self.jobs.values():
+            if job['status'] in ('Queued', 'Running'):
+                job['future'].cancel()
+                job['cancel'].set()
+    
+    def clear_finished_jobs(self):
+        """Remove finished jobs from the table"""
+        for job_id in [j for j, job in self.jobs.items()
+                       if job['status'] not in ('Queued', 'Running')]:
+            del self.jobs[job_id]
+            self.jobs_view.delete(job_id)
+    
+    def shutdown(self):
+        """Stop job processes and close the window"""
+        self.cancel_jobs()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self._manager is not None:
+            self._manager.shutdown()
+        self.root.quit()
+    
+    def _processing_complete(self, status="Done"):
         """Called when processing is complete"""
         self.processing = False
         self.process_btn.config(state='normal')
-        self.progress.stop()
+        self.analyze_btn.config(state='normal')
+        self.cancel_btn.config(state='disabled')
+        if self.cancel_token.cancelled:
+            self.status_text.set("Cancelled")
+        else:
+            self.progress['value'] = 1.0
+            if status:
+                self.status_text.set(status)
 
 
 def main():
     root = tk.Tk()
     app = PDFSplitterGUI(root)
+    root.protocol("WM_DELETE_WINDOW", app.shutdown)
     root.mainloop()
 
 
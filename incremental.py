@@ -0,0 +1,194 @@
+"""
+Incremental re-splitting of revised agreements
+Pages are matched between versions by a fingerprint of their content, so a
+new edition only has its new or edited pages scanned, and sections whose
+pages are all unchanged are linked from the previous output
+"""
+
+import io
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from json_output import dump_json
+from manifest import write_if_changed
+
+logger = logging.getLogger(__name__)
+
+# Per-page scan results kept next to the outputs for the next version
+PAGE_INDEX_NAME = ".split_pages.json"
+CHANGES_NAME = "changes_report.txt"
+_INDEX_VERSION = 1
+
+UNCHANGED = 'unchanged'
+CHANGED = 'changed'
+ADDED = 'added'
+REMOVED = 'removed'
+
+
+def build_page_index(splitter, sections: List[Dict]) -> Dict:
+    """Page fingerprints, scan results and sections of a processed document"""
+    detections = {d['page']: d for d in splitter.detections}
+    timed_out = set(splitter.timed_out_pages)
+    pages = []
+    for page_num, fingerprint in enumerate(splitter.fingerprints):
+        detection = detections.get(page_num)
+        pages.append({
+            'fingerprint': fingerprint,
+            'kind': splitter.kinds.get(page_num),
+            'timed_out': page_num in timed_out,
+            'header': splitter.header_index.get(page_num),
+            'detection': {k: detection[k] for k in ('type', 'confidence', 'header')}
+                         if detection else None,
+        })
+    return {
+        'version': _INDEX_VERSION,
+        'input_file': str(splitter.input_pdf),
+        'granularity': splitter.granularity,
+        'patterns': splitter.patterns_digest(),
+        'pages': pages,
+        'sections': [{'type': s['type'], 'start_page': s['start_page'],
+                      'end_page': s['end_page'], 'file': s.get('file')} for s in sections],
+    }
+
+
+def save_page_index(output_dir, index: Dict) -> Path:
+    """Write the page index; an identical existing file is left untouched"""
+    path = Path(output_dir) / PAGE_INDEX_NAME
+    text = io.StringIO()
+    dump_json(index, text)
+    # Bytes as text mode would write them, like the report
+    if not write_if_changed(path, text.getvalue().replace('\n', os.linesep).encode('utf-8')):
+        logger.debug(f"Page index unchanged: {path.name}")
+    return path
+
+
+class PreviousVersion:
+    """
+    Scan results and section files of an earlier edition of a document
+
+    Raises:
+        ValueError: the folder has no usable page index (split it again with
+                    this version first)
+    """
+
+    def __init__(self, output_dir, granularity: str, patterns_digest: str):
+        self.output_dir = Path(output_dir)
+        path = self.output_dir / PAGE_INDEX_NAME
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"No page index in {self.output_dir} ({e})")
+        if index.get('version') != _INDEX_VERSION:
+            raise ValueError(f"Page index in {self.output_dir} has an unsupported version")
+        if index.get('granularity') != granularity or index.get('patterns') != patterns_digest:
+            raise ValueError(f"{self.output_dir} was split with other settings or patterns")
+
+        self.input_file = index.get('input_file')
+        self.pages = index['pages']
+        self.sections = index['sections']
+        # Identical content gives identical scan results wherever the page is
+        self._by_fingerprint = {}
+        for page in self.pages:
+            if page['kind'] and not page['timed_out']:
+                self._by_fingerprint.setdefault(page['fingerprint'], page)
+        self._files = {self._fingerprints(s): s['file'] for s in self.sections if s.get('file')}
+
+    def _fingerprints(self, sec: Dict) -> Tuple[str, ...]:
+        return tuple(self.pages[p]['fingerprint']
+                     for p in range(sec['start_page'], sec['end_page'] + 1))
+
+    def page(self, fingerprint: str) -> Optional[Dict]:
+        """Scan result of a page with this content, or None"""
+        return self._by_fingerprint.get(fingerprint)
+
+    def section_file(self, fingerprints: Tuple[str, ...]) -> Optional[Path]:
+        """Existing output of a section with exactly these pages, or None"""
+        name = self._files.get(tuple(fingerprints))
+        if name and (self.output_dir / name).exists():
+            return self.output_dir / name
+        return None
+
+    def compare(self, sections: List[Dict], fingerprints: List[str]) -> List[Dict]:
+        """
+        Section-level differences from this version (1-based pages)
+
+        New sections are paired with old ones of the same type and rank
+        (second Annexe with second Annexe); pages count as changed when no
+        page of the previous version has the same content.
+        """
+        known = set(self._by_fingerprint)
+        old_by_key = {}
+        for key, sec in _ranked(self.sections):
+            old_by_key[key] = sec
+
+        changes = []
+        for key, sec in _ranked(sections):
+            pages = range(sec['start_page'], sec['end_page'] + 1)
+            old = old_by_key.pop(key, None)
+            entry = {'type': sec['type'], 'start_page': sec['start_page'] + 1,
+                     'end_page': sec['end_page'] + 1, 'file': sec.get('file')}
+            if old is None:
+                entry['status'] = ADDED
+            elif self._fingerprints(old) == tuple(fingerprints[p] for p in pages):
+                entry['status'] = UNCHANGED
+            else:
+                entry['status'] = CHANGED
+                entry['changed_pages'] = [p + 1 for p in pages if fingerprints[p] not in known]
+                current = set(fingerprints[p] for p in pages)
+                entry['removed_pages'] = sum(1 for f in self._fingerprints(old)
+                                             if f not in current)
+            if old is not None:
+                entry['previous_pages'] = [old['start_page'] + 1, old['end_page'] + 1]
+            changes.append(entry)
+
+        for (stype, _), old in old_by_key.items():
+            changes.append({'type': stype, 'status': REMOVED, 'file': old.get('file'),
+                            'previous_pages': [old['start_page'] + 1, old['end_page'] + 1]})
+        return changes
+
+
+def _ranked(sections: List[Dict]):
+    """((type, rank among sections of that type), section) pairs"""
+    seen = {}
+    for sec in sections:
+        seen[sec['type']] = seen.get(sec['type'], 0) + 1
+        yield (sec['type'], seen[sec['type']]), sec
+
+
+def format_changes(changes: List[Dict], previous_input: str, pages_rescanned: int,
+                   total_pages: int) -> str:
+    """Text change report"""
+    lines = [
+        "=" * 80,
+        "CHANGES SINCE PREVIOUS VERSION",
+        "=" * 80,
+        "",
+        f"Previous version: {Path(previous_input).name if previous_input else '?'}",
+        f"Pages rescanned: {pages_rescanned} of {total_pages}",
+        "",
+    ]
+    counts = {}
+    for c in changes:
+        counts[c['status']] = counts.get(c['status'], 0) + 1
+    lines.append(", ".join(f"{counts.get(s, 0)} {s}" for s in (UNCHANGED, CHANGED, ADDED, REMOVED)))
+    lines.append("")
+
+    for c in changes:
+        if c['status'] == REMOVED:
+            lines.append(f"REMOVED    {c['type']:<20} was pages {c['previous_pages'][0]}-"
+                         f"{c['previous_pages'][1]}")
+            continue
+        line = f"{c['status'].upper():<10} {c['type']:<20} pages {c['start_page']}-{c['end_page']}"
+        if c['status'] == CHANGED:
+            if c['changed_pages']:
+                line += f"; new/edited pages: {', '.join(map(str, c['changed_pages']))}"
+            if c['removed_pages']:
+                line += f"; {c['removed_pages']} page(s) removed"
+            if not c['changed_pages'] and not c['removed_pages']:
+                line += "; pages moved"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
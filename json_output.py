@@ -0,0 +1,63 @@
+"""
+Machine-readable results: per-document analysis.json and NDJSON streams
+"""
+
+import sys
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_NAME = "analysis.json"
+
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dump_json(data: Dict, f):
+    """Write a JSON document (used with atomic_write in text mode)"""
+    json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    f.write("\n")
+
+
+class NdjsonWriter:
+    """
+    Appends one JSON object per line to stdout or a file
+
+    Every line is flushed as soon as it is written, so consumers can start
+    on a document while the batch is still running.
+    """
+
+    def __init__(self, target: str = '-'):
+        """
+        Args:
+            target: Output file path, or '-' for stdout
+        """
+        self.to_stdout = target == '-'
+        if self.to_stdout:
+            self._fh = sys.stdout
+        else:
+            self._fh = open(Path(target), 'a', encoding='utf-8')
+
+    def write(self, record: Dict):
+        self._fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._fh.flush()
+
+    def close(self):
+        if not self.to_stdout and not self._fh.closed:
+            self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,101 @@
+"""
+Per-folder checksum manifest of section files
+Lets a re-run leave byte-identical sections untouched, so downstream sync
+only sees the files that actually changed
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+from batch_checkpoint import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# sha256sum format: consumers can verify a folder with `sha256sum -c`
+MANIFEST_NAME = "checksums.sha256"
+
+
+def write_if_changed(path, data: bytes) -> bool:
+    """
+    Atomically write data unless the file already holds exactly these bytes
+
+    Returns:
+        True if the file was written
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    atomic_write(path, lambda f: f.write(data))
+    return True
+
+
+class SectionManifest:
+    """Checksums of the section files in one output folder"""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.previous = self._load()
+        self.entries: Dict[str, str] = {}   # file name -> hex sha256, in document order
+
+    def _load(self) -> Dict[str, str]:
+        entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    digest, sep, name = line.rstrip('\n').partition('  ')
+                    if sep:
+                        entries[name] = digest
+        except FileNotFoundError:
+            pass
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+        return entries
+
+    def unchanged(self, filename: str, digest: str, size: int) -> bool:
+        """True if filename already exists with this content"""
+        if self.previous.get(filename) != digest:
+            return False
+        try:
+            return (self.output_dir / filename).stat().st_size == size
+        except OSError:
+            return False
+
+    def add(self, filename: str, digest: str):
+        self.entries[filename] = digest
+
+    def stale(self) -> List[str]:
+        """Files of the previous run that are no longer produced"""
+        # Plain names only: a hand-edited manifest must not reach outside the folder
+        return [name for name in self.previous
+                if name not in self.entries and Path(name).name == name]
+
+    def save(self, complete: bool = True) -> bool:
+        """
+        Write the manifest (only if it changed)
+
+        Args:
+            complete: Every section was produced. Otherwise (cancelled run)
+                      entries not reached yet are kept from the previous manifest.
+        """
+        entries = self.entries if complete else dict(self.previous, **self.entries)
+        text = "".join(f"{digest}  {name}\n" for name, digest in entries.items())
+        return write_if_changed(self.path, text.encode('utf-8'))
+
+    def remove_stale(self) -> List[str]:
+        """Delete section files from the previous run that are no longer produced"""
+        removed = []
+        for name in self.stale():
+            try:
+                (self.output_dir / name).unlink()
+                removed.append(name)
+                logger.info(f"Removed stale section: {name}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove stale section {name}: {e}")
+        return removed
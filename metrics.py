@@ -0,0 +1,312 @@
+"""
+Prometheus metrics for long batch and worker runs
+Counters, gauges and histograms in the Prometheus text format, written to a
+file (node_exporter textfile collector) and/or served on a local HTTP port
+"""
+
+import math
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from batch_checkpoint import atomic_write
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_INTERVAL = 15.0
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(name suffix, label string, value) of every series"""
+        with self._lock:
+            return [('', _labels(self.label_names, key), value)
+                    for key, value in sorted(self._values.items())]
+
+    def reset(self):
+        """Drop every series (new lock too: a forked child may inherit a held one)"""
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def snapshot(self) -> Dict[Tuple, object]:
+        with self._lock:
+            return {key: (dict(v, counts=list(v['counts'])) if isinstance(v, dict) else v)
+                    for key, v in self._values.items()}
+
+    def merge(self, values: Dict[Tuple, object]):
+        """Add another process's series (gauges are per process: ignored)"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}"
+                     for suffix, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic total"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, values: Dict[Tuple, float]):
+        with self._lock:
+            for key, amount in values.items():
+                self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+
+    def merge(self, values: Dict[Tuple, Dict]):
+        with self._lock:
+            for key, other in values.items():
+                series = self._values.get(key)
+                if series is None:
+                    series = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0}
+                series['counts'] = [a + b for a, b in zip(series['counts'], other['counts'])]
+                series['sum'] += other['sum']
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = sorted((key, dict(s, counts=list(s['counts'])))
+                            for key, s in self._values.items())
+        samples = []
+        for key, s in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, s['counts']):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append(('_bucket', _labels(self.label_names, key, le), cumulative))
+            samples.append(('_sum', _labels(self.label_names, key), s['sum']))
+            samples.append(('_count', _labels(self.label_names, key), cumulative))
+        return samples
+
+
+class Registry:
+    """The metrics exported by one process"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Current series by metric name, for merge() in another process"""
+        return {m.name: m.snapshot() for m in self.metrics}
+
+    def merge(self, snapshot: Dict[str, Dict]):
+        """Add the counts of a worker process's snapshot()"""
+        for metric in self.metrics:
+            if metric.name in snapshot:
+                metric.merge(snapshot[metric.name])
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        return "\n".join(m.render() for m in self.metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+DOCUMENTS = REGISTRY.register(Counter(
+    'split_documents_total', 'Documents finished, by outcome', ['status']))
+PAGES = REGISTRY.register(Counter(
+    'split_pages_total', 'Pages scanned (or taken from a previous edition)'))
+PAGE_EXTRACT_SECONDS = REGISTRY.register(Histogram(
+    'split_page_extract_seconds', 'Text extraction time of one page',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)))
+SECTION_WRITE_SECONDS = REGISTRY.register(Histogram(
+    'split_section_write_seconds', 'Time to build one section PDF',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)))
+BYTES_WRITTEN = REGISTRY.register(Counter(
+    'split_bytes_written_total', 'Bytes of section PDFs written or streamed'))
+FAILURES = REGISTRY.register(Counter(
+    'split_failures_total', 'Failed documents and sections, by stage and exception type',
+    ['stage', 'exception']))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'split_queue_depth', 'Documents of the batch not processed yet'))
+WORKERS = REGISTRY.register(Gauge(
+    'split_workers', 'Documents being split at the same time (see --jobs)'))
+
+
+class MetricsExporter:
+    """
+    Publishes a registry while a batch runs
+
+    With path, the file is atomically rewritten every interval seconds (and
+    on close), so a collector never reads a partial file. With port, an HTTP
+    server on host answers every GET with the current metrics.
+    """
+
+    def __init__(self, path: Optional[str] = None, port: Optional[int] = None,
+                 interval: float = DEFAULT_INTERVAL, host: str = '127.0.0.1',
+                 registry: Registry = REGISTRY):
+        self.path = Path(path) if path else None
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def write(self):
+        """Rewrite the metrics file now"""
+        if self.path is None:
+            return
+        data = self.registry.render().encode('utf-8')
+        try:
+            atomic_write(self.path, lambda f: f.write(data))
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.path}: {e}")
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def _serve(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metrics request: " + format % args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def start(self) -> 'MetricsExporter':
+        """
+        Raises:
+            OSError: the HTTP port cannot be bound
+        """
+        if self.port is not None:
+            self._serve()
+        if self.path is not None:
+            self.write()
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        """Stop publishing, leaving the final values in the metrics file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> 'MetricsExporter':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class timed:
+    """Context manager observing its duration in a histogram"""
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
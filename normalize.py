@@ -0,0 +1,79 @@
+"""
+Text normalization for header matching
+Folds case, accents, ligatures, apostrophe/dash variants and exotic spaces
+so section patterns can be written once in plain ASCII upper case
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Pattern, Tuple
+
+# Characters NFKD leaves alone (or that extraction produces) mapped to one form
+_CHAR_MAP = {
+    # Apostrophes and quotes used as apostrophes
+    '\u2019': "'", '\u2018': "'", '\u02bc': "'", '\u2032': "'",
+    '\u00b4': "'", '`': "'",
+    # Dashes and minus signs
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-',
+    '\u2014': '-', '\u2015': '-', '\u2212': '-',
+    # Spaces (non-breaking, thin, narrow, ideographic...)
+    '\u00a0': ' ', '\u2002': ' ', '\u2003': ' ', '\u2007': ' ',
+    '\u2008': ' ', '\u2009': ' ', '\u200a': ' ', '\u202f': ' ',
+    '\u3000': ' ', '\t': ' ',
+    # Ligatures without a compatibility decomposition
+    '\u0153': 'oe', '\u0152': 'OE', '\u00e6': 'ae', '\u00c6': 'AE',
+}
+_APOSTROPHES = ('\u2019', '\u2018', '\u02bc', '\u2032', '\u00b4', '`')
+_TRANSLATION = str.maketrans(_CHAR_MAP)
+_TRANSLATION_KEEP_APOSTROPHES = str.maketrans(
+    {k: v for k, v in _CHAR_MAP.items() if k not in _APOSTROPHES})
+# Zero-width characters and soft hyphens
+_INVISIBLE = re.compile('[\u00ad\u200b\u200c\u200d\u2060\ufeff]')
+_COMBINING = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+
+
+def _fold(text: str, apostrophes: bool = True) -> str:
+    if text.isascii():
+        text = text.replace('\t', ' ')
+        return text.replace('`', "'") if apostrophes else text
+    text = _INVISIBLE.sub('', text.translate(
+        _TRANSLATION if apostrophes else _TRANSLATION_KEEP_APOSTROPHES))
+    # NFKD splits accents off their letters and expands ligatures (ﬁ -> fi)
+    return _COMBINING.sub('', unicodedata.normalize('NFKD', text))
+
+
+def normalize_line(line: str, apostrophes: bool = True) -> str:
+    """
+    Normalized form of one extracted line, e.g. 'Lettre d’entente nº 3' ->
+    "LETTRE D'ENTENTE NO 3"
+
+    Runs of spaces are kept (some patterns rely on a double space between a
+    number and a title); only their characters are folded. With
+    apostrophes=False, typographic apostrophes are left as they are.
+    """
+    return _fold(line, apostrophes).upper().strip()
+
+
+def normalize_lines(lines: List[str], apostrophes: bool = True) -> List[str]:
+    """normalize_line() of each line, folding them all in one pass"""
+    return [line.strip() for line in _fold('\n'.join(lines), apostrophes).upper().split('\n')]
+
+
+def normalize_pattern(pattern: str) -> str:
+    """
+    Fold accents and dash/apostrophe variants in a regex, leaving its case
+    alone (upper-casing would turn \\d into \\D)
+
+    Lets older patterns such as 'MATI[EÈ]RES' keep matching normalized text.
+    """
+    return _fold(pattern)
+
+
+def compile_patterns(patterns: Dict[str, List[Tuple[str, int]]]
+                     ) -> Dict[str, List[Tuple[Pattern, int]]]:
+    """Compile {type: [(regex, confidence), ...]} against normalized text"""
+    return {
+        section_type: [(re.compile(normalize_pattern(p)), confidence)
+                       for p, confidence in entries]
+        for section_type, entries in patterns.items()
+    }
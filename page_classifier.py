@@ -0,0 +1,93 @@
+"""
+Cheap page classification from content stream operators and resources
+Spots image-only (scanned) and blank pages without running text extraction
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEXT = 'text'
+IMAGE = 'image'
+BLANK = 'blank'
+
+# Text can only be painted inside a BT ... ET block
+_TEXT_OBJECT = re.compile(rb'(?<![A-Za-z0-9_#])BT(?![A-Za-z0-9_])')
+_INLINE_IMAGE = re.compile(rb'(?<![A-Za-z0-9_#])BI(?![A-Za-z0-9_])')
+_MAX_FORM_DEPTH = 4
+
+
+def _resolve(obj):
+    return obj.get_object() if hasattr(obj, 'get_object') else obj
+
+
+def _has_fonts(resources, depth: int = 0) -> bool:
+    """True if any font is reachable from these resources"""
+    resources = _resolve(resources)
+    if not resources:
+        return False
+    if resources.get('/Font'):
+        return True
+    if depth >= _MAX_FORM_DEPTH:
+        return True  # Give up and let extraction decide
+    xobjects = _resolve(resources.get('/XObject')) or {}
+    for ref in xobjects.values():
+        xobj = _resolve(ref)
+        if xobj.get('/Subtype') == '/Form' and _has_fonts(xobj.get('/Resources'), depth + 1):
+            return True
+    return False
+
+
+def _scan_stream(data: bytes, resources, depth: int = 0):
+    """Return (has_text, has_image) for a content stream and the forms it uses"""
+    has_text = bool(_TEXT_OBJECT.search(data))
+    has_image = bool(_INLINE_IMAGE.search(data))
+    if has_text or depth >= _MAX_FORM_DEPTH:
+        # Too deeply nested to be sure: let extraction decide
+        return True, has_image
+
+    resources = _resolve(resources) or {}
+    xobjects = _resolve(resources.get('/XObject')) or {}
+    for ref in xobjects.values():
+        xobj = _resolve(ref)
+        subtype = xobj.get('/Subtype')
+        if subtype == '/Image':
+            has_image = True
+        elif subtype == '/Form':
+            form_text, form_image = _scan_stream(
+                xobj.get_data(), xobj.get('/Resources') or resources, depth + 1)
+            has_image = has_image or form_image
+            if form_text:
+                return True, has_image
+    return False, has_image
+
+
+def classify_page(page) -> str:
+    """
+    Classify a page as TEXT, IMAGE (image-only) or BLANK
+
+    Pages without reachable fonts are decided from resources alone; the
+    rest have their content streams scanned for text operators. Anything
+    unexpected is reported as TEXT so the caller falls back to extraction.
+    """
+    try:
+        resources = page.get('/Resources')
+        if _has_fonts(resources):
+            contents = page.get_contents()
+            data = contents.get_data() if contents is not None else b''
+            has_text, has_image = _scan_stream(data, resources)
+            if has_text:
+                return TEXT
+        else:
+            xobjects = _resolve((_resolve(resources) or {}).get('/XObject')) or {}
+            has_image = any(_resolve(x).get('/Subtype') in ('/Image', '/Form')
+                            for x in xobjects.values())
+            if not has_image:
+                contents = page.get_contents()
+                data = contents.get_data() if contents is not None else b''
+                has_image = bool(_INLINE_IMAGE.search(data))
+        return IMAGE if has_image else BLANK
+    except Exception as e:
+        logger.debug(f"Page classification error: {e}")
+        return TEXT
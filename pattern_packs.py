@@ -0,0 +1,277 @@
+"""
+External pattern packs
+Section patterns for other unions' agreements live in JSON or TOML files
+instead of the source. Packs are validated once per content hash, and
+PackWatcher picks up edited packs between documents of a running batch
+"""
+
+import re
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from normalize import normalize_pattern
+
+logger = logging.getLogger(__name__)
+
+PACK_SUFFIXES = ('.json', '.toml')
+# Section types end up in file names
+_TYPE_NAME = re.compile(r'^[A-Za-z][A-Za-z0-9_]*$')
+_PACK_KEYS = {'name', 'description', 'replace', 'patterns', 'article_patterns'}
+# Validated contents kept (the oldest is dropped beyond this)
+_CACHE_LIMIT = 64
+
+# digest -> validated pack content (the same bytes are never parsed twice)
+_cache: Dict[str, Dict] = {}
+
+
+class PatternPackError(ValueError):
+    """A pack file cannot be read or does not validate"""
+
+
+class PatternPack:
+    """One validated pack file"""
+
+    def __init__(self, path: Path, digest: str, content: Dict):
+        self.path = path
+        self.digest = digest
+        self.name = content['name'] or path.stem
+        self.description = content['description']
+        # Replace the preset's patterns instead of adding to them
+        self.replace = content['replace']
+        self.patterns = content['patterns']
+        self.article_patterns = content['article_patterns']
+
+    def for_granularity(self, granularity: str) -> Dict[str, List[Tuple[str, int]]]:
+        """Article patterns at article granularity when the pack has them"""
+        if granularity == 'article' and self.article_patterns:
+            return self.article_patterns
+        return self.patterns
+
+
+def _parse_toml(data: bytes) -> Dict:
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise PatternPackError("TOML packs need Python 3.11+ or the tomli package "
+                                   "(pip install tomli); JSON packs work everywhere")
+    return tomllib.loads(data.decode('utf-8'))
+
+
+def _parse_patterns(path: Path, key: str, table) -> Dict[str, List[Tuple[str, int]]]:
+    """{type: [(regex, confidence)]} from a pack table, with every entry checked"""
+    if not isinstance(table, dict):
+        raise PatternPackError(f"{path}: '{key}' must be a table of section types")
+    patterns = {}
+    for section_type, entries in table.items():
+        where = f"{path}: {key}.{section_type}"
+        if not _TYPE_NAME.match(section_type):
+            raise PatternPackError(f"{where}: section types are letters, digits and _ "
+                                   f"(they are used in file names)")
+        if not isinstance(entries, list) or not entries:
+            raise PatternPackError(f"{where}: expected a non-empty list of patterns")
+        parsed = []
+        for i, entry in enumerate(entries):
+            if isinstance(entry, dict) and set(entry) == {'regex', 'confidence'}:
+                regex, confidence = entry['regex'], entry['confidence']
+            elif isinstance(entry, list) and len(entry) == 2:
+                regex, confidence = entry
+            else:
+                raise PatternPackError(f"{where}[{i}]: expected [regex, confidence] or "
+                                       f"{{regex, confidence}}")
+            if not isinstance(regex, str) or not regex:
+                raise PatternPackError(f"{where}[{i}]: regex must be a non-empty string")
+            try:
+                re.compile(normalize_pattern(regex))
+            except re.error as e:
+                raise PatternPackError(f"{where}[{i}]: invalid regex {regex!r}: {e}")
+            if isinstance(confidence, bool) or not isinstance(confidence, int) \
+                    or not 0 <= confidence <= 100:
+                raise PatternPackError(f"{where}[{i}]: confidence must be 0-100")
+            parsed.append((regex, confidence))
+        patterns[section_type] = parsed
+    return patterns
+
+
+def load_pack(path) -> PatternPack:
+    """
+    Read and validate a .json or .toml pack
+
+    Raises:
+        PatternPackError: unreadable file, bad syntax or invalid content
+    """
+    path = Path(path)
+    try:
+        data = path.read_bytes()
+    except OSError as e:
+        raise PatternPackError(f"Cannot read pattern pack {path}: {e}")
+    digest = hashlib.sha256(path.suffix.lower().encode('ascii') + b'\0' + data).hexdigest()
+
+    content = _cache.get(digest)
+    if content is None:
+        content = _validate(path, _parse(path, data))
+        if len(_cache) >= _CACHE_LIMIT:
+            _cache.pop(next(iter(_cache)))
+        _cache[digest] = content
+    return PatternPack(path, digest, content)
+
+
+def _parse(path: Path, data: bytes) -> Dict:
+    try:
+        if path.suffix.lower() == '.toml':
+            return _parse_toml(data)
+        return json.loads(data.decode('utf-8'))
+    except PatternPackError:
+        raise
+    except ValueError as e:   # JSON, TOML and UTF-8 decoding errors
+        raise PatternPackError(f"{path}: {e}")
+
+
+def _validate(path: Path, spec) -> Dict:
+    """Checked pack content, patterns in the {type: [(regex, confidence)]} form"""
+    if not isinstance(spec, dict):
+        raise PatternPackError(f"{path}: a pack is a table with a 'patterns' key")
+    unknown = set(spec) - _PACK_KEYS
+    if unknown:
+        raise PatternPackError(f"{path}: unknown key(s) {', '.join(sorted(unknown))}")
+    if not spec.get('patterns') and not spec.get('article_patterns'):
+        raise PatternPackError(f"{path}: no 'patterns' or 'article_patterns'")
+    if not isinstance(spec.get('replace', False), bool):
+        raise PatternPackError(f"{path}: 'replace' must be true or false")
+    return {
+        'name': str(spec.get('name') or ''),
+        'description': str(spec.get('description') or ''),
+        'replace': spec.get('replace', False),
+        'patterns': _parse_patterns(path, 'patterns', spec.get('patterns', {})),
+        'article_patterns': _parse_patterns(path, 'article_patterns',
+                                            spec.get('article_patterns', {})),
+    }
+
+
+def pack_files(paths: Iterable) -> List[Path]:
+    """Pack files named by paths; folders contribute their packs in name order"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir()
+                                if p.suffix.lower() in PACK_SUFFIXES and p.is_file()))
+        else:
+            files.append(path)
+    return files
+
+
+class PackSet:
+    """
+    Packs applied together, in order
+
+    Patterns of the packs are tried before the preset's own, earlier packs
+    first; section types a pack introduces therefore win over built-in ones
+    matching the same line.
+    """
+
+    def __init__(self, packs: List[PatternPack]):
+        self.packs = packs
+        combined = "\n".join(p.digest for p in packs)
+        self.digest = hashlib.sha256(combined.encode('ascii')).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.packs)
+
+    def apply(self, patterns: Dict[str, List[Tuple[str, int]]],
+              granularity: str = 'section') -> Dict[str, List[Tuple[str, int]]]:
+        """A preset's patterns with the packs' added (or substituted)"""
+        merged: Dict[str, List[Tuple[str, int]]] = {}
+        for pack in self.packs:
+            for section_type, entries in pack.for_granularity(granularity).items():
+                merged.setdefault(section_type, []).extend(entries)
+        if not any(p.replace for p in self.packs):
+            for section_type, entries in patterns.items():
+                merged.setdefault(section_type, []).extend(entries)
+        return merged
+
+    def describe(self) -> List[Dict]:
+        """Name, file and content hash of each pack (for reports)"""
+        return [{'name': p.name, 'file': str(p.path), 'sha256': p.digest} for p in self.packs]
+
+
+def load_packs(paths: Iterable) -> PackSet:
+    """
+    Load pack files and folders of packs
+
+    Raises:
+        PatternPackError: a path is missing or a pack does not validate
+    """
+    paths = list(paths)
+    for path in map(Path, paths):
+        if not path.exists():
+            raise PatternPackError(f"Pattern pack not found: {path}")
+    return PackSet([load_pack(f) for f in pack_files(paths)])
+
+
+class PackWatcher:
+    """
+    Pattern packs of a long-running batch, reloaded when their files change
+
+    poll() is called between documents: it only stats the pack files (at
+    most every interval seconds) and re-reads them when one was edited,
+    added or removed, so the batch never stops for it. A document keeps
+    the packs it started with. An edit that does not validate is logged
+    and the previous packs stay in use.
+    """
+
+    def __init__(self, paths: Iterable, interval: float = 2.0):
+        """
+        Raises:
+            PatternPackError: the packs do not load at start-up
+        """
+        self.paths = list(paths)
+        self.interval = interval
+        self.packs = load_packs(self.paths)
+        self.reloads = 0
+        self._signature = self._stat()
+        self._checked = time.monotonic()
+
+    def _stat(self) -> Tuple:
+        signature = []
+        for path in pack_files(p for p in self.paths if Path(p).exists()):
+            try:
+                st = path.stat()
+                signature.append((str(path), st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def poll(self) -> bool:
+        """
+        Reload changed packs
+
+        Returns:
+            True if different patterns are now in effect
+        """
+        now = time.monotonic()
+        if now - self._checked < self.interval:
+            return False
+        self._checked = now
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            packs = load_packs(self.paths)
+        except PatternPackError as e:
+            logger.error(f"Keeping the previous pattern packs: {e}")
+            return False
+        if packs.digest == self.packs.digest:
+            return False
+        logger.info(f"Pattern packs reloaded ({self.packs.digest} -> {packs.digest}): "
+                    f"{', '.join(p.name for p in packs.packs) or 'none'}")
+        self.packs = packs
+        self.reloads += 1
+        return True
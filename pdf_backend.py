@@ -0,0 +1,349 @@
+"""
+PDF engine abstraction: open, page count, page text and page-range writing
+PyPDF2 is always available; pypdfium2 and pikepdf are used when installed
+"""
+
+import io
+import re
+import hashlib
+import logging
+from typing import BinaryIO, Dict, List, Optional, Type
+
+from page_classifier import classify_page
+
+logger = logging.getLogger(__name__)
+
+AUTO = 'auto'
+
+
+class PyPDF2Backend:
+    """
+    Reference backend (pure Python)
+
+    Every backend keeps a PyPDF2 reader for the cheap structural work
+    (page classification, SharedObjectWriter); subclasses only replace
+    text extraction and/or writing with a faster engine.
+    """
+
+    name = 'pypdf2'
+    module = 'PyPDF2'
+
+    def __init__(self, source):
+        """
+        Args:
+            source: PDF path or seekable binary file object
+        """
+        from PyPDF2 import PdfReader
+
+        self.source = source
+        self.reader = PdfReader(source)
+        # (object number, generation) -> digest, so shared fonts/images are hashed once
+        self._digests: Dict[tuple, bytes] = {}
+
+    @property
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+
+    def classify(self, index: int) -> str:
+        """TEXT, IMAGE or BLANK (see page_classifier)"""
+        return classify_page(self.reader.pages[index])
+
+    def page_text(self, index: int) -> str:
+        try:
+            return self.reader.pages[index].extract_text() or ""
+        except Exception as e:
+            logger.debug(f"Text extraction error: {e}")
+            return ""
+
+    def page_fingerprint(self, index: int) -> str:
+        """
+        Hash of a page's content streams, resources, annotations and geometry
+
+        Resources are followed to the bytes of every image, font and form
+        XObject the page uses, so a page whose drawing operators are the
+        same but whose scanned image differs gets another fingerprint;
+        annotations (highlights, notes, links) are followed the same way.
+        Much cheaper than text extraction; pages with the same fingerprint in
+        two editions of a document look the same.
+        """
+        from PyPDF2.generic import ArrayObject
+
+        page = self.reader.pages[index]
+        digest = hashlib.sha256(repr([float(v) for v in page.mediabox]).encode('ascii'))
+        digest.update(repr([float(v) for v in page.cropbox] + [page.get('/Rotate', 0)])
+                      .encode('ascii'))
+        contents = page.get('/Contents')
+        if contents is not None:
+            contents = contents.get_object()
+            for stream in (contents if isinstance(contents, ArrayObject) else [contents]):
+                digest.update(stream.get_object().get_data())
+        for key in ('/Resources', '/Annots'):
+            if key in page:
+                digest.update(key.encode('ascii'))
+                digest.update(self._object_digest(page.raw_get(key), set()))
+        return digest.hexdigest()[:32]
+
+    def _object_digest(self, obj, active: set) -> bytes:
+        """
+        Digest of an object and everything it references (streams by their raw bytes)
+
+        Pages are not followed (annotations point back at their page, links
+        at other pages); they count as the same placeholder.
+        """
+        from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+        ref = None
+        if isinstance(obj, IndirectObject):
+            ref = (obj.idnum, obj.generation)
+            if ref in self._digests:
+                return self._digests[ref]
+            if ref in active:
+                return b'cycle'
+            active.add(ref)
+            obj = obj.get_object()
+
+        digest = hashlib.sha256()
+        if isinstance(obj, DictionaryObject) and obj.get('/Type') in ('/Page', '/Pages'):
+            digest.update(b'page')
+        elif isinstance(obj, DictionaryObject):
+            digest.update(b'<<')
+            for key in sorted(obj):
+                digest.update(str(key).encode('utf-8', 'replace'))
+                digest.update(self._object_digest(obj.raw_get(key), active))
+            if isinstance(obj, StreamObject):
+                digest.update(b'stream')
+                digest.update(obj._data or b'')
+        elif isinstance(obj, ArrayObject):
+            digest.update(b'[')
+            for item in obj:
+                digest.update(self._object_digest(item, active))
+        else:
+            digest.update(repr(obj).encode('utf-8', 'replace'))
+
+        if ref is not None:
+            active.discard(ref)
+            self._digests[ref] = digest.digest()
+            return self._digests[ref]
+        return digest.digest()
+
+    def write_pages(self, page_indices: List[int], stream: BinaryIO,
+                    doc_id: Optional[bytes] = None):
+        """
+        Write the given (0-based) pages as a standalone PDF
+
+        Output is byte-for-byte reproducible: no dates are written and the
+        trailer /ID is doc_id (omitted when None).
+        """
+        from PyPDF2 import PdfWriter
+        from PyPDF2.generic import ArrayObject, ByteStringObject
+
+        writer = PdfWriter()
+        for p in page_indices:
+            writer.add_page(self.reader.pages[p])
+        if doc_id:
+            # PdfWriter writes _ID into the trailer when set
+            writer._ID = ArrayObject([ByteStringObject(doc_id), ByteStringObject(doc_id)])
+        writer.write(stream)
+
+    def close(self):
+        pass
+
+
+def _rewound(source):
+    """Source for a second engine: a path, or bytes of a file object"""
+    if hasattr(source, 'read'):
+        source.seek(0)
+        return source.read()
+    return str(source)
+
+
+_PDFIUM_DATE = re.compile(rb"/CreationDate\(D:[0-9Z+\-']*\)")
+_PDFIUM_ID = re.compile(rb"/ID\[<([0-9A-Fa-f]{32})><([0-9A-Fa-f]{32})>\]")
+
+
+def _pin_pdfium_output(data: bytes, doc_id: Optional[bytes]) -> bytes:
+    """
+    Remove the wall-clock parts of a PDFium-written file
+
+    PDFium stamps a creation date into the Info dictionary and a random
+    trailer /ID, with no API to change either. Both are overwritten in place
+    with text of the same length, so the cross-reference offsets stay valid.
+    """
+    data = _PDFIUM_DATE.sub(lambda m: b' ' * len(m.group(0)), data, count=1)
+    ids = list(_PDFIUM_ID.finditer(data))
+    if ids:
+        match = ids[-1]
+        hex_id = (doc_id or bytes(16)).hex().upper().encode('ascii')
+        data = (data[:match.start(1)] + hex_id + data[match.end(1):match.start(2)]
+                + hex_id + data[match.end(2):])
+    return data
+
+
+def _pypdf2_layout(textpage) -> str:
+    """
+    PDFium's page text with PyPDF2's line breaks
+
+    The section patterns were written against PyPDF2 output. PyPDF2 starts
+    a new line only when the text moves down the page, so a running page
+    number drawn at the foot before the heading at the top ends up on the
+    heading's line ('84 85SECTION 1'); PDFium breaks wherever the baseline
+    changes.
+    """
+    text = textpage.get_text_range()
+    if len(text) != textpage.count_chars():
+        # Characters outside the BMP: indexes no longer line up with the text
+        return text.replace('\r\n', '\n')
+
+    pieces = []
+    last = 0
+    for match in re.finditer('\r\n', text):
+        i = match.start()
+        before, after = i - 1, match.end()
+        while before >= 0 and text[before].isspace():
+            before -= 1
+        while after < len(text) and text[after].isspace():
+            after += 1
+        down = True
+        if before >= 0 and after < len(text):
+            left, right = textpage.get_charbox(before), textpage.get_charbox(after)
+            down = right[1] < left[1] - 0.8 * (left[3] - left[1])
+        pieces.append(text[last:i])
+        pieces.append('\n' if down else '')
+        last = match.end()
+    pieces.append(text[last:])
+    return ''.join(pieces)
+
+
+class PdfiumBackend(PyPDF2Backend):
+    """
+    pypdfium2 (PDFium, C++) for text extraction and writing
+
+    Several times faster. Its lines are broken like PyPDF2's (see
+    _pypdf2_layout), which gives the same detections for the section
+    patterns; spacing and wrapping inside paragraphs still differ, so
+    bench_backends.py shows differences for article granularity and the
+    loosely matching 'original' preset.
+    """
+
+    name = 'pdfium'
+    module = 'pypdfium2'
+
+    def __init__(self, source):
+        super().__init__(source)
+        import pypdfium2
+
+        self._pdfium = pypdfium2
+        self.document = pypdfium2.PdfDocument(_rewound(source))
+
+    def page_text(self, index: int) -> str:
+        try:
+            page = self.document[index]
+            textpage = page.get_textpage()
+            try:
+                return _pypdf2_layout(textpage)
+            finally:
+                textpage.close()
+                page.close()
+        except Exception as e:
+            logger.debug(f"Text extraction error: {e}")
+            return ""
+
+    def write_pages(self, page_indices: List[int], stream: BinaryIO,
+                    doc_id: Optional[bytes] = None):
+        output = self._pdfium.PdfDocument.new()
+        try:
+            output.import_pages(self.document, list(page_indices))
+            buf = io.BytesIO()
+            output.save(buf)
+        finally:
+            output.close()
+        stream.write(_pin_pdfium_output(buf.getvalue(), doc_id))
+
+    def close(self):
+        self.document.close()
+
+
+class PikepdfBackend(PyPDF2Backend):
+    """PyPDF2 text extraction (identical detections) with pikepdf (qpdf, C++) writing"""
+
+    name = 'pikepdf'
+    module = 'pikepdf'
+
+    def __init__(self, source):
+        super().__init__(source)
+        # pikepdf announces its qpdf log bridge at INFO on first import
+        logging.getLogger('pikepdf').setLevel(logging.WARNING)
+        import pikepdf
+
+        self._pikepdf = pikepdf
+        data = _rewound(source)
+        self.document = pikepdf.open(io.BytesIO(data) if isinstance(data, bytes) else data)
+
+    def write_pages(self, page_indices: List[int], stream: BinaryIO,
+                    doc_id: Optional[bytes] = None):
+        pikepdf = self._pikepdf
+        output = pikepdf.new()
+        try:
+            if hasattr(output, 'add_pages_from'):
+                # pikepdf >= 10 also carries named destinations and form fields
+                output.add_pages_from(self.document, list(page_indices))
+            else:
+                output.pages.extend(self.document.pages[p] for p in page_indices)
+            if doc_id:
+                output.trailer.ID = pikepdf.Array([pikepdf.String(doc_id)] * 2)
+            # qpdf keeps the first /ID entry and derives the second from the content
+            output.save(stream, deterministic_id=True)
+        finally:
+            output.close()
+
+    def close(self):
+        self.document.close()
+
+
+BACKENDS: Dict[str, Type[PyPDF2Backend]] = {
+    PyPDF2Backend.name: PyPDF2Backend,
+    PdfiumBackend.name: PdfiumBackend,
+    PikepdfBackend.name: PikepdfBackend,
+}
+
+# 'auto' only picks engines whose detections match the reference backend;
+# pikepdf is left out: it still extracts text with PyPDF2 and opens every
+# document twice
+_AUTO_ORDER = [PdfiumBackend.name, PyPDF2Backend.name]
+
+
+def is_available(name: str) -> bool:
+    """True if the backend's engine can be imported"""
+    import importlib.util
+
+    return importlib.util.find_spec(BACKENDS[name].module) is not None
+
+
+def available_backends() -> List[str]:
+    return [name for name in BACKENDS if is_available(name)]
+
+
+def resolve_backend(name: str = AUTO, pdfium_text: bool = True) -> str:
+    """
+    Backend name to use for a requested one
+
+    pdfium_text=False keeps 'auto' on PyPDF2, for callers whose detections
+    depend on PyPDF2's exact line wrapping.
+
+    Raises:
+        ValueError: unknown backend, or its engine is not installed
+    """
+    if name == AUTO:
+        return next(n for n in _AUTO_ORDER if is_available(n)
+                    and (pdfium_text or n != PdfiumBackend.name))
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {name} "
+                         f"(choose from {', '.join([AUTO] + list(BACKENDS))})")
+    if not is_available(name):
+        raise ValueError(f"PDF backend '{name}' needs the {BACKENDS[name].module} package")
+    return name
+
+
+def open_backend(source, name: str = AUTO) -> PyPDF2Backend:
+    """Open a PDF with the requested (or best available) backend"""
+    return BACKENDS[resolve_backend(name)](source)
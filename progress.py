@@ -0,0 +1,128 @@
+"""
+Progress reporting and cooperative cancellation for the splitters
+"""
+
+import sys
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+# Phases reported to progress callbacks
+SCAN = 'scan'
+SPLIT = 'split'
+DONE = 'done'
+
+
+class ProcessingCancelled(Exception):
+    """Raised inside a splitter when its cancel token is set"""
+
+
+class CancelToken:
+    """Thread-safe flag checked by the splitter between pages"""
+
+    def __init__(self, event=None, parent: Optional['CancelToken'] = None):
+        """
+        Args:
+            event: Event to wrap, e.g. a multiprocessing.Manager().Event()
+                   shared with a worker process (default: threading.Event)
+            parent: Token whose cancellation cancels this one too
+        """
+        self._event = event if event is not None else threading.Event()
+        self._parent = parent
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self._parent is not None and self._parent.cancelled)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise ProcessingCancelled("Processing cancelled")
+
+
+class ProgressTracker:
+    """
+    Computes throughput and ETA and forwards updates to a callback
+
+    The callback receives a dict with: phase, file, pages_done, pages_total,
+    sections_written, pages_per_sec, eta_seconds, plus any batch context
+    (documents_done, documents_total).
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]], file_name: str = '',
+                 context: Optional[Dict] = None):
+        self.callback = callback
+        self.file_name = file_name
+        self.context = context or {}
+        self.sections_written = 0
+        self.phase = None
+        self.pages_done = 0
+        self.pages_total = 0
+        self._phase_start = time.monotonic()
+
+    def start_phase(self, phase: str, pages_total: int):
+        self.phase = phase
+        self._phase_start = time.monotonic()
+        self.update(0, pages_total)
+
+    def update(self, pages_done: int, pages_total: int):
+        self.pages_done = pages_done
+        self.pages_total = pages_total
+        if self.callback is None:
+            return
+        elapsed = time.monotonic() - self._phase_start
+        rate = pages_done / elapsed if elapsed > 0 and pages_done else 0.0
+        eta = (pages_total - pages_done) / rate if rate else None
+        info = {
+            'phase': self.phase,
+            'file': self.file_name,
+            'pages_done': pages_done,
+            'pages_total': pages_total,
+            'sections_written': self.sections_written,
+            'pages_per_sec': rate,
+            'eta_seconds': eta,
+        }
+        info.update(self.context)
+        self.callback(info)
+
+    def finish(self):
+        self.phase = DONE
+        self.update(self.pages_total, self.pages_total)
+
+
+def format_progress(info: Dict) -> str:
+    """One-line human readable progress"""
+    line = ""
+    if info.get('documents_total'):
+        line += f"[{info.get('documents_done', 0) + 1}/{info['documents_total']}] "
+    line += f"{info.get('file', '')} {info['phase']}: "
+    if info['phase'] == DONE:
+        line += f"{info['sections_written']} section(s) written"
+        return line
+    line += f"{info['pages_done']}/{info['pages_total']} pages"
+    if info['pages_per_sec']:
+        line += f", {info['pages_per_sec']:.1f} pages/s"
+    if info['eta_seconds'] is not None:
+        line += f", ETA {info['eta_seconds']:.0f}s"
+    return line
+
+
+class ConsoleProgress:
+    """Progress callback rewriting a single status line on stderr"""
+
+    def __init__(self, stream=None, min_interval: float = 0.2):
+        self.stream = stream or sys.stderr
+        self.min_interval = min_interval
+        self._last = 0.0
+
+    def __call__(self, info: Dict):
+        now = time.monotonic()
+        if info['phase'] != DONE and now - self._last < self.min_interval:
+            return
+        self._last = now
+        self.stream.write("\r\033[K" + format_progress(info))
+        if info['phase'] == DONE:
+            self.stream.write("\n")
+        self.stream.flush()
@@ -0,0 +1,147 @@
+"""
+Largest-first scheduling of batch work
+Page counts are read from the document catalog (trailer -> /Root -> /Pages
+/Count) without touching page content, so a whole folder can be ordered
+before any text is extracted
+"""
+
+import os
+import math
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pdf_backend import is_available
+
+logger = logging.getLogger(__name__)
+
+# Rough scan + split cost of one text page with the default backend; only
+# used for the predictions in the summary (the observed rate is logged too)
+DEFAULT_SECONDS_PER_PAGE = 0.05
+# Longest schedule listed in the summary; bigger batches list the head only
+_SCHEDULE_LOG_LIMIT = 20
+
+
+def page_count(path) -> Optional[int]:
+    """
+    Page count from the page-tree root, or None when the file cannot be read
+
+    pikepdf (when installed) resolves only the objects asked for; PyPDF2 has
+    to read the cross-reference table first but still skips the page tree.
+    """
+    try:
+        if is_available('pikepdf'):
+            logging.getLogger('pikepdf').setLevel(logging.WARNING)
+            import pikepdf
+
+            with pikepdf.open(str(path)) as pdf:
+                return int(pdf.Root.Pages.Count)
+
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(str(path), strict=False)
+        try:
+            return int(reader.trailer['/Root']['/Pages']['/Count'])
+        except (KeyError, TypeError, ValueError):
+            return len(reader.pages)
+    except Exception as e:
+        logger.debug(f"Could not count pages of {path}: {e}")
+        return None
+
+
+def page_shards(total_pages: int, shard_pages: Optional[int]) -> List[Tuple[int, int]]:
+    """
+    (start, stop) page ranges of at most shard_pages pages covering a document
+
+    A single range when sharding is off or the document is small enough.
+    """
+    if not shard_pages or total_pages <= shard_pages:
+        return [(0, total_pages)]
+    count = math.ceil(total_pages / shard_pages)
+    # Even shards, so the last one is not a short straggler
+    size = math.ceil(total_pages / count)
+    return [(start, min(start + size, total_pages)) for start in range(0, total_pages, size)]
+
+
+class BatchSchedule:
+    """
+    Largest-first order of a batch, with predicted and actual times
+
+    Starting the longest documents first keeps one big agreement picked last
+    from holding up a parallel batch. Documents whose page count cannot be
+    read go last.
+    """
+
+    def __init__(self, shard_pages: Optional[int] = None, jobs: Optional[int] = None,
+                 seconds_per_page: float = DEFAULT_SECONDS_PER_PAGE):
+        """
+        Args:
+            shard_pages: Shard size documents are scanned with (see page_shards)
+            jobs: Processes available to the shards of one document (default: CPU count)
+            seconds_per_page: Cost model for the predictions
+        """
+        self.shard_pages = shard_pages
+        self.jobs = jobs or os.cpu_count() or 1
+        self.seconds_per_page = seconds_per_page
+        self.pages: Dict[Path, Optional[int]] = {}
+        self.actual: Dict[Path, float] = {}
+
+    def add(self, pdfs: Iterable[Path]):
+        """Count the pages of pdfs and (re)order the whole schedule"""
+        counted = list(self.pages.items()) + [(Path(p), page_count(p)) for p in pdfs]
+        counted.sort(key=lambda item: (item[1] is None, -(item[1] or 0), str(item[0])))
+        self.pages = dict(counted)
+
+    @property
+    def order(self) -> List[Path]:
+        return list(self.pages)
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def predicted_seconds(self, path: Path) -> Optional[float]:
+        pages = self.pages.get(Path(path))
+        if pages is None:
+            return None
+        parallel = min(len(page_shards(pages, self.shard_pages)), self.jobs)
+        return pages * self.seconds_per_page / parallel
+
+    def record(self, path: Path, seconds: float):
+        """Actual processing time of a scheduled document"""
+        self.actual[Path(path)] = seconds
+
+    def entry(self, path: Path) -> Dict:
+        """Schedule fields added to a document's result"""
+        path = Path(path)
+        predicted = self.predicted_seconds(path)
+        entry = {'pages': self.pages.get(path),
+                 'predicted_seconds': round(predicted, 3) if predicted is not None else None}
+        if path in self.actual:
+            entry['seconds'] = round(self.actual[path], 3)
+        return entry
+
+    def log(self):
+        """Log the schedule with predicted vs actual times"""
+        known = [p for p, n in self.pages.items() if n is not None]
+        total_pages = sum(self.pages[p] for p in known)
+        logger.info(f"Schedule (largest first): {len(self.pages)} document(s), "
+                    f"{total_pages} page(s)")
+
+        for path in self.order[:_SCHEDULE_LOG_LIMIT]:
+            pages = self.pages[path]
+            predicted = self.predicted_seconds(path)
+            actual = self.actual.get(path)
+            logger.info(f"  {path.name}: "
+                        f"{pages if pages is not None else '?'} page(s), "
+                        f"predicted {f'{predicted:.1f}s' if predicted is not None else '?'}, "
+                        f"actual {f'{actual:.1f}s' if actual is not None else '-'}")
+        if len(self.pages) > _SCHEDULE_LOG_LIMIT:
+            logger.info(f"  ... {len(self.pages) - _SCHEDULE_LOG_LIMIT} more")
+
+        done = [p for p in known if p in self.actual]
+        if done:
+            predicted = sum(self.predicted_seconds(p) for p in done)
+            actual = sum(self.actual[p] for p in done)
+            pages = sum(self.pages[p] for p in done)
+            logger.info(f"Predicted {predicted:.1f}s, actual {actual:.1f}s "
+                        f"({actual / pages if pages else 0:.3f} s/page observed)")
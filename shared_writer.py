@@ -0,0 +1,161 @@
+"""
+Multi-output PDF writer that serializes shared objects once per document
+Used when one agreement is split into many small files (article mode)
+"""
+
+import io
+import logging
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+logger = logging.getLogger(__name__)
+
+# Traversal never crosses into the page tree or another page
+_STOP_TYPES = ('/Page', '/Pages', '/Catalog')
+
+
+def _max_object_number(reader) -> int:
+    """Highest object number defined in the source document"""
+    highest = 0
+    size = reader.trailer.get('/Size')
+    if size:
+        highest = int(size) - 1
+    for table in getattr(reader, 'xref', {}).values():
+        if table:
+            highest = max(highest, max(table))
+    objstm = getattr(reader, 'xref_objStm', {})
+    if objstm:
+        highest = max(highest, max(objstm))
+    return highest
+
+
+def _references(obj) -> List[IndirectObject]:
+    """Indirect references held directly by an object (no resolution)"""
+    found = []
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, IndirectObject):
+            found.append(item)
+        elif isinstance(item, DictionaryObject):
+            stack.extend(item.values())
+        elif isinstance(item, ArrayObject):
+            stack.extend(item)
+    return found
+
+
+def _runs(numbers: List[int]) -> List[Tuple[int, int]]:
+    """(first, count) of each run of consecutive numbers in a sorted list"""
+    runs = []
+    for num in numbers:
+        if runs and runs[-1][0] + runs[-1][1] == num:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((num, 1))
+    return runs
+
+
+class SharedObjectWriter:
+    """
+    Writes page ranges of one source PDF to separate files
+
+    Every source object is resolved and serialized the first time any
+    output needs it; later outputs reuse the cached bytes and only add a
+    fresh page tree, catalog and xref table. Source object numbers are kept,
+    so references between cached objects never have to be rewritten.
+    References to pages that are not part of an output stay dangling, which
+    PDF readers treat as null (e.g. links to other articles).
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        top = _max_object_number(reader)
+        self.pages_num = top + 1
+        self.catalog_num = top + 2
+        self._bytes = {}   # object number -> (generation, serialized bytes)
+        self._deps = {}    # object number -> referenced object numbers
+        self._page_nums = [p.indirect_reference.idnum for p in reader.pages]
+        self._page_set = set(self._page_nums)
+
+    def _serialize(self, num: int, gen: int) -> None:
+        """Resolve, serialize and index the dependencies of one object"""
+        obj = self.reader.get_object(IndirectObject(num, gen, self.reader))
+        if num in self._page_set:
+            # Re-parent pages under the output's page tree node
+            obj = DictionaryObject(obj)
+            obj[NameObject('/Parent')] = IndirectObject(self.pages_num, 0, None)
+
+        deps = set()
+        if not (num not in self._page_set and isinstance(obj, DictionaryObject)
+                and obj.get('/Type') in _STOP_TYPES):
+            for ref in _references(obj):
+                if ref.idnum in self._page_set or ref.idnum == self.pages_num:
+                    continue
+                deps.add((ref.idnum, ref.generation))
+
+        buf = io.BytesIO()
+        if obj is None:
+            buf.write(b"null")
+        else:
+            obj.write_to_stream(buf, None)
+        self._bytes[num] = (gen, buf.getvalue())
+        self._deps[num] = deps
+
+    def _closure(self, page_indices: Iterable[int]) -> Set[int]:
+        """Object numbers needed to render the given pages"""
+        needed = set()
+        stack = []
+        for idx in page_indices:
+            ref = self.reader.pages[idx].indirect_reference
+            stack.append((ref.idnum, ref.generation))
+        while stack:
+            num, gen = stack.pop()
+            if num in needed:
+                continue
+            needed.add(num)
+            if num not in self._bytes:
+                self._serialize(num, gen)
+            stack.extend(d for d in self._deps[num] if d[0] not in needed)
+        return needed
+
+    def write_pages(self, page_indices: List[int], stream: BinaryIO,
+                    doc_id: Optional[bytes] = None) -> None:
+        """Write the given (0-based) pages as a standalone PDF, with doc_id as /ID"""
+        objects = self._closure(page_indices)
+        kids = " ".join(f"{self._page_nums[i]} 0 R" for i in page_indices)
+
+        out = io.BytesIO()
+        out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        offsets: Dict[int, Tuple[int, int]] = {}
+
+        for num in sorted(objects):
+            gen, data = self._bytes[num]
+            offsets[num] = (out.tell(), gen)
+            out.write(f"{num} {gen} obj\n".encode('ascii'))
+            out.write(data)
+            out.write(b"\nendobj\n")
+
+        offsets[self.pages_num] = (out.tell(), 0)
+        out.write(f"{self.pages_num} 0 obj\n<< /Type /Pages /Kids [ {kids} ] "
+                  f"/Count {len(page_indices)} >>\nendobj\n".encode('ascii'))
+        offsets[self.catalog_num] = (out.tell(), 0)
+        out.write(f"{self.catalog_num} 0 obj\n<< /Type /Catalog "
+                  f"/Pages {self.pages_num} 0 R >>\nendobj\n".encode('ascii'))
+
+        xref_pos = out.tell()
+        size = self.catalog_num + 1
+        # One subsection per run of used numbers: source numbers are sparse
+        # in a small output, and free entries for the gaps would dwarf it
+        lines = ["xref\n0 1\n", "0000000000 65535 f \n"]
+        for start, count in _runs(sorted(offsets)):
+            lines.append(f"{start} {count}\n")
+            for num in range(start, start + count):
+                pos, gen = offsets[num]
+                lines.append(f"{pos:010d} {gen:05d} n \n")
+        out.write("".join(lines).encode('ascii'))
+        id_entry = f" /ID [<{doc_id.hex()}> <{doc_id.hex()}>]" if doc_id else ""
+        out.write(f"trailer\n<< /Size {size} /Root {self.catalog_num} 0 R{id_entry} >>\n"
+                  f"startxref\n{xref_pos}\n%%EOF\n".encode('ascii'))
+
+        stream.write(out.getvalue())
@@ -3,45 +3,79 @@ PDF Labor Agreement Splitter - Final Version
 Balanced approach for splitting French labor agreements
 """
 
+import io
+import json
 import os
+import hashlib
 import re
+import sys
+import time
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
-import PyPDF2
-from PyPDF2 import PdfReader, PdfWriter
-import argparse
+from typing import List, Dict, Tuple, Optional, Callable, Iterable, Iterator, Union, BinaryIO
 import logging
+from batch_checkpoint import (atomic_write, remove_partial_files,
+                              BatchCheckpoint, CHECKPOINT_NAME)
+from page_classifier import TEXT, IMAGE, BLANK
+from detectors import (PageLines, DetectorCascade, FirstLineDetector, SecondLineDetector,
+                       BodyDetector)
+from pdf_backend import AUTO, BACKENDS, PyPDF2Backend, open_backend, resolve_backend
+from dedup import REPORT_NAME, DuplicateIndex, link_or_copy, materialize_duplicate
+from discovery import iter_pdfs
+from pattern_packs import PackSet, PackWatcher, PatternPackError, load_packs
+from scheduling import BatchSchedule, page_shards
+from manifest import MANIFEST_NAME, SectionManifest, write_if_changed
+import metrics
+from json_output import ANALYSIS_NAME, NdjsonWriter, dump_json, file_sha256
+from progress import (ProgressTracker, CancelToken, ProcessingCancelled,
+                      ConsoleProgress, SCAN, SPLIT)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# PyPDF2, multiprocessing, tarfile and argparse are imported where they are
+# used: --help, argument errors and no-op runs should not pay for them
 logger = logging.getLogger(__name__)
 
 
 class AgreementSplitter:
-    """Intelligent PDF splitter for French labor agreements"""
+    """
+    Intelligent PDF splitter for French labor agreements
     
-    # Section detection patterns with priorities
+    The shared core of every preset: a preset (see PRESETS) subclasses it
+    with its own patterns, detector cascade and defaults.
+    """
+    
+    PRESET = 'agreement'
+    DEFAULT_MIN_PAGES = 2
+    DEFAULT_MERGE_GAP = 5
+    DEFAULT_MIN_CONFIDENCE = 80
+    # Prefix file names with the section's position (01_TOC_p1-3.pdf)
+    NUMBERED_FILES = False
+    # Match typographic apostrophes as ' (see normalize.py)
+    FOLD_APOSTROPHES = True
+    # Granularities detected identically from PDFium text (bench_backends.py);
+    # 'auto' keeps PyPDF2 for the others
+    PDFIUM_GRANULARITIES = ('section',)
+    
+    # Section detection patterns with priorities. They are matched against
+    # normalized lines (see normalize.py): upper case without accents, plain
+    # ' and - for apostrophe and dash variants.
     PATTERNS = {
         'TOC': [
-            (r'^TABLE\s+DES\s+MATI[EÈ]RES', 100),
+            (r'^TABLE\s+DES\s+MATIERES', 100),
             (r'^SOMMAIRE\s*$', 95),
         ],
         'Lettres_Entente': [
-            (r'^LETTRE[S]?\s+D[\'\']ENTENTE\s+N[O°]?\s*\d+', 100),
-            (r'^LETTRE[S]?\s+D[\'\']ENTENTE', 95),
-            (r'^M[ÉE]MORANDU?M', 90),
+            (r"^LETTRES?\s+D'ENTENTE\s+N[O°]?\s*\d+", 100),
+            (r"^LETTRES?\s+D'ENTENTE", 95),
+            (r'^MEMORANDU?M', 90),
         ],
         'Annexe': [
-            (r'^ANNEXE\s+[A-Z]\s*[-–—:]', 100),
-            (r'^ANNEXE\s+[IVX]+\s*[-–—:]', 100),
-            (r'^ANNEXE\s+\d+\s*[-–—:]', 100),
+            (r'^ANNEXE\s+[A-Z]\s*[-:]', 100),
+            (r'^ANNEXE\s+[IVX]+\s*[-:]', 100),
+            (r'^ANNEXE\s+\d+\s*[-:]', 100),
             (r'^\d+\s+\d+ANNEXE\s+[A-Z]', 95),  # Page number + ANNEXE
         ],
         'Articles': [
-            (r'^CHAPITRE\s+[IVX\d]+\s*[-–—:]', 95),
-            (r'^SECTION\s+[IVX\d]+\s*[-–—:]', 95),
+            (r'^CHAPITRE\s+[IVX\d]+\s*[-:]', 95),
+            (r'^SECTION\s+[IVX\d]+\s*[-:]', 95),
         ],
         'Signatures': [
             (r'^SIGNATURES?\s*$', 90),
@@ -49,32 +83,145 @@ class AgreementSplitter:
         ],
     }
     
-    def __init__(self, input_pdf: str, output_dir: str = None, 
-                 min_pages: int = 2, merge_threshold: int = 5):
+    # Article granularity: one section per ARTICLE. A 'num' group is appended
+    # to the type (Article_07) so only pages of the same article are merged.
+    ARTICLE_PATTERNS = {
+        'TOC': PATTERNS['TOC'],
+        'Lettres_Entente': PATTERNS['Lettres_Entente'],
+        'Annexe': PATTERNS['Annexe'],
+        'Article': [
+            # Dot leaders mean a table of contents entry, not a heading
+            (r'^(?:\d+\s+)?\d*ARTICLE\s+(?P<num>\d+)\s*[-:](?!.*\.{4})', 95),
+            (r'^(?:\d+\s+)?\d*ARTICLE\s+(?P<num>\d+)\s{2,}\S(?!.*\.{4})', 90),
+            (r'^ARTICLE\s+(?P<num>\d+)\s*$', 90),
+        ],
+        'Signatures': PATTERNS['Signatures'],
+    }
+    
+    def __init__(self, input_pdf: Union[str, Path, bytes, BinaryIO], output_dir: str = None, 
+                 min_pages: Optional[int] = None, merge_threshold: Optional[int] = None,
+                 checkpoint: Optional[BatchCheckpoint] = None,
+                 page_timeout: Optional[float] = None,
+                 doc_timeout: Optional[float] = None,
+                 progress: Optional[Callable[[Dict], None]] = None,
+                 cancel: Optional[CancelToken] = None,
+                 progress_context: Optional[Dict] = None,
+                 min_confidence: Optional[int] = None,
+                 granularity: str = 'section',
+                 json_output: bool = False,
+                 name: Optional[str] = None,
+                 backend: str = AUTO,
+                 shard_pages: Optional[int] = None,
+                 shard_jobs: Optional[int] = None,
+                 previous_output: Optional[str] = None,
+                 packs: Optional[PackSet] = None):
         """
         Initialize the splitter
         
         Args:
-            input_pdf: Input PDF path
+            input_pdf: Input PDF path, or the PDF itself as bytes / a binary file object
             output_dir: Output directory
-            min_pages: Minimum pages for a section
+            min_pages: Minimum pages for a section (default: the preset's;
+                       1 at article granularity)
             merge_threshold: Max pages gap to merge same section types
+            checkpoint: Batch journal recording finished sections
+            page_timeout: Seconds allowed to extract one page
+            doc_timeout: Seconds allowed to scan the whole document
+            progress: Callback receiving progress dicts (see progress.py)
+            cancel: Token checked before every page; set it to stop processing
+            progress_context: Extra keys added to every progress dict
+            min_confidence: Lowest detection confidence accepted as a marker
+            granularity: 'section' (chapters/annexes) or 'article' (one file per ARTICLE)
+            json_output: Also write analysis.json (sections, timings, output hashes)
+            name: File name used in logs and reports for in-memory input
+            backend: PDF engine (see pdf_backend.py); 'auto' uses pdfium when
+                     installed and its detections match PyPDF2's (PDFIUM_GRANULARITIES)
+            shard_pages: Scan documents longer than this in page shards, in parallel
+            shard_jobs: Processes for the shards (default: CPU count)
+            previous_output: Output folder of an earlier edition of this
+                             document; only pages not found there are scanned
+                             and unchanged sections are linked from it
+            packs: Pattern packs adding to (or replacing) the preset's
+                   patterns (see pattern_packs.py)
+        
+        With a time budget set, extraction runs in a supervised child process
+        that is killed when a page overruns; such pages count as undetected.
         """
-        self.input_pdf = Path(input_pdf)
+        if isinstance(input_pdf, (bytes, bytearray, memoryview)):
+            input_pdf = io.BytesIO(bytes(input_pdf))
         
-        if not self.input_pdf.exists():
-            raise FileNotFoundError(f"File not found: {input_pdf}")
+        if hasattr(input_pdf, 'read'):
+            # In-memory document: nothing is read from or written to disk
+            # unless process()/split_pdf() is called
+            self.source = input_pdf
+            self.input_pdf = Path(name or getattr(input_pdf, 'name', None) or 'document.pdf')
+        else:
+            self.input_pdf = Path(input_pdf)
+            self.source = self.input_pdf
+            if not self.input_pdf.exists():
+                raise FileNotFoundError(f"File not found: {input_pdf}")
         
         if output_dir:
             self.output_dir = Path(output_dir)
         else:
             self.output_dir = self.input_pdf.parent / f"{self.input_pdf.stem}_split"
         
-        self.output_dir.mkdir(exist_ok=True, parents=True)
+        if granularity not in ('section', 'article'):
+            raise ValueError(f"Unknown granularity: {granularity}")
+        if granularity == 'article' and self.ARTICLE_PATTERNS is None:
+            raise ValueError(f"The {self.PRESET} preset has no article granularity")
+        if min_pages is None:
+            min_pages = 1 if granularity == 'article' else self.DEFAULT_MIN_PAGES
         self.min_pages = min_pages
-        self.merge_threshold = merge_threshold
+        self.merge_threshold = self.DEFAULT_MERGE_GAP if merge_threshold is None else merge_threshold
+        self.min_confidence = (self.DEFAULT_MIN_CONFIDENCE if min_confidence is None
+                               else min_confidence)
+        self.granularity = granularity
+        self.packs = packs
+        self.patterns = self.select_patterns(granularity, packs)
+        self.cascade = self.build_cascade()
+        self.checkpoint = checkpoint
+        self.json_output = json_output
+        self.backend = resolve_backend(backend, granularity in self.PDFIUM_GRANULARITIES)
+        self.shard_pages = shard_pages
+        self.shard_jobs = shard_jobs
+        self.pdf = None
+        self.page_timeout = page_timeout
+        self.doc_timeout = doc_timeout
+        self.cancel = cancel or CancelToken()
+        self.tracker = ProgressTracker(progress, self.input_pdf.name, progress_context)
         self.reader = None
+        self.page_kinds = {TEXT: 0, IMAGE: 0, BLANK: 0}
+        self.image_pages = []
+        self.timed_out_pages = []
+        self.detections = []
+        self.header_index = {}   # page -> normalized first key lines
+        self.timings = {}
+        self.unchanged_files = 0
+        self._digest = None
+        self.kinds = {}          # page -> TEXT/IMAGE/BLANK
+        self._fingerprints = None   # page -> content fingerprint, see fingerprints
+        self.pages_rescanned = 0
+        self.shard_extract_seconds = None   # set in shard processes (_scan_shard)
+        self.previous = None
+        if previous_output:
+            from incremental import PreviousVersion
+            self.previous = PreviousVersion(previous_output, granularity,
+                                            self.patterns_digest())
         
+    @property
+    def fingerprints(self) -> List[str]:
+        """
+        Content fingerprint of every page (see PyPDF2Backend.page_fingerprint)
+
+        Computed on first use: only incremental splitting (--previous) and
+        the saved page index need them.
+        """
+        if self._fingerprints is None:
+            self._fingerprints = [self.pdf.page_fingerprint(i)
+                                  for i in range(self.pdf.page_count)]
+        return self._fingerprints
+    
     def extract_text(self, page) -> str:
         """Extract text from page"""
         try:
@@ -83,17 +230,27 @@ class AgreementSplitter:
             logger.debug(f"Text extraction error: {e}")
             return ""
     
-    def get_key_lines(self, text: str, max_lines: int = 5) -> List[str]:
-        """Get first significant lines from text"""
-        lines = []
-        for line in text.split('\n'):
-            cleaned = line.strip()
-            # Skip empty, pure numbers, or very short lines
-            if cleaned and not cleaned.isdigit() and len(cleaned) > 2:
-                lines.append(cleaned)
-                if len(lines) >= max_lines:
-                    break
-        return lines
+    def _page_text(self, page) -> str:
+        """Text of a page given by 0-based index (through the backend) or as a PyPDF2 page"""
+        if not isinstance(page, int):
+            return self.extract_text(page)
+        if self.pdf is None:
+            self.pdf = open_backend(self.source, self.backend)
+            self.reader = self.pdf.reader
+        return self.pdf.page_text(page)
+    
+    def build_cascade(self) -> DetectorCascade:
+        """
+        Detectors of this preset, cheapest first
+        
+        The first line decides most pages; the second line is only matched
+        when one search of all patterns at once finds something there.
+        """
+        stages = [FirstLineDetector(self.patterns), SecondLineDetector(self.patterns)]
+        if self.granularity == 'article' and 'Article' in self.patterns:
+            # Articles often start mid-page (other types are too ambiguous there)
+            stages.append(BodyDetector({'Article': self.patterns['Article']}, 'ARTICLE'))
+        return DetectorCascade(stages)
     
     def detect_section(self, text: str, page_num: int) -> Optional[Tuple[str, int, str]]:
         """
@@ -102,52 +259,238 @@ class AgreementSplitter:
         Returns:
             (section_type, confidence, matched_line) or None
         """
-        lines = self.get_key_lines(text, 3)
+        page = PageLines(text, self.FOLD_APOSTROPHES)
+        head = page.head(3)
+        if head:
+            self.header_index[page_num] = head
         
-        if not lines:
-            return None
+        detection = self.cascade.detect(page)
+        if detection:
+            logger.debug(f"P{page_num + 1}: '{detection[0]}' - {detection[2][:50]}")
+        return detection
+    
+    @classmethod
+    def select_patterns(cls, granularity: str = 'section',
+                        packs: Optional[PackSet] = None) -> Optional[Dict]:
+        """Patterns this preset matches at granularity, with packs applied"""
+        patterns = cls.ARTICLE_PATTERNS if granularity == 'article' else cls.PATTERNS
+        if packs and patterns is not None:
+            patterns = packs.apply(patterns, granularity)
+        return patterns
+    
+    @classmethod
+    def digest_for(cls, granularity: str = 'section', packs: Optional[PackSet] = None) -> str:
+        """patterns_digest() of a splitter with these settings"""
+        # Not sorted: the order of types and patterns decides between matches
+        spec = [cls.PRESET, granularity, cls.select_patterns(granularity, packs)]
+        if not cls.FOLD_APOSTROPHES:
+            spec.append('apostrophes')
+        spec = json.dumps(spec)
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:16]
+    
+    def patterns_digest(self) -> str:
+        """Identity of the active patterns (scan results depend on them)"""
+        return self.digest_for(self.granularity, self.packs)
+    
+    def _record_detection(self, sections: List[Dict], text: str, page_num: int):
+        """Append a marker for the page if it starts a section"""
+        detection = self.detect_section(text, page_num)
         
-        # Check first 2 lines
-        for line_idx, line in enumerate(lines[:2]):
-            line_upper = line.upper()
-            
-            # Try each section type
-            for section_type, patterns in self.PATTERNS.items():
-                for pattern, base_confidence in patterns:
-                    if re.search(pattern, line_upper):
-                        # Reduce confidence if not in first line
-                        confidence = base_confidence if line_idx == 0 else base_confidence - 10
-                        logger.debug(f"P{page_num + 1}: '{section_type}' - {line[:50]}")
-                        return (section_type, confidence, line[:80])
+        if detection:
+            section_type, confidence, header = detection
+            self._add_marker(sections, {
+                'type': section_type,
+                'page': page_num,
+                'confidence': confidence,
+                'header': header
+            })
+    
+    def _add_marker(self, sections: List[Dict], marker: Dict):
+        # Every detection is kept so the cutoff can be re-tuned without a rescan
+        self.detections.append(marker)
         
-        return None
+        # Only accept high-confidence detections
+        if marker['confidence'] >= self.min_confidence:
+            sections.append(marker)
+            logger.info(f"Page {marker['page'] + 1}: {marker['type']}")
+    
+    @staticmethod
+    def select_markers(detections: List[Dict], min_confidence: int) -> List[Dict]:
+        """Markers find_all_sections() would return for another confidence cutoff"""
+        return [d for d in detections if d['confidence'] >= min_confidence]
+    
+    def _supervisor_source(self):
+        """Path, or the document bytes, for the extraction child process"""
+        if isinstance(self.source, Path):
+            return self.source
+        self.source.seek(0)
+        return self.source.read()
     
     def find_all_sections(self) -> List[Dict]:
         """Find all section markers in the document"""
-        self.reader = PdfReader(self.input_pdf)
-        total_pages = len(self.reader.pages)
+        self.pdf = open_backend(self.source, self.backend)
+        self.reader = self.pdf.reader
+        total_pages = self.pdf.page_count
         
-        logger.info(f"Scanning: {self.input_pdf.name} ({total_pages} pages)")
+        logger.info(f"Scanning: {self.input_pdf.name} ({total_pages} pages, "
+                    f"{self.backend} backend)")
         
         sections = []
+        self.page_kinds = {TEXT: 0, IMAGE: 0, BLANK: 0}
+        self.kinds = {}
+        self._fingerprints = None
+        self.pages_rescanned = 0
+        self.image_pages = []
+        self.timed_out_pages = []
+        self.detections = []
+        self.header_index = {}
+        self.cascade = self.build_cascade()
         
-        for page_num in range(total_pages):
-            text = self.extract_text(self.reader.pages[page_num])
-            detection = self.detect_section(text, page_num)
-            
-            if detection:
-                section_type, confidence, header = detection
-                
-                # Only accept high-confidence detections
-                if confidence >= 80:
-                    sections.append({
-                        'type': section_type,
-                        'page': page_num,
-                        'confidence': confidence,
-                        'header': header
-                    })
-                    logger.info(f"Page {page_num + 1}: {section_type}")
+        supervised = self.page_timeout is not None or self.doc_timeout is not None
+        shards = page_shards(total_pages, self.shard_pages)
+        # Shards only pay for their start-up cost when they run side by side
+        jobs = min(len(shards), self.shard_jobs or os.cpu_count() or 1)
+        
+        self.tracker.start_phase(SCAN, total_pages)
+        
+        # With a previous edition most pages are looked up, not scanned
+        if jobs > 1 and not supervised and self.previous is None:
+            sections = self._scan_shards(shards, total_pages, jobs)
+        else:
+            supervisor = None
+            if supervised:
+                from extract_worker import SupervisedExtractor
+                supervisor = SupervisedExtractor(self._supervisor_source(), self.page_timeout,
+                                                 self.doc_timeout, self.backend)
+            try:
+                for page_num in range(total_pages):
+                    self.cancel.raise_if_cancelled()
+                    if page_num:
+                        self.tracker.update(page_num, total_pages)
+                    self._scan_page(page_num, sections, supervisor)
+                    metrics.PAGES.inc()
+            finally:
+                if supervisor is not None:
+                    supervisor.close()
+        
+        logger.debug("Pages decided by: " + ", ".join(
+            f"{name} {count}" for name, count in self.cascade.decided_by.items()))
+        
+        if self.timed_out_pages:
+            logger.warning(f"{len(self.timed_out_pages)} page(s) ran out of time "
+                           f"and were left undetected")
+        
+        if self.previous is not None:
+            logger.info(f"{total_pages - self.pages_rescanned} of {total_pages} page(s) "
+                        f"unchanged since {Path(self.previous.input_file or '?').name}, "
+                        f"{self.pages_rescanned} scanned")
+        
+        if self.image_pages:
+            logger.warning(f"{len(self.image_pages)} of {total_pages} page(s) are "
+                           f"image-only (no text layer) - OCR needed to detect sections there")
+        
+        return sections
+    
+    def _scan_page(self, page_num: int, sections: List[Dict], supervisor=None):
+        """Classify one page and record its detection, if any"""
+        if self.previous is not None:
+            known = self.previous.page(self.fingerprints[page_num])
+            if known is not None:
+                self._reuse_page(page_num, known, sections)
+                return
+        
+        self.pages_rescanned += 1
+        # Scanned/blank pages have no text to extract
+        kind = self.pdf.classify(page_num)
+        self.kinds[page_num] = kind
+        self.page_kinds[kind] += 1
+        if kind != TEXT:
+            if kind == IMAGE:
+                self.image_pages.append(page_num)
+            return
+        
+        extract_started = time.perf_counter()
+        if supervisor is None:
+            text = self.pdf.page_text(page_num)
+        else:
+            from extract_worker import PageTimeout
+            try:
+                text = supervisor.extract(page_num)
+            except PageTimeout:
+                self.timed_out_pages.append(page_num)
+                metrics.FAILURES.inc(stage='page', exception='PageTimeout')
+                return
+        self._observe_extract(time.perf_counter() - extract_started)
+        
+        self._record_detection(sections, text, page_num)
+    
+    def _observe_extract(self, seconds: float):
+        # A shard process hands its timings back to the parent's metrics
+        if self.shard_extract_seconds is not None:
+            self.shard_extract_seconds.append(seconds)
+        else:
+            metrics.PAGE_EXTRACT_SECONDS.observe(seconds)
+    
+    def _reuse_page(self, page_num: int, known: Dict, sections: List[Dict]):
+        """Take a page's scan result from the previous edition"""
+        kind = known['kind']
+        self.kinds[page_num] = kind
+        self.page_kinds[kind] += 1
+        if kind == IMAGE:
+            self.image_pages.append(page_num)
+        if known['header'] is not None:
+            self.header_index[page_num] = known['header']
+        if known['detection']:
+            self._add_marker(sections, dict(known['detection'], page=page_num))
+    
+    def _scan_shards(self, shards: List[Tuple[int, int]], total_pages: int,
+                     jobs: int) -> List[Dict]:
+        """
+        Scan page ranges in parallel worker processes
+        
+        Shard results are merged in page order, so detections are the same
+        as a sequential scan. Cancelling terminates the workers.
+        """
+        import multiprocessing
+        
+        options = {'granularity': self.granularity, 'min_confidence': self.min_confidence,
+                   'backend': self.backend, 'name': self.input_pdf.name, 'packs': self.packs}
+        source = str(self.source) if isinstance(self.source, Path) else self._supervisor_source()
+        logger.info(f"Scanning in {len(shards)} shard(s) of up to "
+                    f"{shards[0][1] - shards[0][0]} pages with {jobs} process(es)")
+        
+        results = {}
+        with multiprocessing.Pool(jobs) as pool:
+            pending = {start: pool.apply_async(_scan_shard,
+                                               (type(self), source, start, stop, options))
+                       for start, stop in shards}
+            while pending:
+                self.cancel.raise_if_cancelled()
+                for start in [s for s, r in pending.items() if r.ready()]:
+                    results[start] = pending.pop(start).get()
+                    metrics.PAGES.inc(results[start]['pages'])
+                    for seconds in results[start]['extract_seconds']:
+                        metrics.PAGE_EXTRACT_SECONDS.observe(seconds)
+                    self.tracker.update(sum(r['pages'] for r in results.values()), total_pages)
+                if pending:
+                    next(iter(pending.values())).wait(0.1)
         
+        sections = []
+        for start in sorted(results):
+            shard = results[start]
+            for kind, count in shard['page_kinds'].items():
+                self.page_kinds[kind] += count
+            self.kinds.update(shard['kinds'])
+            self.pages_rescanned += shard['pages']
+            self.image_pages.extend(shard['image_pages'])
+            self.header_index.update(shard['header_index'])
+            for name, count in shard['decided_by'].items():
+                self.cascade.decided_by[name] += count
+            for marker in shard['detections']:
+                self.detections.append(marker)
+                if marker['confidence'] >= self.min_confidence:
+                    sections.append(marker)
+                    logger.info(f"Page {marker['page'] + 1}: {marker['type']}")
         return sections
     
     def build_sections(self, markers: List[Dict]) -> List[Dict]:
@@ -165,6 +508,17 @@ class AgreementSplitter:
         sections = []
         total_pages = len(self.reader.pages)
         
+        # Pages before the first heading (cover, preamble, an undetected
+        # body) are kept as their own section rather than dropped
+        if markers[0]['page'] > 0:
+            sections.append({
+                'type': 'Front_Matter',
+                'start_page': 0,
+                'end_page': markers[0]['page'] - 1,
+                'confidence': 50,
+                'header': 'Pages before the first section'
+            })
+        
         # Create sections from markers
         for i, marker in enumerate(markers):
             start = marker['page']
@@ -206,11 +560,32 @@ class AgreementSplitter:
         merged.append(current)
         return merged
     
+    @staticmethod
+    def _format_pages(pages: List[int]) -> str:
+        """Compact 1-based page ranges, e.g. '3-7, 12'"""
+        ranges = []
+        for p in pages:
+            if ranges and ranges[-1][1] == p - 1:
+                ranges[-1][1] = p
+            else:
+                ranges.append([p, p])
+        return ", ".join(f"{a + 1}-{b + 1}" if a != b else f"{a + 1}" for a, b in ranges)
+    
     def create_report(self, sections: List[Dict]) -> str:
         """Generate analysis report"""
         report = f"Document Analysis: {self.input_pdf.name}\n"
         report += "=" * 80 + "\n\n"
         report += f"Total pages: {len(self.reader.pages)}\n"
+        if self.packs:
+            report += ("Pattern packs: " + ", ".join(f"{p.name} ({p.digest[:12]})"
+                                                     for p in self.packs.packs) + "\n")
+        report += (f"Page types: {self.page_kinds[TEXT]} text, "
+                   f"{self.page_kinds[IMAGE]} image-only, {self.page_kinds[BLANK]} blank\n")
+        if self.image_pages:
+            report += f"Needs OCR: pages {self._format_pages(self.image_pages)}\n"
+        if self.timed_out_pages:
+            report += (f"Timed out (undetected): pages "
+                       f"{self._format_pages(self.timed_out_pages)}\n")
         report += f"Sections found: {len(sections)}\n\n"
         
         for idx, sec in enumerate(sections, 1):
@@ -224,12 +599,50 @@ class AgreementSplitter:
         
         return report
     
-    def split_pdf(self, sections: List[Dict]) -> List[str]:
-        """Split PDF into files"""
-        created = []
-        counters = {}
-        
+    def build_analysis(self, sections: List[Dict]) -> Dict:
+        """Structured counterpart of create_report() (1-based pages)"""
+        written = []
         for sec in sections:
+            entry = {
+                'type': sec['type'],
+                'start_page': sec['start_page'] + 1,
+                'end_page': sec['end_page'] + 1,
+                'pages': sec['end_page'] - sec['start_page'] + 1,
+                'confidence': sec['confidence'],
+                'header': sec.get('header'),
+                'file': sec.get('file'),
+            }
+            if 'sha256' in sec:
+                entry['sha256'] = sec['sha256']
+                entry['bytes'] = sec['bytes']
+            written.append(entry)
+        
+        return {
+            'input_file': str(self.input_pdf),
+            'total_pages': len(self.reader.pages),
+            'preset': self.PRESET,
+            'granularity': self.granularity,
+            'settings': {
+                'min_pages': self.min_pages,
+                'merge_gap': self.merge_threshold,
+                'min_confidence': self.min_confidence,
+            },
+            'patterns_digest': self.patterns_digest(),
+            'pattern_packs': self.packs.describe() if self.packs else [],
+            'page_kinds': dict(self.page_kinds),
+            'image_pages': [p + 1 for p in self.image_pages],
+            'timed_out_pages': [p + 1 for p in self.timed_out_pages],
+            'sections': written,
+            'detections': [dict(d, page=d['page'] + 1) for d in self.detections],
+            # Pages settled by each detector of the cascade (pages scanned this run)
+            'detectors': dict(self.cascade.decided_by),
+            'timings': {k: round(v, 3) for k, v in self.timings.items()},
+        }
+    
+    def _planned_outputs(self, sections: List[Dict]) -> Iterator[Tuple[Dict, str]]:
+        """Sections large enough to write, with their output file names"""
+        counters = {}
+        for index, sec in enumerate(sections):
             start = sec['start_page']
             end = sec['end_page']
             pages = end - start + 1
@@ -243,54 +656,272 @@ class AgreementSplitter:
             counters[stype] = counters.get(stype, 0) + 1
             num = counters[stype]
             
-            # Create PDF
-            writer = PdfWriter()
-            for p in range(start, end + 1):
-                writer.add_page(self.reader.pages[p])
-            
             # Filename
-            if counters[stype] > 1:
+            if self.NUMBERED_FILES:
+                filename = f"{index + 1:02d}_{stype}_p{start + 1}-{end + 1}.pdf"
+            elif counters[stype] > 1:
                 filename = f"{stype}_{num:02d}_p{start + 1}-{end + 1}.pdf"
             else:
                 filename = f"{stype}_p{start + 1}-{end + 1}.pdf"
             
-            filepath = self.output_dir / filename
-            
-            try:
-                with open(filepath, 'wb') as f:
-                    writer.write(f)
-                logger.info(f"Created: {filename} ({pages} pages)")
-                created.append(str(filepath))
-            except Exception as e:
-                logger.error(f"Error creating {filename}: {e}")
+            sec['file'] = filename
+            yield sec, filename
+    
+    def _source_digest(self) -> str:
+        """SHA-256 of the input document (computed once)"""
+        if self._digest is None:
+            if isinstance(self.source, Path):
+                self._digest = file_sha256(self.source)
+            else:
+                self.source.seek(0)
+                self._digest = hashlib.sha256(self.source.read()).hexdigest()
+        return self._digest
+    
+    def _document_id(self, sec: Dict) -> bytes:
+        """
+        Stable /ID for a section file: same input and pages, same ID, so
+        re-running on an unchanged document reproduces identical bytes
+        """
+        key = f"{self._source_digest()}:{sec['start_page']}-{sec['end_page']}"
+        return hashlib.sha256(key.encode('ascii')).digest()[:16]
+    
+    def _section_writer(self, sec: Dict, shared) -> Callable:
+        """Callable writing one section's PDF to a binary stream"""
+        page_range = list(range(sec['start_page'], sec['end_page'] + 1))
+        doc_id = self._document_id(sec)
+        if shared is not None:
+            return lambda f: shared.write_pages(page_range, f, doc_id)
+        return lambda f: self.pdf.write_pages(page_range, f, doc_id)
+    
+    def _shared_writer(self):
+        """SharedObjectWriter in article mode with the PyPDF2 backend, else None"""
+        # Native writers are fast enough per file; only PyPDF2 needs sharing
+        if self.granularity != 'article' or type(self.pdf) is not PyPDF2Backend:
+            return None
+        # Many small outputs: share serialized fonts/images across all files
+        from shared_writer import SharedObjectWriter
+        return SharedObjectWriter(self.reader)
+    
+    def _pages_to_write(self, sections: List[Dict]) -> int:
+        return sum(s['end_page'] - s['start_page'] + 1 for s in sections
+                   if s['end_page'] - s['start_page'] + 1 >= self.min_pages)
+    
+    def split_pdf(self, sections: List[Dict]) -> List[str]:
+        """
+        Split PDF into files
+        
+        Section files are reproducible, and one whose bytes match the
+        folder's checksum manifest is left untouched (not even rewritten),
+        so only changed sections look new to file sync tools. Section files
+        of an earlier run that are no longer produced are removed.
+        """
+        created = []
+        done = self.checkpoint.finished_sections(self.input_pdf) if self.checkpoint else set()
+        remove_partial_files(self.output_dir)
+        manifest = SectionManifest(self.output_dir)
+        self.unchanged_files = 0
+        
+        pages_total = self._pages_to_write(sections)
+        pages_done = 0
+        self.tracker.sections_written = 0
+        self.tracker.start_phase(SPLIT, pages_total)
+        
+        shared = self._shared_writer()
+        complete = False
+        
+        try:
+            for sec, filename in self._planned_outputs(sections):
+                pages = sec['end_page'] - sec['start_page'] + 1
+                filepath = self.output_dir / filename
+                
+                # Written by an interrupted run (files only appear once complete)
+                if filename in done and filepath.exists():
+                    logger.info(f"Already done: {filename}")
+                    created.append(str(filepath))
+                    digest = manifest.previous.get(filename) or file_sha256(filepath)
+                    manifest.add(filename, digest)
+                    self._record_output(sec, digest, filepath.stat().st_size)
+                    pages_done += pages
+                    continue
+                
+                # Same pages as a section of the previous edition: link its file
+                reused = self._previous_section_file(sec)
+                if reused is not None:
+                    link_or_copy(reused, filepath)
+                    digest = file_sha256(filepath)
+                    logger.info(f"Unchanged since previous version: {filename} ({pages} pages)")
+                    self.unchanged_files += 1
+                    manifest.add(filename, digest)
+                    created.append(str(filepath))
+                    self._record_output(sec, digest, filepath.stat().st_size)
+                    if self.checkpoint:
+                        self.checkpoint.section_done(self.input_pdf, filename)
+                    pages_done += pages
+                    continue
+                
+                # Create PDF
+                self.cancel.raise_if_cancelled()
+                buf = io.BytesIO()
+                
+                try:
+                    with metrics.timed(metrics.SECTION_WRITE_SECONDS):
+                        self._section_writer(sec, shared)(buf)
+                    data = buf.getvalue()
+                    digest = hashlib.sha256(data).hexdigest()
+                    if manifest.unchanged(filename, digest, len(data)):
+                        logger.info(f"Unchanged: {filename} ({pages} pages)")
+                        self.unchanged_files += 1
+                    else:
+                        atomic_write(filepath, lambda f: f.write(data))
+                        metrics.BYTES_WRITTEN.inc(len(data))
+                        logger.info(f"Created: {filename} ({pages} pages)")
+                    manifest.add(filename, digest)
+                    created.append(str(filepath))
+                    self._record_output(sec, digest, len(data))
+                    self.tracker.sections_written += 1
+                    if self.checkpoint:
+                        self.checkpoint.section_done(self.input_pdf, filename)
+                except Exception as e:
+                    logger.error(f"Error creating {filename}: {e}")
+                    metrics.FAILURES.inc(stage='section', exception=type(e).__name__)
+                
+                pages_done += pages
+                self.tracker.update(pages_done, pages_total)
+            complete = True
+        finally:
+            manifest.save(complete)
         
+        manifest.remove_stale()
         return created
     
-    def process(self) -> Dict:
-        """Main processing function"""
+    def iter_section_pdfs(self, sections: List[Dict]) -> Iterator[Tuple[Dict, str, bytes]]:
+        """
+        Build each section PDF in memory, one at a time
+        
+        Yields:
+            (section, file name, PDF bytes) in document order
+        """
+        pages_total = self._pages_to_write(sections)
+        pages_done = 0
+        self.tracker.sections_written = 0
+        self.tracker.start_phase(SPLIT, pages_total)
+        
+        shared = self._shared_writer()
+        
+        for sec, filename in self._planned_outputs(sections):
+            self.cancel.raise_if_cancelled()
+            buf = io.BytesIO()
+            with metrics.timed(metrics.SECTION_WRITE_SECONDS):
+                self._section_writer(sec, shared)(buf)
+            metrics.BYTES_WRITTEN.inc(buf.tell())
+            self.tracker.sections_written += 1
+            pages_done += sec['end_page'] - sec['start_page'] + 1
+            self.tracker.update(pages_done, pages_total)
+            yield sec, filename, buf.getvalue()
+    
+    def _previous_section_file(self, sec: Dict) -> Optional[Path]:
+        if self.previous is None:
+            return None
+        fingerprints = self.fingerprints[sec['start_page']:sec['end_page'] + 1]
+        return self.previous.section_file(fingerprints)
+    
+    def _record_output(self, sec: Dict, digest: str, size: int):
+        """Remember size and hash of a written section for analysis.json"""
+        if self.json_output:
+            sec['sha256'] = digest
+            sec['bytes'] = size
+    
+    def _write_changes(self, sections: List[Dict]) -> Dict:
+        """Change report against the previous edition; result keys"""
+        from incremental import CHANGES_NAME, format_changes
+        
+        changes = self.previous.compare(sections, self.fingerprints)
+        report = format_changes(changes, self.previous.input_file, self.pages_rescanned,
+                                len(self.fingerprints))
+        changes_path = self.output_dir / CHANGES_NAME
+        write_if_changed(changes_path, report.replace('\n', os.linesep).encode('utf-8'))
+        logger.info(f"Change report saved: {changes_path.name}")
+        
+        counts = {}
+        for c in changes:
+            counts[c['status']] = counts.get(c['status'], 0) + 1
+        return {'changes_path': str(changes_path), 'changes': counts,
+                'pages_rescanned': self.pages_rescanned, 'section_changes': changes}
+    
+    def process(self, markers: Optional[List[Dict]] = None) -> Dict:
+        """
+        Main processing function
+        
+        Args:
+            markers: Output of an earlier find_all_sections() call; when given
+                     the document is not rescanned, only regrouped and written
+        """
+        started = time.monotonic()
+        self.timings = {}
         try:
             # Find sections
-            markers = self.find_all_sections()
+            if markers is None:
+                markers = self.find_all_sections()
+                self.timings['scan_seconds'] = time.monotonic() - started
             sections = self.build_sections(markers)
             
             # Create report
+            self.output_dir.mkdir(exist_ok=True, parents=True)
             report = self.create_report(sections)
-            report_path = self.output_dir / "analysis_report.txt"
-            with open(report_path, 'w', encoding='utf-8') as f:
-                f.write(report)
-            logger.info(f"Report saved: {report_path.name}")
+            report_path = self.output_dir / REPORT_NAME
+            # Bytes as text mode would write them, so an unchanged report is kept
+            if write_if_changed(report_path, report.replace('\n', os.linesep).encode('utf-8')):
+                logger.info(f"Report saved: {report_path.name}")
+            else:
+                logger.info(f"Report unchanged: {report_path.name}")
             
             # Split PDF
+            split_started = time.monotonic()
             files = self.split_pdf(sections)
+            self.timings['split_seconds'] = time.monotonic() - split_started
+            self.timings['total_seconds'] = time.monotonic() - started
+            self.tracker.finish()
             
-            return {
+            result = {
                 'success': True,
                 'input_file': str(self.input_pdf),
                 'output_dir': str(self.output_dir),
                 'sections_found': len(sections),
                 'files_created': len(files),
+                'files_unchanged': self.unchanged_files,
                 'created_files': files,
-                'report_path': str(report_path)
+                'page_kinds': dict(self.page_kinds),
+                'timed_out_pages': len(self.timed_out_pages),
+                'report_path': str(report_path),
+                'manifest_path': str(self.output_dir / MANIFEST_NAME),
+                'patterns_digest': self.patterns_digest(),
+            }
+            
+            # Page fingerprints and scan results, for splitting the next edition
+            from incremental import build_page_index, save_page_index
+            result['page_index_path'] = str(save_page_index(
+                self.output_dir, build_page_index(self, sections)))
+            if self.previous is not None:
+                result.update(self._write_changes(sections))
+            
+            if self.json_output:
+                analysis = self.build_analysis(sections)
+                if 'section_changes' in result:
+                    analysis['changes'] = result['section_changes']
+                analysis_path = self.output_dir / ANALYSIS_NAME
+                atomic_write(analysis_path, lambda f: dump_json(analysis, f), 'w', 'utf-8')
+                result['analysis_path'] = str(analysis_path)
+                result['analysis'] = analysis
+            
+            return result
+        
+        except ProcessingCancelled:
+            logger.warning(f"Cancelled: {self.input_pdf.name}")
+            return {
+                'success': False,
+                'cancelled': True,
+                'error': 'Cancelled',
+                'input_file': str(self.input_pdf)
             }
         
         except Exception as e:
@@ -298,71 +929,679 @@ class AgreementSplitter:
             return {
                 'success': False,
                 'error': str(e),
+                'error_type': type(e).__name__,
                 'input_file': str(self.input_pdf)
             }
 
 
+def _scan_shard(splitter_class: type, source, start: int, stop: int, options: Dict) -> Dict:
+    """Worker process side of AgreementSplitter._scan_shards()"""
+    # Markers are logged by the parent once the shards are merged
+    logger.setLevel(logging.WARNING)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    splitter = splitter_class(source, **options)
+    splitter.pdf = open_backend(splitter.source, splitter.backend)
+    splitter.shard_extract_seconds = []
+    try:
+        for page_num in range(start, stop):
+            splitter._scan_page(page_num, [])
+    finally:
+        splitter.pdf.close()
+    return {
+        'pages': stop - start,
+        'detections': splitter.detections,
+        'page_kinds': splitter.page_kinds,
+        'kinds': splitter.kinds,
+        'image_pages': splitter.image_pages,
+        'header_index': splitter.header_index,
+        'decided_by': splitter.cascade.decided_by,
+        'extract_seconds': splitter.shard_extract_seconds,
+    }
+
+
+# Detection presets: the original scripts' rules as subclasses of the core
+# ('module.Class', imported on first use)
+PRESETS = {
+    'agreement': 'split_agreement.AgreementSplitter',
+    'enhanced': 'pdf_splitter_v2.PDFSplitterV2',
+    'original': 'pdf_splitter.PDFSplitter',
+}
+
+
+def splitter_class(preset: str = 'agreement') -> type:
+    """Splitter class of a preset"""
+    if preset == 'agreement':
+        return AgreementSplitter
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown preset: {preset}")
+    import importlib
+    
+    module, name = PRESETS[preset].rsplit('.', 1)
+    return getattr(importlib.import_module(module), name)
+
+
+def split_in_memory(pdf: Union[bytes, BinaryIO], name: str = 'document.pdf',
+                    min_pages: Optional[int] = None, merge_threshold: Optional[int] = None,
+                    preset: str = 'agreement', **splitter_options) -> Dict:
+    """
+    Split a PDF held in memory without touching disk
+    
+    Args:
+        pdf: The document as bytes or a binary file object
+        name: File name used in logs and the report
+        preset: Detection rules (see PRESETS)
+        **splitter_options: Any other AgreementSplitter option
+    
+    Returns:
+        {'success', 'input_file', 'sections', 'report'}; each section dict has
+        type, start_page/end_page (0-based), confidence, header, file and the
+        section PDF as 'data' (bytes). On failure: {'success': False, 'error'}.
+    """
+    splitter_options.pop('output_dir', None)
+    splitter = splitter_class(preset)(pdf, min_pages=min_pages,
+                                      merge_threshold=merge_threshold,
+                                      name=name, **splitter_options)
+    try:
+        sections = splitter.build_sections(splitter.find_all_sections())
+        written = []
+        for sec, filename, data in splitter.iter_section_pdfs(sections):
+            written.append(dict(sec, file=filename, data=data))
+        splitter.tracker.finish()
+        return {
+            'success': True,
+            'input_file': name,
+            'sections': written,
+            'report': splitter.create_report(sections),
+        }
+    except ProcessingCancelled:
+        return {'success': False, 'cancelled': True, 'error': 'Cancelled', 'input_file': name}
+    except Exception as e:
+        logger.error(f"Processing failed: {e}", exc_info=True)
+        return {'success': False, 'error': str(e), 'input_file': name}
+
+
+def _add_tar_member(tar, name: str, data: bytes):
+    import tarfile
+    
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def split_to_tar(pdf: Union[bytes, BinaryIO], stream: BinaryIO, name: str = 'document.pdf',
+                 min_pages: Optional[int] = None, merge_threshold: Optional[int] = None,
+                 json_output: bool = False, preset: str = 'agreement',
+                 **splitter_options) -> Dict:
+    """
+    Split a PDF held in memory into an uncompressed tar stream
+    
+    The report comes first, then each section PDF as soon as it is built
+    (plus analysis.json at the end with json_output). The stream only needs
+    write(), so it can be a pipe such as sys.stdout.buffer.
+    
+    Returns:
+        Result dict like process(), without output paths
+    """
+    import tarfile
+    
+    splitter_options.pop('output_dir', None)
+    splitter = splitter_class(preset)(pdf, min_pages=min_pages,
+                                      merge_threshold=merge_threshold, name=name,
+                                      json_output=json_output, **splitter_options)
+    started = time.monotonic()
+    try:
+        markers = splitter.find_all_sections()
+        splitter.timings['scan_seconds'] = time.monotonic() - started
+        sections = splitter.build_sections(markers)
+        files = []
+        with tarfile.open(fileobj=stream, mode='w|') as tar:
+            _add_tar_member(tar, REPORT_NAME,
+                            splitter.create_report(sections).encode('utf-8'))
+            split_started = time.monotonic()
+            for sec, filename, data in splitter.iter_section_pdfs(sections):
+                _add_tar_member(tar, filename, data)
+                stream.flush()
+                files.append(filename)
+                logger.info(f"Streamed: {filename} ({len(data)} bytes)")
+                if json_output:
+                    sec['sha256'] = hashlib.sha256(data).hexdigest()
+                    sec['bytes'] = len(data)
+            splitter.timings['split_seconds'] = time.monotonic() - split_started
+            splitter.timings['total_seconds'] = time.monotonic() - started
+            if json_output:
+                analysis = io.StringIO()
+                dump_json(splitter.build_analysis(sections), analysis)
+                _add_tar_member(tar, ANALYSIS_NAME, analysis.getvalue().encode('utf-8'))
+        splitter.tracker.finish()
+        return {
+            'success': True,
+            'input_file': name,
+            'sections_found': len(sections),
+            'files_created': len(files),
+            'created_files': files,
+        }
+    except ProcessingCancelled:
+        return {'success': False, 'cancelled': True, 'error': 'Cancelled', 'input_file': name}
+    except Exception as e:
+        logger.error(f"Processing failed: {e}", exc_info=True)
+        return {'success': False, 'error': str(e), 'input_file': name}
+
+
+def _discover(input_path: Path, recursive: bool = False,
+              include: Optional[List[str]] = None,
+              exclude: Optional[List[str]] = None,
+              schedule: Optional[BatchSchedule] = None) -> Tuple[Iterable[Path], Optional[int]]:
+    """
+    Batch input files and their count
+    
+    A single folder is listed up front (count known, for progress); a
+    recursive search is returned as a lazy iterator with count None so
+    processing starts with the first match. With a schedule, the complete
+    list is ordered largest first instead.
+    """
+    pdfs = iter_pdfs(input_path, recursive, include, exclude)
+    if schedule is not None:
+        schedule.add(pdfs)
+        if len(schedule):
+            logger.info(f"Found {len(schedule)} PDF(s), largest first\n")
+        return schedule.order, len(schedule)
+    if recursive:
+        logger.info(f"Searching {input_path} recursively; PDFs are processed as found\n")
+        return pdfs, None
+    pdfs = list(pdfs)
+    if pdfs:
+        logger.info(f"Found {len(pdfs)} PDF(s)\n")
+    return pdfs, len(pdfs)
+
+
+def _output_dir_for(pdf: Path, output_dir: str = None, input_root: Path = None) -> Path:
+    """
+    Where a batch writes one document's sections
+    
+    Under output_dir, subfolders of input_root are mirrored so documents with
+    the same name in different folders do not collide.
+    """
+    if output_dir:
+        relative = pdf.parent.relative_to(input_root) if input_root else Path()
+        return Path(output_dir) / relative / f"{pdf.stem}_split"
+    return pdf.parent / f"{pdf.stem}_split"
+
+
+def _process_document(pdf: Path, output_dir: str = None, min_pages: Optional[int] = None,
+                      merge_threshold: Optional[int] = None,
+                      checkpoint: Optional[BatchCheckpoint] = None,
+                      input_root: Path = None, preset: str = 'agreement',
+                      **splitter_options) -> Dict:
+    """Split one PDF of a batch, never raising"""
+    logger.info(f"{'=' * 80}")
+    logger.info(f"Processing: {pdf.name}")
+    logger.info(f"{'=' * 80}")
+    
+    try:
+        out = _output_dir_for(pdf, output_dir, input_root) if output_dir else None
+        if checkpoint:
+            checkpoint.start_document(pdf)
+        splitter = splitter_class(preset)(
+            str(pdf), 
+            str(out) if out else None,
+            min_pages,
+            merge_threshold,
+            checkpoint=checkpoint,
+            **splitter_options
+        )
+        return splitter.process()
+    except Exception as e:
+        logger.error(f"Failed: {e}")
+        return {
+            'success': False,
+            'input_file': str(pdf),
+            'error': str(e),
+            'error_type': type(e).__name__,
+        }
+
+
+def _split_in_worker(conn, pdf: Path, options: Dict, journal: Dict, cancel_event):
+    """Worker process side of batch_process(jobs=...): split one document"""
+    if not logging.getLogger().handlers:
+        # Spawned (not forked) workers start without the batch's logging setup
+        logging.basicConfig(level=logging.INFO,
+                            format='%(asctime)s - %(levelname)s - %(message)s')
+    # Only this document's counts go back to the batch process
+    metrics.REGISTRY.reset()
+    checkpoint = BatchCheckpoint.for_document(**journal)
+    try:
+        # Documents run side by side instead of page shards
+        result = _process_document(pdf, checkpoint=checkpoint, cancel=CancelToken(cancel_event),
+                                   shard_jobs=1, **options)
+    finally:
+        checkpoint.close()
+    conn.send((result, metrics.REGISTRY.snapshot()))
+    conn.close()
+
+
+class BatchSummary:
+    """
+    Running totals for the end-of-batch summary
+
+    Only counters and the names of documents needing attention are kept,
+    so summarizing a streamed batch does not grow with its size.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.success = 0
+        self.resumed = 0
+        self.cancelled = 0
+        self.files_created = 0
+        self.files_unchanged = 0
+        self.timed_out = []   # (file name, undetected pages)
+        self.needs_ocr = []   # (file name, image-only pages)
+        self.duplicates = []  # (file name, name of the identical file split instead)
+        self.schedule: Optional[BatchSchedule] = None
+
+    def add(self, result: Dict):
+        self.processed += 1
+        self.success += bool(result.get('success'))
+        self.resumed += bool(result.get('resumed'))
+        self.cancelled += bool(result.get('cancelled'))
+        self.files_created += result.get('files_created', 0)
+        self.files_unchanged += result.get('files_unchanged', 0)
+        name = Path(result['input_file']).name
+        if result.get('timed_out_pages'):
+            self.timed_out.append((name, result['timed_out_pages']))
+        if result.get('page_kinds', {}).get(IMAGE):
+            self.needs_ocr.append((name, result['page_kinds'][IMAGE]))
+        if result.get('duplicate_of'):
+            self.duplicates.append((name, Path(result['duplicate_of']).name))
+
+    def log(self):
+        """Log the end-of-batch summary"""
+        logger.info(f"{'=' * 80}")
+        logger.info("BATCH PROCESSING SUMMARY")
+        logger.info(f"{'=' * 80}")
+        
+        logger.info(f"PDFs processed: {self.processed}")
+        if self.resumed:
+            logger.info(f"Skipped (finished in a previous run): {self.resumed}")
+        logger.info(f"Successful: {self.success}")
+        logger.info(f"Failed: {self.processed - self.success - self.cancelled}")
+        if self.cancelled:
+            logger.info(f"Cancelled: {self.cancelled}")
+        logger.info(f"Total files created: {self.files_created}")
+        if self.files_unchanged:
+            logger.info(f"  of which unchanged (left untouched): {self.files_unchanged}")
+        
+        if self.schedule is not None:
+            self.schedule.log()
+        
+        if self.duplicates:
+            logger.info(f"Duplicates (outputs linked, not re-split): {len(self.duplicates)}")
+            for name, original in self.duplicates:
+                logger.info(f"  {name} = {original}")
+        
+        if self.timed_out:
+            logger.info(f"Documents with timed-out pages: {len(self.timed_out)}")
+            for name, pages in self.timed_out:
+                logger.info(f"  {name}: {pages} page(s) undetected")
+        
+        if self.needs_ocr:
+            logger.info(f"Documents with image-only pages (need OCR): {len(self.needs_ocr)}")
+            for name, pages in self.needs_ocr:
+                logger.info(f"  {name}: {pages} image-only page(s)")
+
+
+def _result_status(result: Dict) -> str:
+    """Outcome of a batch result, as counted in split_documents_total"""
+    if result.get('resumed'):
+        return 'resumed'
+    if result.get('duplicate_of'):
+        return 'duplicate'
+    if result.get('cancelled'):
+        return 'cancelled'
+    return 'success' if result.get('success') else 'failed'
+
+
+class _ResultSink:
+    """Collects batch results, or streams them as NDJSON without keeping them"""
+
+    def __init__(self, ndjson: Optional[str] = None):
+        self.summary = BatchSummary()
+        self.results = []
+        self.stream = NdjsonWriter(ndjson) if ndjson else None
+
+    def add(self, result: Dict):
+        self.summary.add(result)
+        status = _result_status(result)
+        metrics.DOCUMENTS.inc(status=status)
+        if status == 'failed':
+            metrics.FAILURES.inc(stage='document',
+                                 exception=result.get('error_type', 'Exception'))
+        if self.stream is None:
+            self.results.append(result)
+        else:
+            self.stream.write(result)
+
+    def separator(self):
+        """Blank line between files, unless stdout carries the NDJSON stream"""
+        if self.stream is None or not self.stream.to_stdout:
+            print()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+
+
 def batch_process(input_dir: str, output_dir: str = None, 
-                  min_pages: int = 2, merge_threshold: int = 5):
-    """Process multiple PDFs"""
+                  min_pages: Optional[int] = None, merge_threshold: Optional[int] = None,
+                  resume: bool = False, page_timeout: float = None,
+                  doc_timeout: float = None,
+                  progress: Callable[[Dict], None] = None,
+                  cancel: CancelToken = None, min_confidence: Optional[int] = None,
+                  granularity: str = 'section', json_output: bool = False,
+                  ndjson: str = None, backend: str = AUTO, dedup: bool = True,
+                  recursive: bool = False, include: List[str] = None,
+                  exclude: List[str] = None, largest_first: bool = False,
+                  shard_pages: int = None, preset: str = 'agreement',
+                  packs: List[str] = None, jobs: Optional[int] = 1, min_jobs: int = 1,
+                  memory_reserve: Optional[int] = None):
+    """
+    Process multiple PDFs
+    
+    Progress is journaled to .split_checkpoint.jsonl in the output (or input)
+    directory; with resume=True finished documents and sections are skipped.
+    page_timeout/doc_timeout bound the time spent scanning each document.
+    progress receives per-page updates with documents_done/documents_total;
+    setting cancel stops the batch within one page.
+    json_output writes analysis.json next to each report. With ndjson (a
+    path, or '-' for stdout) each result is written as one JSON line as soon
+    as its document finishes and is not kept: the returned list is empty.
+    With dedup, a PDF identical to one already split gets its output folder
+    filled with links to that one's files instead of being split again.
+    recursive searches subfolders (include/exclude: globs, see discovery.py)
+    and starts on each PDF as soon as it is found; with output_dir the
+    subfolder layout is mirrored there.
+    largest_first orders the batch by page count (read without extracting
+    text) and adds the schedule, with predicted and actual times, to the
+    summary. Documents longer than shard_pages are scanned in parallel
+    page shards. preset selects the detection rules (see PRESETS); unset
+    min_pages, merge_threshold and min_confidence take its defaults.
+    packs are pattern pack files or folders (see pattern_packs.py); they are
+    reloaded between documents when edited, and documents finished with
+    other patterns are split again on resume.
+    With jobs > 1 (None: one per CPU) documents are split in worker
+    processes, a new one starting only while memory allows (see
+    governor.py): at least min_jobs and at most jobs at once, keeping
+    memory_reserve bytes free. progress is not called in that mode.
+    """
     input_path = Path(input_dir)
     
     if not input_path.exists():
         logger.error(f"Directory not found: {input_dir}")
         return []
+    preset_class = splitter_class(preset)   # unknown preset: fail before any work
+    watcher = PackWatcher(packs) if packs else None
     
-    pdfs = list(input_path.glob("*.pdf")) + list(input_path.glob("*.PDF"))
+    schedule = BatchSchedule(shard_pages=shard_pages) if largest_first else None
+    pdfs, total = _discover(input_path, recursive, include, exclude, schedule)
     
-    if not pdfs:
+    if total == 0:
         logger.warning(f"No PDFs found in {input_dir}")
         return []
     
-    logger.info(f"Found {len(pdfs)} PDF(s)\n")
+    checkpoint = BatchCheckpoint(
+        Path(output_dir or input_dir) / CHECKPOINT_NAME, resume=resume)
+    sink = _ResultSink(ndjson)
+    sink.summary.schedule = schedule
+    duplicates = DuplicateIndex() if dedup else None
+    # Results of documents whose copies wait for them (see deferred); copies
+    # found later reuse the journal entry, so nothing grows with the batch
+    finished = {}
     
-    results = []
+    cancel = cancel or CancelToken()
     
-    for pdf in pdfs:
-        logger.info(f"{'=' * 80}")
-        logger.info(f"Processing: {pdf.name}")
-        logger.info(f"{'=' * 80}")
+    options = {'output_dir': output_dir, 'min_pages': min_pages,
+               'merge_threshold': merge_threshold, 'input_root': input_path,
+               'page_timeout': page_timeout, 'doc_timeout': doc_timeout,
+               'min_confidence': min_confidence, 'granularity': granularity,
+               'json_output': json_output or bool(ndjson), 'backend': backend,
+               'shard_pages': shard_pages, 'preset': preset}
+    governor = None
+    if jobs is None or jobs > 1:
+        from governor import MB, MemoryGovernor
         
-        try:
-            out = Path(output_dir) / f"{pdf.stem}_split" if output_dir else None
-            splitter = AgreementSplitter(
-                str(pdf), 
-                str(out) if out else None,
-                min_pages,
-                merge_threshold
-            )
-            result = splitter.process()
-            results.append(result)
-        except Exception as e:
-            logger.error(f"Failed: {e}")
-            results.append({
-                'success': False,
-                'input_file': str(pdf),
-                'error': str(e)
-            })
+        governor = MemoryGovernor(jobs, min_jobs, memory_reserve)
+        logger.info(f"Splitting up to {governor.max_jobs} document(s) at once while memory "
+                    f"allows ({governor.reserve // MB} MB kept free)\n")
+    in_flight = set()
+    deferred = {}   # original -> identical PDFs waiting for its result
+    index = -1
+    
+    def settle(pdf: Path, original: Optional[Path], pack_set: Optional[PackSet]) -> bool:
+        """Finish a resumed or duplicate document without splitting it"""
+        digest = preset_class.digest_for(granularity, pack_set)
+        if checkpoint.is_document_done(pdf, digest):
+            logger.info(f"Skipping (already done): {pdf.name}")
+            sink.add(checkpoint.finished_result(pdf))
+            return True
         
-        print()  # Blank line between files
+        if original is None:
+            return False
+        source = finished.get(original)
+        if source is not None and source.get('patterns_digest') not in (None, digest):
+            source = None   # split before the pattern packs were reloaded
+        if source is None and checkpoint.is_document_done(original, digest):
+            # Split earlier (or in a previous run) with the patterns now in use
+            source = dict(checkpoint.finished_result(original), patterns_digest=digest)
+        if source is not None:
+            logger.info(f"Identical to {original.name}: {pdf.name}")
+            checkpoint.start_document(pdf)
+            result = materialize_duplicate(source, pdf,
+                                           _output_dir_for(pdf, output_dir, input_path))
+            checkpoint.document_done(pdf, result)
+            sink.add(result)
+            return True
+        return False
     
-    # Summary
-    logger.info(f"{'=' * 80}")
-    logger.info("BATCH PROCESSING SUMMARY")
-    logger.info(f"{'=' * 80}")
+    def pending() -> Iterator[Tuple[int, Path, Optional[PackSet]]]:
+        """Documents to split, with the packs to use; the others are settled on the way"""
+        nonlocal index
+        for index, pdf in enumerate(pdfs):
+            if total:
+                metrics.QUEUE_DEPTH.set(total - index)
+            if cancel.cancelled:
+                remaining = f", {total - index} PDF(s) not processed" if total else ""
+                logger.warning(f"Batch cancelled{remaining}")
+                return
+            
+            if watcher is not None:
+                watcher.poll()
+            pack_set = watcher.packs if watcher is not None else None
+            original = duplicates.original_of(pdf) if duplicates else None
+            if original in in_flight:
+                deferred.setdefault(original, []).append(pdf)
+                continue
+            if not settle(pdf, original, pack_set):
+                yield index, pdf, pack_set
+        metrics.QUEUE_DEPTH.set(0)
     
-    success = sum(1 for r in results if r.get('success'))
-    total_files = sum(r.get('files_created', 0) for r in results)
+    def record(pdf: Path, result: Dict, seconds: float):
+        if schedule is not None:
+            schedule.record(pdf, seconds)
+            result.update(schedule.entry(pdf))
+        if not result.get('cancelled'):
+            checkpoint.document_done(pdf, result)
+            if pdf in deferred:
+                finished[pdf] = {k: v for k, v in result.items() if k != 'analysis'}
+        sink.add(result)
+        sink.separator()
     
-    logger.info(f"PDFs processed: {len(results)}")
-    logger.info(f"Successful: {success}")
-    logger.info(f"Failed: {len(results) - success}")
-    logger.info(f"Total files created: {total_files}")
+    try:
+        if governor is None:
+            for index, pdf, pack_set in pending():
+                started = time.monotonic()
+                result = _process_document(
+                    pdf, checkpoint=checkpoint, progress=progress, cancel=cancel,
+                    packs=pack_set,
+                    progress_context={'documents_done': index, 'documents_total': total},
+                    **options)
+                record(pdf, result, time.monotonic() - started)
+        else:
+            from governor import GovernedRunner, Job
+            from scheduling import page_count
+            
+            def job_for(pdf: Path, pack_set: Optional[PackSet]) -> Job:
+                in_flight.add(pdf)
+                pages = schedule.pages.get(pdf) if schedule is not None else page_count(pdf)
+                try:
+                    size = pdf.stat().st_size
+                except OSError:   # reported by the worker
+                    size = 0
+                return Job(pdf, size, pages,
+                           (pdf, dict(options, packs=pack_set), checkpoint.state_for(pdf)))
+            
+            runner = GovernedRunner(governor, _split_in_worker, cancel)
+            for job, payload in runner.run(job_for(pdf, pack_set)
+                                           for _, pdf, pack_set in pending()):
+                in_flight.discard(job.key)
+                if payload is None:
+                    result = {'success': False, 'input_file': str(job.key),
+                              'error': f"Worker process died (exit code {job.exitcode})",
+                              'error_type': 'WorkerDied'}
+                else:
+                    result, snapshot = payload
+                    metrics.REGISTRY.merge(snapshot)
+                record(job.key, result, job.seconds)
+                pack_set = watcher.packs if watcher is not None else None
+                for pdf in deferred.pop(job.key, []):
+                    # Original cancelled, or split with patterns since reloaded
+                    if not settle(pdf, job.key, pack_set):
+                        runner.submit(job_for(pdf, pack_set))
+                finished.pop(job.key, None)
+            if cancel.cancelled:
+                logger.warning("Batch cancelled")
+    finally:
+        checkpoint.close()
+        sink.close()
+    
+    if index < 0:
+        logger.warning(f"No PDFs found in {input_dir}")
+        return []
     
-    return results
+    sink.summary.log()
+    return sink.results
 
 
-def main():
+def worker_process(input_dir: str, output_dir: str = None,
+                   min_pages: Optional[int] = None, merge_threshold: Optional[int] = None,
+                   worker_id: str = None, lease_ttl: float = 120.0,
+                   page_timeout: float = None, doc_timeout: float = None,
+                   progress: Callable[[Dict], None] = None,
+                   cancel: CancelToken = None, min_confidence: Optional[int] = None,
+                   granularity: str = 'section', json_output: bool = False,
+                   ndjson: str = None, backend: str = AUTO,
+                   recursive: bool = False, include: List[str] = None,
+                   exclude: List[str] = None, largest_first: bool = False,
+                   shard_pages: int = None, preset: str = 'agreement',
+                   packs: List[str] = None):
+    """
+    Process PDFs as one of several cooperating workers
+    
+    Any number of processes, on one host or many, can run this against the
+    same input directory. Documents are claimed through lease files under
+    .split_leases/ in the output (or input) directory, so each one is split
+    exactly once; leases of crashed workers expire and are picked up again.
+    Returns the results of the documents this worker processed (empty when
+    they are streamed to ndjson, as in batch_process).
+    With largest_first every worker claims in the same largest-first order,
+    so the longest documents start first and no worker is left alone with
+    a big one at the end. packs are reloaded between documents when edited,
+    as in batch_process.
+    """
+    input_path = Path(input_dir)
+    
+    if not input_path.exists():
+        logger.error(f"Directory not found: {input_dir}")
+        return []
+    splitter_class(preset)   # unknown preset: fail before any work
+    watcher = PackWatcher(packs) if packs else None
+    
+    schedule = BatchSchedule(shard_pages=shard_pages) if largest_first else None
+    pdfs, total = _discover(input_path, recursive, include, exclude, schedule)
+    
+    if total == 0:
+        logger.warning(f"No PDFs found in {input_dir}")
+        return []
+    
+    from work_queue import LeaseQueue
+    
+    queue = LeaseQueue(output_dir or input_dir, worker_id, lease_ttl)
+    logger.info(f"Worker {queue.worker_id} joined the shared queue\n")
+    
+    sink = _ResultSink(ndjson)
+    sink.summary.schedule = schedule
+    cancel = cancel or CancelToken()
+    
+    try:
+        for lease in queue.claim_all(pdfs, input_path):
+            if queue.pending is not None:
+                # This document plus those still to claim or waited on
+                metrics.QUEUE_DEPTH.set(queue.pending + 1)
+            if watcher is not None:
+                watcher.poll()
+            started = time.monotonic()
+            try:
+                result = _process_document(lease.path, output_dir, min_pages, merge_threshold,
+                                           input_root=input_path,
+                                           page_timeout=page_timeout,
+                                           doc_timeout=doc_timeout,
+                                           progress=progress,
+                                           # A lost lease stops the split before more is written
+                                           cancel=CancelToken(lease.lost_event, parent=cancel),
+                                           min_confidence=min_confidence,
+                                           granularity=granularity,
+                                           json_output=json_output or bool(ndjson),
+                                           backend=backend, shard_pages=shard_pages,
+                                           preset=preset,
+                                           packs=watcher.packs if watcher else None)
+            except BaseException:
+                lease.release()
+                raise
+            result['worker'] = queue.worker_id
+            if schedule is not None:
+                schedule.record(lease.path, time.monotonic() - started)
+                result.update(schedule.entry(lease.path))
+            if result.get('cancelled') and cancel.cancelled:
+                lease.release()
+                sink.add(result)
+                break
+            # Another worker owns the document now: its result is the one reported
+            if not lease.complete(result):
+                logger.warning(f"Dropped the result of {lease.path.name}: lease lost")
+                continue
+            sink.add(result)
+            sink.separator()
+        else:
+            metrics.QUEUE_DEPTH.set(0)
+    finally:
+        sink.close()
+    
+    sink.summary.log()
+    return sink.results
+
+
+def main(preset: str = 'agreement'):
+    """Command line entry point; preset is the default for --preset"""
+    import argparse
+    
+    def jobs_count(value: str) -> Optional[int]:
+        if value == 'auto':
+            return None
+        if int(value) < 1:
+            raise ValueError(value)
+        return int(value)
+    
     parser = argparse.ArgumentParser(
         description='Split French labor agreement PDFs into sections',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -377,35 +1616,232 @@ Examples:
   # Custom settings
   python split_agreement.py agreement.pdf --min-pages 3 --merge-gap 10
   
+  # One file per ARTICLE
+  python split_agreement.py agreement.pdf --granularity article
+  
+  # Detection rules of the original pdf_splitter.py
+  python split_agreement.py agreement.pdf --preset original
+  
+  # Extra section patterns for another union's agreements
+  python split_agreement.py -b ./Agreements --pack packs/scfp.toml
+  
   # Verbose mode
   python split_agreement.py -b ./Agreements -v
+  
+  # Machine-readable results, one JSON line per finished document
+  python split_agreement.py -b ./Agreements --ndjson > results.ndjson
+  
+  # Pipeline: PDF on stdin, tar of sections on stdout
+  cat agreement.pdf | python split_agreement.py - > sections.tar
+  
+  # Whole archive tree, starting on the first PDF found
+  python split_agreement.py -b ./Archive -r -o ./Split --exclude 'drafts/*'
+  
+  # Continue an interrupted batch
+  python split_agreement.py -b ./Agreements --resume
+  
+  # Several documents at once, as many as memory allows
+  python split_agreement.py -b ./Agreements --jobs auto
+  
+  # Shared queue: start on as many hosts/processes as needed
+  python split_agreement.py -b //share/Agreements --worker
+  
+  # Prometheus metrics on http://127.0.0.1:9464/metrics during a batch
+  python split_agreement.py -b ./Agreements --metrics-port 9464
         """
     )
     
-    parser.add_argument('input', help='PDF file or directory (with -b)')
+    parser.add_argument('input', help='PDF file, directory (with -b), or - to read stdin '
+                                      'and write a tar stream to stdout')
+    parser.add_argument('--name', default='stdin.pdf',
+                        help='Document name used in logs and the report for stdin input')
     parser.add_argument('-o', '--output', help='Output directory')
     parser.add_argument('-b', '--batch', action='store_true', help='Batch mode')
-    parser.add_argument('--min-pages', type=int, default=2,
-                        help='Minimum pages per section (default: 2)')
-    parser.add_argument('--merge-gap', type=int, default=5,
-                        help='Max page gap to merge sections (default: 5)')
+    parser.add_argument('--preset', choices=list(PRESETS), default=preset,
+                        help='Detection rules: agreement, or those of pdf_splitter_v2.py '
+                             '(enhanced) or pdf_splitter.py (original) (default: %(default)s)')
+    parser.add_argument('--pack', action='append', metavar='PATH',
+                        help='Pattern pack (.json/.toml) or folder of packs adding section '
+                             'patterns; batches reload edited packs (repeatable)')
+    parser.add_argument('--min-pages', type=int,
+                        help='Minimum pages per section (default: 2, or 1 with --granularity '
+                             'article; 1 with --preset original)')
+    parser.add_argument('--merge-gap', type=int,
+                        help='Max page gap to merge sections (default: 5; 3 enhanced, '
+                             '0 original)')
+    parser.add_argument('--granularity', choices=['section', 'article'], default='section',
+                        help='Split by major section or into one file per ARTICLE (default: section)')
+    parser.add_argument('--min-confidence', type=int,
+                        help='Lowest detection confidence accepted (default: 80; '
+                             '0 original)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Batch mode: skip work finished by a previous run')
+    parser.add_argument('--page-timeout', type=float,
+                        help='Seconds allowed to extract one page (default: no limit)')
+    parser.add_argument('--doc-timeout', type=float,
+                        help='Seconds allowed to scan one document (default: no limit)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Batch mode: share the input with other worker processes')
+    parser.add_argument('--worker-id', help='Worker name in lease files (default: host-pid)')
+    parser.add_argument('--lease-ttl', type=float, default=120.0,
+                        help='Seconds before a silent worker\'s lease expires (default: 120)')
+    parser.add_argument('--backend', default=AUTO, choices=[AUTO] + list(BACKENDS),
+                        help='PDF engine: auto uses pdfium when installed, where its '
+                             'detections match PyPDF2\'s (section granularity of the '
+                             'agreement and enhanced presets), else PyPDF2 (default: auto)')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='Batch mode: also search subfolders, starting on each PDF as found')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='Batch mode: only files matching GLOB (default: *.pdf; repeatable)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='Batch mode: skip files/folders matching GLOB, in addition to '
+                             '*_split and hidden ones (repeatable)')
+    parser.add_argument('--previous', metavar='DIR',
+                        help='Output folder of an earlier edition of the same agreement: '
+                             'only changed pages are scanned, unchanged sections are '
+                             'linked, and changes_report.txt lists what differs')
+    parser.add_argument('--largest-first', action='store_true',
+                        help='Batch mode: start with the documents with the most pages '
+                             'and log the schedule with predicted vs actual times')
+    parser.add_argument('--shard-pages', type=int, metavar='N',
+                        help='Scan documents longer than N pages in parallel shards of '
+                             'about N pages (default: off)')
+    parser.add_argument('--jobs', type=jobs_count, default=1, metavar='N',
+                        help='Batch mode: split up to N documents at once (auto: one per '
+                             'CPU), starting each only while memory allows (default: 1)')
+    parser.add_argument('--min-jobs', type=int, default=1, metavar='N',
+                        help='With --jobs: documents run at once even when memory is '
+                             'short (default: 1)')
+    parser.add_argument('--memory-reserve', type=int, metavar='MB',
+                        help='With --jobs: memory to keep free (default: 10%% of RAM, '
+                             'at least 512)')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Batch mode: split identical PDFs separately instead of '
+                             'linking the first copy\'s output')
+    parser.add_argument('--json', action='store_true',
+                        help='Also write analysis.json (sections, timings, output hashes)')
+    parser.add_argument('--ndjson', nargs='?', const='-', metavar='PATH',
+                        help='Stream one JSON result line per document to PATH '
+                             '(default: stdout); implies --json')
+    parser.add_argument('--progress', action='store_true',
+                        help='Show a live progress line (pages/sec, ETA)')
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help='Batch mode: keep Prometheus metrics in PATH (e.g. for the '
+                             'node_exporter textfile collector)')
+    parser.add_argument('--metrics-interval', type=float, default=metrics.DEFAULT_INTERVAL,
+                        metavar='SECONDS',
+                        help='Seconds between rewrites of --metrics-file (default: %(default)s)')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='Batch mode: serve Prometheus metrics on '
+                             'http://127.0.0.1:PORT/metrics')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
     
     args = parser.parse_args()
     
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     
-    if args.batch:
-        batch_process(args.input, args.output, args.min_pages, args.merge_gap)
+    progress = ConsoleProgress() if args.progress else None
+    if args.granularity == 'article' and splitter_class(args.preset).ARTICLE_PATTERNS is None:
+        parser.error(f"--preset {args.preset} has no article granularity")
+    packs = None
+    if args.pack:
+        try:
+            packs = load_packs(args.pack)
+        except PatternPackError as e:
+            parser.error(str(e))
+    
+    from discovery import DEFAULT_EXCLUDE
+    discovery = {'recursive': args.recursive, 'include': args.include,
+                 'exclude': DEFAULT_EXCLUDE + args.exclude,
+                 'largest_first': args.largest_first, 'shard_pages': args.shard_pages}
+    
+    if args.previous and (args.batch or args.input == '-'):
+        parser.error("--previous works on a single PDF file")
+    if args.jobs != 1 and (not args.batch or args.worker):
+        parser.error("--jobs works in batch mode without --worker (start more workers instead)")
+    
+    exporter = None
+    if args.metrics_file or args.metrics_port is not None:
+        if not args.batch:
+            parser.error("--metrics-file and --metrics-port need batch mode (-b)")
+        exporter = metrics.MetricsExporter(args.metrics_file, args.metrics_port,
+                                           args.metrics_interval)
+        try:
+            exporter.start()
+        except OSError as e:
+            parser.error(f"Cannot serve metrics on port {args.metrics_port}: {e}")
+    
+    if args.input == '-':
+        if args.batch:
+            parser.error("-b cannot read from stdin")
+        result = split_to_tar(sys.stdin.buffer.read(), sys.stdout.buffer, args.name,
+                              args.min_pages, args.merge_gap,
+                              json_output=args.json,
+                              page_timeout=args.page_timeout,
+                              doc_timeout=args.doc_timeout,
+                              progress=progress, min_confidence=args.min_confidence,
+                              granularity=args.granularity, backend=args.backend,
+                              shard_pages=args.shard_pages, preset=args.preset, packs=packs)
+        if not result['success']:
+            logger.error(f"Failed: {result.get('error')}")
+            exit(1)
+    elif args.batch:
+        try:
+            if args.worker:
+                worker_process(args.input, args.output, args.min_pages, args.merge_gap,
+                               worker_id=args.worker_id, lease_ttl=args.lease_ttl,
+                               page_timeout=args.page_timeout, doc_timeout=args.doc_timeout,
+                               progress=progress, min_confidence=args.min_confidence,
+                               granularity=args.granularity, json_output=args.json,
+                               ndjson=args.ndjson, backend=args.backend, preset=args.preset,
+                               packs=args.pack, **discovery)
+            else:
+                batch_process(args.input, args.output, args.min_pages, args.merge_gap,
+                              resume=args.resume, page_timeout=args.page_timeout,
+                              doc_timeout=args.doc_timeout, progress=progress,
+                              min_confidence=args.min_confidence,
+                              granularity=args.granularity, json_output=args.json,
+                              ndjson=args.ndjson, backend=args.backend,
+                              dedup=not args.no_dedup, preset=args.preset, packs=args.pack,
+                              jobs=args.jobs, min_jobs=args.min_jobs,
+                              memory_reserve=(args.memory_reserve * 1024 * 1024
+                                              if args.memory_reserve else None),
+                              **discovery)
+        finally:
+            if exporter is not None:
+                exporter.close()
     else:
-        splitter = AgreementSplitter(args.input, args.output, args.min_pages, args.merge_gap)
+        splitter = splitter_class(args.preset)(args.input, args.output, args.min_pages,
+                                               args.merge_gap,
+                                               page_timeout=args.page_timeout,
+                                               doc_timeout=args.doc_timeout,
+                                               progress=progress,
+                                               min_confidence=args.min_confidence,
+                                               granularity=args.granularity,
+                                               json_output=args.json or bool(args.ndjson),
+                                               backend=args.backend,
+                                               shard_pages=args.shard_pages,
+                                               previous_output=args.previous,
+                                               packs=packs)
         result = splitter.process()
         
+        if args.ndjson:
+            with NdjsonWriter(args.ndjson) as stream:
+                stream.write(result)
+            if args.ndjson == '-':
+                exit(0 if result['success'] else 1)
+        
         if result['success']:
             print(f"\n✓ Success! Created {result['files_created']} file(s)")
             print(f"  Output: {result['output_dir']}")
             print(f"  Report: {result['report_path']}")
+            if 'changes_path' in result:
+                print(f"  Changes: {result['changes_path']}")
         else:
             print(f"\n✗ Failed: {result.get('error')}")
             exit(1)
@@ -0,0 +1,226 @@
+"""
+Parameter sweep for the agreement splitter
+Scans each document once, then scores a grid of min_pages / merge_gap /
+confidence cutoff settings against labelled section boundaries
+"""
+
+import re
+import json
+import itertools
+import logging
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+from split_agreement import AgreementSplitter
+
+logger = logging.getLogger(__name__)
+
+# e.g. "TOC_p2-29.pdf", "Lettres_Entente_02_p80-95.pdf", "07_Signatures_p23-23.pdf"
+SPLIT_FILE_PATTERN = re.compile(
+    r'^(?:\d+_)?(?P<type>[A-Za-z_]+?)(?:_\d+)?_p(?P<start>\d+)-(?P<end>\d+)\.pdf$')
+
+
+def ground_truth_from_split_dirs(input_dir: str) -> Dict[str, List[Dict]]:
+    """
+    Derive expected sections from existing <name>_split folders
+
+    Returns:
+        {pdf file name: [{'type', 'start', 'end'}, ...]} with 1-based pages
+    """
+    truth = {}
+    for split_dir in sorted(Path(input_dir).glob("*_split")):
+        pdf_name = split_dir.name[:-len("_split")] + ".pdf"
+        sections = []
+        for f in sorted(split_dir.glob("*.pdf")):
+            match = SPLIT_FILE_PATTERN.match(f.name)
+            if not match or match.group('type') in ('Complete_Agreement', 'Front_Matter'):
+                continue
+            sections.append({
+                'type': match.group('type'),
+                'start': int(match.group('start')),
+                'end': int(match.group('end')),
+            })
+        truth[pdf_name] = sorted(sections, key=lambda s: s['start'])
+    return truth
+
+
+def load_ground_truth(path: str) -> Dict[str, List[Dict]]:
+    """Load a ground-truth JSON file (same layout as ground_truth_from_split_dirs)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def score(predicted: List[Dict], expected: List[Dict], tolerance: int = 0,
+          match_type: bool = True) -> Tuple[int, int, int]:
+    """
+    Match predicted section starts against expected ones
+
+    Returns:
+        (true positives, false positives, false negatives)
+    """
+    unmatched = list(expected)
+    tp = 0
+    for sec in predicted:
+        for exp in unmatched:
+            if abs(exp['start'] - sec['start']) <= tolerance and \
+                    (not match_type or exp['type'] == sec['type']):
+                unmatched.remove(exp)
+                tp += 1
+                break
+    return tp, len(predicted) - tp, len(unmatched)
+
+
+def predict(splitter: AgreementSplitter, detections: List[Dict], min_pages: int,
+            merge_gap: int, min_confidence: int) -> List[Dict]:
+    """Sections split_pdf() would write for one setting (1-based pages)"""
+    splitter.min_pages = min_pages
+    splitter.merge_threshold = merge_gap
+    markers = splitter.select_markers(detections, min_confidence)
+    predicted = []
+    for sec in splitter.build_sections(markers):
+        # Not detected boundaries: the whole document, or the pages before the first
+        if sec['type'] in ('Complete_Agreement', 'Front_Matter'):
+            continue
+        if sec['end_page'] - sec['start_page'] + 1 < min_pages:
+            continue
+        predicted.append({'type': sec['type'],
+                          'start': sec['start_page'] + 1,
+                          'end': sec['end_page'] + 1})
+    return predicted
+
+
+def run_sweep(pdfs: List[Path], truth: Dict[str, List[Dict]],
+              min_pages_grid: List[int], merge_gap_grid: List[int],
+              confidence_grid: List[int], tolerance: int = 0,
+              match_type: bool = True) -> List[Dict]:
+    """
+    Score every parameter combination over all labelled documents
+
+    Each document is scanned once; the grid only re-runs the grouping step.
+    Returns one dict per setting, best first.
+    """
+    scanned = []
+    for pdf in pdfs:
+        if pdf.name not in truth:
+            logger.info(f"No ground truth for {pdf.name}, skipping")
+            continue
+        splitter = AgreementSplitter(str(pdf), min_confidence=0)
+        splitter.find_all_sections()
+        scanned.append((pdf.name, splitter, list(splitter.detections)))
+
+    if not scanned:
+        logger.warning("No labelled documents to evaluate")
+        return []
+
+    # Grouping is cheap but chatty; keep the sweep output readable
+    logging.getLogger('split_agreement').setLevel(logging.WARNING)
+
+    results = []
+    for min_pages, merge_gap, min_confidence in itertools.product(
+            min_pages_grid, merge_gap_grid, confidence_grid):
+        tp = fp = fn = 0
+        for name, splitter, detections in scanned:
+            predicted = predict(splitter, detections, min_pages, merge_gap, min_confidence)
+            t, p, n = score(predicted, truth[name], tolerance, match_type)
+            tp, fp, fn = tp + t, fp + p, fn + n
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        results.append({
+            'min_pages': min_pages,
+            'merge_gap': merge_gap,
+            'min_confidence': min_confidence,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+            'tp': tp, 'fp': fp, 'fn': fn,
+        })
+
+    results.sort(key=lambda r: (r['f1'], r['precision'], -r['merge_gap']), reverse=True)
+    return results
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Tune splitter parameters against labelled section boundaries',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Build a ground-truth file from existing *_split folders, then edit it
+  python sweep.py ./Agreements --write-truth truth.json
+
+  # Evaluate the default grid
+  python sweep.py ./Agreements --truth truth.json
+
+  # Custom grid, allow boundaries to be off by one page
+  python sweep.py ./Agreements --truth truth.json --min-pages 1,2 --merge-gap 0,5,10 --tolerance 1
+        """
+    )
+
+    parser.add_argument('input', help='PDF file or directory of PDFs')
+    parser.add_argument('--truth', help='Ground-truth JSON (default: derive from *_split folders)')
+    parser.add_argument('--write-truth', metavar='PATH',
+                        help='Write ground truth derived from *_split folders and exit')
+    parser.add_argument('--min-pages', type=_int_list, default=[1, 2, 3, 5],
+                        help='Grid for minimum pages per section (default: 1,2,3,5)')
+    parser.add_argument('--merge-gap', type=_int_list, default=[0, 2, 5, 10, 20],
+                        help='Grid for merge gap (default: 0,2,5,10,20)')
+    parser.add_argument('--confidence', type=_int_list, default=[70, 75, 80, 85, 90],
+                        help='Grid for confidence cutoff (default: 70,75,80,85,90)')
+    parser.add_argument('--tolerance', type=int, default=0,
+                        help='Pages a boundary may be off and still match (default: 0)')
+    parser.add_argument('--ignore-type', action='store_true',
+                        help='Score boundaries only, not section types')
+    parser.add_argument('--top', type=int, default=10, help='Settings to show (default: 10)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
+
+    input_path = Path(args.input)
+    base_dir = input_path if input_path.is_dir() else input_path.parent
+
+    if args.write_truth:
+        truth = ground_truth_from_split_dirs(base_dir)
+        with open(args.write_truth, 'w', encoding='utf-8') as f:
+            json.dump(truth, f, indent=2, ensure_ascii=False)
+        print(f"Wrote ground truth for {len(truth)} document(s) to {args.write_truth}")
+        return
+
+    truth = load_ground_truth(args.truth) if args.truth else ground_truth_from_split_dirs(base_dir)
+    if input_path.is_dir():
+        pdfs = sorted(list(input_path.glob("*.pdf")) + list(input_path.glob("*.PDF")))
+    else:
+        pdfs = [input_path]
+
+    results = run_sweep(pdfs, truth, args.min_pages, args.merge_gap, args.confidence,
+                        args.tolerance, not args.ignore_type)
+    if not results:
+        exit(1)
+
+    print(f"\n{'min_pages':>9} {'merge_gap':>9} {'confidence':>10} "
+          f"{'precision':>9} {'recall':>7} {'f1':>6}")
+    for r in results[:args.top]:
+        print(f"{r['min_pages']:>9} {r['merge_gap']:>9} {r['min_confidence']:>10} "
+              f"{r['precision']:>9.2f} {r['recall']:>7.2f} {r['f1']:>6.2f}")
+
+    best = results[0]
+    print(f"\nBest: --min-pages {best['min_pages']} --merge-gap {best['merge_gap']} "
+          f"--min-confidence {best['min_confidence']} "
+          f"(precision {best['precision']:.2f}, recall {best['recall']:.2f})")
+
+
+if __name__ == '__main__':
+    main()
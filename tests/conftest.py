@@ -0,0 +1,41 @@
+"""
+Shared test setup: the repository root on sys.path and a small PDF writer
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+
+def write_text_pdf(path: Path, lines):
+    """One Helvetica line per page"""
+    from PyPDF2 import PageObject, PdfWriter
+    from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for line in lines:
+        page = PageObject.create_blank_page(None, 612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f'BT /F1 18 Tf 72 700 Td ({line}) Tj ET'.encode('latin-1'))
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+        })
+        page[NameObject('/Contents')] = writer._add_object(content)
+        writer.add_page(page)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+@pytest.fixture
+def text_pdf():
+    """write_text_pdf(path, lines): a PDF with one line of text per page"""
+    return write_text_pdf
@@ -0,0 +1,78 @@
+"""
+PDFium text is laid out like PyPDF2's, so the section patterns detect the
+same pages; 'auto' uses PDFium only where that holds
+"""
+
+import pytest
+
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from pdf_backend import AUTO, is_available, open_backend, resolve_backend
+from pdf_splitter import PDFSplitter
+from split_agreement import AgreementSplitter
+
+pytestmark = pytest.mark.skipif(not is_available('pdfium'), reason='needs pypdfium2')
+
+
+def drawn_pdf(path, pages):
+    """Pages of (x, y, size, text) runs, drawn in the given order"""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    }))
+    for runs in pages:
+        page = PageObject.create_blank_page(None, 612, 792)
+        content = DecodedStreamObject()
+        content.set_data(b' '.join(f'BT /F1 {size} Tf {x} {y} Td ({text}) Tj ET'.encode('latin-1')
+                                   for x, y, size, text in runs))
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): font})
+        })
+        page[NameObject('/Contents')] = writer._add_object(content)
+        writer.add_page(page)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+PAGES = [
+    # Running page number at the foot, drawn before the heading at the top
+    [(300, 30, 10, '84 85'), (72, 700, 14, 'ANNEXE B'), (72, 680, 12, 'Primes')],
+    [(300, 30, 10, '86 87'), (72, 700, 12, 'Texte'), (72, 680, 12, 'Suite')],
+    # Title set apart from the number, then a line further down
+    [(72, 700, 12, 'ANNEXE C -'), (300, 700, 12, 'GRIEFS'), (72, 680, 12, 'Texte')],
+]
+
+
+def test_pdfium_lines_follow_pypdf2(tmp_path):
+    drawn_pdf(tmp_path / 'a.pdf', PAGES)
+    reference = open_backend(str(tmp_path / 'a.pdf'), 'pypdf2')
+    pdfium = open_backend(str(tmp_path / 'a.pdf'), 'pdfium')
+    assert pdfium.page_text(0).split('\n')[:2] == ['84 85ANNEXE B', 'Primes']
+    for page in range(len(PAGES)):
+        assert [line.strip() for line in pdfium.page_text(page).split('\n')] == \
+            [line.strip() for line in reference.page_text(page).split('\n')]
+
+
+def test_pdfium_detections_match(tmp_path):
+    drawn_pdf(tmp_path / 'a.pdf', PAGES)
+    detections = {}
+    for backend in ('pypdf2', 'pdfium'):
+        splitter = AgreementSplitter(str(tmp_path / 'a.pdf'), backend=backend)
+        splitter.find_all_sections()
+        detections[backend] = [(d['page'], d['type'], d['confidence'])
+                               for d in splitter.detections]
+    assert detections['pdfium'] == detections['pypdf2']
+    assert detections['pypdf2']
+
+
+def test_auto_uses_pdfium_where_detections_match(tmp_path):
+    assert resolve_backend(AUTO) == 'pdfium'
+    assert resolve_backend(AUTO, pdfium_text=False) == 'pypdf2'
+    drawn_pdf(tmp_path / 'a.pdf', PAGES)
+    pdf = str(tmp_path / 'a.pdf')
+    assert AgreementSplitter(pdf).backend == 'pdfium'
+    assert AgreementSplitter(pdf, granularity='article').backend == 'pypdf2'
+    assert PDFSplitter(pdf).backend == 'pypdf2'
@@ -0,0 +1,53 @@
+"""
+The batch journal keeps finished documents on disk, not in memory; they are
+read back for resume and duplicate checks, also after workers appended
+"""
+
+from batch_checkpoint import BatchCheckpoint
+
+
+def finish(checkpoint, pdf, created):
+    checkpoint.start_document(pdf)
+    checkpoint.document_done(pdf, {'success': True, 'output_dir': str(pdf.parent),
+                                   'files_created': len(created),
+                                   'created_files': [str(p) for p in created],
+                                   'patterns_digest': 'p1'})
+
+
+def test_finished_documents_are_read_back(tmp_path):
+    pdfs = []
+    for i in range(3):
+        pdf = tmp_path / f'doc{i}.pdf'
+        pdf.write_bytes(b'%PDF' + bytes(i))
+        out = tmp_path / f'doc{i}_1-2.pdf'
+        out.write_bytes(b'x')
+        pdfs.append((pdf, out))
+
+    checkpoint = BatchCheckpoint(tmp_path / 'journal.jsonl')
+    for i, (pdf, out) in enumerate(pdfs):
+        finish(checkpoint, pdf, [out])
+        if i == 0:
+            # A worker appending to the same journal in between
+            worker = BatchCheckpoint.for_document(checkpoint.path, pdf)
+            worker.section_done(pdf, 'other.pdf')
+            worker.close()
+
+    assert checkpoint.documents == {}
+    for pdf, out in pdfs:
+        assert checkpoint.is_document_done(pdf, 'p1')
+        assert not checkpoint.is_document_done(pdf, 'p2')
+        result = checkpoint.finished_result(pdf)
+        assert result['created_files'] == [str(out)]
+        assert result['input_file'] == str(pdf) and result['resumed']
+    checkpoint.close()
+
+    resumed = BatchCheckpoint(tmp_path / 'journal.jsonl', resume=True)
+    assert set(resumed.documents) == {str(pdf) for pdf, _ in pdfs}
+    pdfs[1][1].unlink()
+    assert resumed.is_document_done(pdfs[0][0], 'p1')
+    assert not resumed.is_document_done(pdfs[1][0], 'p1')
+    # Split again in this run: the new record replaces the replayed one
+    finish(resumed, pdfs[1][0], [])
+    assert str(pdfs[1][0]) not in resumed.documents
+    assert resumed.finished_result(pdfs[1][0])['created_files'] == []
+    resumed.close()
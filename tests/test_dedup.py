@@ -0,0 +1,68 @@
+"""
+Identical inputs: only section PDFs are shared; reports and indexes of a
+duplicate are its own and name it
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from split_agreement import batch_process
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_duplicates_link_sections_only(tmp_path, jobs, text_pdf):
+    inputs = tmp_path / 'in'
+    inputs.mkdir()
+    text_pdf(inputs / 'a.pdf', ['ARTICLE 1', 'Texte', "LETTRE D'ENTENTE NO 1", 'Texte'])
+    for name in ('b.pdf', 'c.pdf'):
+        shutil.copy(inputs / 'a.pdf', inputs / name)
+    output = tmp_path / 'out'
+    results = batch_process(str(inputs), str(output), json_output=True, jobs=jobs)
+
+    by_name = {Path(r['input_file']).name: r for r in results}
+    assert all(r['success'] for r in results)
+    assert 'duplicate_of' not in by_name['a.pdf']
+    for name in ('b.pdf', 'c.pdf'):
+        result = by_name[name]
+        assert Path(result['duplicate_of']).name == 'a.pdf'
+        folder = output / f'{Path(name).stem}_split'
+        for created in result['created_files']:
+            assert os.path.samefile(created, output / 'a_split' / Path(created).name)
+        for small in ('analysis_report.txt', 'analysis.json', '.split_pages.json',
+                      'checksums.sha256'):
+            assert not os.path.samefile(folder / small, output / 'a_split' / small)
+        assert (folder / 'analysis_report.txt').read_text().startswith(
+            f'Document Analysis: {name}')
+        for index in ('analysis.json', '.split_pages.json'):
+            data = json.loads((folder / index).read_text(encoding='utf-8'))
+            assert Path(data['input_file']).name == name
+
+
+def _cancel_original(conn, pdf, options, journal, cancel_event):
+    """Worker stand-in: a.pdf is cancelled, its copies succeed"""
+    if pdf.name == 'a.pdf':
+        result = {'success': False, 'cancelled': True, 'error': 'Cancelled',
+                  'input_file': str(pdf)}
+    else:
+        result = {'success': True, 'input_file': str(pdf), 'created_files': []}
+    conn.send((result, {}))
+    conn.close()
+
+
+def test_copies_of_a_cancelled_original_are_split(tmp_path, monkeypatch, text_pdf):
+    import split_agreement
+
+    monkeypatch.setattr(split_agreement, '_split_in_worker', _cancel_original)
+    inputs = tmp_path / 'in'
+    inputs.mkdir()
+    text_pdf(inputs / 'a.pdf', ['ARTICLE 1', 'Texte'])
+    shutil.copy(inputs / 'a.pdf', inputs / 'b.pdf')
+    results = batch_process(str(inputs), str(tmp_path / 'out'), jobs=2)
+
+    by_name = {Path(r['input_file']).name: r for r in results}
+    assert by_name['a.pdf'].get('cancelled')
+    assert by_name['b.pdf']['success'] and 'duplicate_of' not in by_name['b.pdf']
@@ -0,0 +1,53 @@
+"""
+Recursive discovery yields PDFs depth first in name order as it walks,
+skipping output and hidden folders; a recursive batch mirrors the layout
+"""
+
+from pathlib import Path
+
+from discovery import iter_pdfs
+from split_agreement import batch_process
+
+
+def touch(root: Path, *names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'')
+
+
+def relative(root: Path, paths):
+    return [p.relative_to(root).as_posix() for p in paths]
+
+
+def test_iter_pdfs(tmp_path):
+    touch(tmp_path, 'b.pdf', 'A.PDF', 'notes.txt', '2019/x.pdf', '2019/old/y.pdf',
+          '2020/z.pdf', 'a_split/Annexe_p1-2.pdf', '.leases/l.pdf', '2020/draft/w.pdf')
+
+    assert relative(tmp_path, iter_pdfs(tmp_path)) == ['A.PDF', 'b.pdf']
+    assert relative(tmp_path, iter_pdfs(tmp_path, recursive=True)) == \
+        ['A.PDF', 'b.pdf', '2019/x.pdf', '2019/old/y.pdf', '2020/z.pdf', '2020/draft/w.pdf']
+    assert relative(tmp_path, iter_pdfs(tmp_path, recursive=True, include=['*.txt'])) == \
+        ['notes.txt']
+    assert relative(tmp_path, iter_pdfs(tmp_path, recursive=True,
+                                        exclude=['*_split', '.*', '2020/draft', 'a.pdf'])) == \
+        ['b.pdf', '2019/x.pdf', '2019/old/y.pdf', '2020/z.pdf']
+
+
+def test_iter_pdfs_streams(tmp_path):
+    touch(tmp_path, '1/a.pdf', '2/c.pdf')
+    found = iter_pdfs(tmp_path, recursive=True)
+    assert relative(tmp_path, [next(found)]) == ['1/a.pdf']
+    # Folders are listed when reached, not up front
+    touch(tmp_path, '2/b.pdf')
+    assert relative(tmp_path, found) == ['2/b.pdf', '2/c.pdf']
+
+
+def test_recursive_batch_mirrors_layout(tmp_path, text_pdf):
+    for name in ('2019/a.pdf', '2020/sub/b.pdf'):
+        (tmp_path / 'in' / name).parent.mkdir(parents=True, exist_ok=True)
+        text_pdf(tmp_path / 'in' / name, ['SECTION 1 - Objet', 'Texte', name])
+    results = batch_process(str(tmp_path / 'in'), str(tmp_path / 'out'), recursive=True)
+    assert len(results) == 2 and all(r['success'] for r in results)
+    assert relative(tmp_path / 'out', [Path(r['output_dir']) for r in results]) == \
+        ['2019/a_split', '2020/sub/b_split']
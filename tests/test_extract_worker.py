@@ -0,0 +1,47 @@
+"""
+Per-page budgets time the page only: starting the worker and opening the
+document count against the document budget
+"""
+
+import multiprocessing
+import time
+
+import pytest
+
+import pdf_backend
+from extract_worker import PageTimeout, SupervisedExtractor
+
+OPEN_SECONDS = 0.8
+
+# The slow open below reaches the worker only when it is forked
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason='needs forked extraction workers')
+
+
+@pytest.fixture
+def slow_open(monkeypatch):
+    real = pdf_backend.open_backend
+
+    def open_backend(source, name=pdf_backend.AUTO):
+        time.sleep(OPEN_SECONDS)
+        return real(source, name)
+
+    monkeypatch.setattr(pdf_backend, 'open_backend', open_backend)
+
+
+def test_slow_open_does_not_time_out_fast_pages(tmp_path, text_pdf, slow_open):
+    lines = [f'ARTICLE {i}' for i in range(1, 6)]
+    text_pdf(tmp_path / 'a.pdf', lines)
+    with SupervisedExtractor(tmp_path / 'a.pdf', page_timeout=OPEN_SECONDS / 2) as extractor:
+        texts = [extractor.extract(i) for i in range(len(lines))]
+    assert [text.strip() for text in texts] == lines
+
+
+def test_slow_open_counts_against_document_budget(tmp_path, text_pdf, slow_open):
+    text_pdf(tmp_path / 'a.pdf', ['ARTICLE 1', 'ARTICLE 2'])
+    with SupervisedExtractor(tmp_path / 'a.pdf', page_timeout=5,
+                             doc_timeout=OPEN_SECONDS / 2) as extractor:
+        with pytest.raises(PageTimeout, match='document budget'):
+            extractor.extract(0)
+        with pytest.raises(PageTimeout):
+            extractor.extract(1)
@@ -0,0 +1,55 @@
+"""
+The governor must see the memory of a worker's children and give up
+stopping a document after MAX_SHEDS tries
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import governor
+from governor import GovernedRunner, Job, MemoryGovernor, process_rss, tree_rss
+
+MB = 1024 * 1024
+
+
+def test_tree_rss_counts_children():
+    child = subprocess.Popen([sys.executable, '-c',
+                              'import sys, time; b = bytearray(200 * 1024 * 1024); '
+                              'print(1, flush=True); time.sleep(30)'],
+                             stdout=subprocess.PIPE)
+    try:
+        child.stdout.readline()
+        own = process_rss(child.pid)
+        assert own > 150 * MB
+        assert tree_rss(child.pid) >= own
+        assert tree_rss(governor.os.getpid()) >= process_rss(governor.os.getpid()) + own
+    finally:
+        child.kill()
+        child.wait()
+
+
+def _sleepy(conn, seconds, cancel_event):
+    time.sleep(seconds)
+    conn.send(seconds)
+    conn.close()
+
+
+class _Starved(MemoryGovernor):
+    """Always out of memory, but the host seems to have room to start jobs"""
+
+    def admit(self, job, running):
+        return len(running) < self.max_jobs
+
+    def overloaded(self, running):
+        return len(running) > self.min_jobs
+
+
+def test_shed_jobs_run_after_max_sheds():
+    runner = GovernedRunner(_Starved(max_jobs=2, min_jobs=1, reserve=0), _sleepy, interval=0.05)
+    jobs = [Job(Path(f'd{i}.pdf'), 0, 1, (0.3,)) for i in range(3)]
+    finished = list(runner.run(iter(jobs)))
+    assert sorted(job.key.name for job, _ in finished) == ['d0.pdf', 'd1.pdf', 'd2.pdf']
+    assert all(payload == 0.3 for _, payload in finished)
+    assert max(job.sheds for job in jobs) == governor.MAX_SHEDS
@@ -0,0 +1,90 @@
+"""
+Queued GUI jobs report log lines and progress through the message queue,
+stop when their cancel event is set, and finish with a summary status
+"""
+
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip('tkinter')
+from gui_splitter import PDFSplitterGUI, run_job
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte']
+
+
+def job(tmp_path, batch=False):
+    return {'id': 'job1', 'input': str(tmp_path / ('in' if batch else 'in/doc.pdf')),
+            'output': str(tmp_path / 'out'), 'batch': batch, 'min_pages': 1, 'merge_gap': 0}
+
+
+def drain(messages):
+    items = []
+    while not messages.empty():
+        items.append(messages.get())
+    return items
+
+
+@pytest.fixture(autouse=True)
+def root_logger():
+    """run_job takes over the root logger, as it does in its pool process"""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+@pytest.fixture
+def inputs(tmp_path, text_pdf):
+    (tmp_path / 'in').mkdir()
+    text_pdf(tmp_path / 'in' / 'doc.pdf', PAGES)
+    text_pdf(tmp_path / 'in' / 'other.pdf', PAGES)
+    return tmp_path
+
+
+def test_run_job(inputs):
+    messages = queue.Queue()
+    result = run_job(job(inputs), messages, threading.Event())
+    assert result == {'success': True, 'cancelled': False, 'documents': 1,
+                      'files_created': 2, 'error': None}
+    items = drain(messages)
+    assert {kind for kind, job_id, _ in items} == {'log', 'progress'}
+    assert all(job_id == 'job1' for _, job_id, _ in items)
+    assert [p for kind, _, p in items if kind == 'progress'][-1]['phase'] == 'done'
+
+
+def test_batch_job(inputs):
+    result = run_job(job(inputs, batch=True), queue.Queue(), threading.Event())
+    assert result['success'] and result['documents'] == 2 and result['files_created'] == 4
+
+
+def test_cancelled_job(inputs):
+    cancel = threading.Event()
+    cancel.set()
+    result = run_job(job(inputs), queue.Queue(), cancel)
+    assert result['cancelled'] and not result['success']
+    assert not list((inputs / 'out').glob('*.pdf'))
+
+
+def test_job_outcome():
+    def finished(result=None, error=None):
+        future = Future()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        return {'future': future}
+
+    done = {'success': True, 'cancelled': False, 'documents': 2, 'files_created': 5}
+    assert PDFSplitterGUI._job_outcome(finished(done)) == ('Done', '5 file(s) from 2 PDF(s)')
+    assert PDFSplitterGUI._job_outcome(finished(dict(done, cancelled=True)))[0] == 'Cancelled'
+    assert PDFSplitterGUI._job_outcome(finished(dict(done, success=False, error='bad'))) == \
+        ('Failed', 'bad')
+    assert PDFSplitterGUI._job_outcome(finished(error=OSError('gone'))) == ('Failed', 'gone')
+    cancelled = Future()
+    cancelled.cancel()
+    assert PDFSplitterGUI._job_outcome({'future': cancelled}) == ('Cancelled', '')
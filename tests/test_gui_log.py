@@ -0,0 +1,69 @@
+"""
+The GUI log handler appends queued records in bounded batches, keeps only
+the last lines in the widget and saves the complete log
+"""
+
+import logging
+
+import pytest
+
+pytest.importorskip('tkinter')
+from gui_splitter import TextHandler
+
+
+class FakeText:
+    """The parts of a Tk Text widget TextHandler uses (no display needed)"""
+
+    def __init__(self):
+        self.lines = []
+        self.timers = []
+        self.inserts = 0
+
+    def after(self, delay, callback):
+        self.timers.append(delay)
+
+    def configure(self, **options):
+        pass
+
+    def insert(self, index, chunk):
+        self.inserts += 1
+        self.lines.extend(chunk.splitlines())
+
+    def index(self, index):
+        # Text always ends with a newline: 'end-1c' is on the line after the last one
+        return f"{len(self.lines) + 1}.0"
+
+    def delete(self, start, end):
+        del self.lines[:int(end.split('.')[0]) - 1]
+
+    def see(self, index):
+        pass
+
+
+def test_batched_bounded_log(tmp_path):
+    widget = FakeText()
+    handler = TextHandler(widget, max_lines=50, flush_interval=100, max_batch=40)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log = logging.getLogger('test_gui_log')
+    log.propagate = False
+    log.addHandler(handler)
+    try:
+        for i in range(100):
+            log.warning(f"line {i}")
+        assert widget.lines == []   # nothing touches the widget from emit()
+
+        handler._flush()
+        assert widget.inserts == 1 and len(widget.lines) == 40
+        assert widget.timers[-1] == 1   # backlog: come back at once
+        handler._flush()
+        handler._flush()
+        assert widget.timers[-1] == 100
+        assert widget.lines == [f"line {i}" for i in range(50, 100)]
+
+        log.warning("after flush")
+        handler.save(tmp_path / 'log.txt')
+        saved = (tmp_path / 'log.txt').read_text(encoding='utf-8').splitlines()
+        assert saved == [f"line {i}" for i in range(100)] + ["after flush"]
+    finally:
+        log.removeHandler(handler)
+        handler.close()
@@ -0,0 +1,95 @@
+"""
+After one scan, changing the grouping options regroups the cached markers
+and Split writes them, without extracting any page again
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('tkinter')
+import pdf_backend
+from gui_splitter import PDFSplitterGUI
+from split_agreement import AgreementSplitter
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'Texte', 'ANNEXE A - Primes', 'SECTION 2 - Fin', 'Texte']
+
+
+class Var:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakeTree:
+    def __init__(self):
+        self.rows = []
+
+    def get_children(self):
+        return list(range(len(self.rows)))
+
+    def delete(self, *items):
+        self.rows = []
+
+    def insert(self, parent, index, values):
+        self.rows.append(values)
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    pages = []
+    original = pdf_backend.PyPDF2Backend.page_text
+    monkeypatch.setattr(pdf_backend.PyPDF2Backend, 'page_text',
+                        lambda self, i: pages.append(i) or original(self, i))
+    return pages
+
+
+def test_preview_regroups_cached_scan(tmp_path, text_pdf, extracted):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    gui = PDFSplitterGUI.__new__(PDFSplitterGUI)
+    gui.input_path = Var(str(tmp_path / 'doc.pdf'))
+    gui.batch_mode = Var(False)
+    gui.min_pages = Var(1)
+    gui.merge_gap = Var(0)
+    gui.status_text = Var('')
+    gui.preview = FakeTree()
+
+    splitter = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'), backend='pypdf2')
+    markers = splitter.find_all_sections()
+    scanned = len(extracted)
+    gui._store_scan(gui._scan_key(gui.input_path.get()), splitter, markers)
+    assert [row[0] for row in gui.preview.rows] == ['Articles', 'Annexe', 'Articles']
+
+    gui.min_pages.set(2)
+    gui.refresh_preview()
+    assert [row[0] for row in gui.preview.rows] == ['Articles', '(Annexe)', 'Articles']
+    assert gui.status_text.get().startswith('3 section(s), 2 file(s)')
+
+    assert len(extracted) == scanned
+
+    # Writing reuses the markers (what Split does with a cached scan)
+    result = splitter.process(markers)
+    assert result['success'] and result['files_created'] == 2
+    assert len(extracted) == scanned
+
+
+def test_replaced_file_is_not_previewed(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    gui = PDFSplitterGUI.__new__(PDFSplitterGUI)
+    gui.input_path = Var(str(tmp_path / 'doc.pdf'))
+    gui.batch_mode = Var(False)
+    gui._scan = (gui._scan_key(gui.input_path.get()), None, [])
+    assert gui._cached_scan() is gui._scan
+
+    text_pdf(tmp_path / 'doc.pdf', PAGES[:2])
+    stat = os.stat(tmp_path / 'doc.pdf')
+    os.utime(tmp_path / 'doc.pdf', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert gui._cached_scan() is None
+    gui.batch_mode.set(True)
+    gui._scan = (gui._scan_key(gui.input_path.get()), None, [])
+    assert gui._cached_scan() is None
@@ -0,0 +1,43 @@
+"""
+Import budget of split_agreement: --help, argument errors and no-op runs
+must not pay for PDF libraries, process pools or the HTTP server
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+# Cumulative -X importtime of split_agreement, in microseconds (README: "well
+# under 100 ms"); the best of a few runs, so a busy machine does not fail it
+BUDGET_US = 100000
+RUNS = 5
+# Imported where they are used, never at module level
+DEFERRED = ('PyPDF2', 'pikepdf', 'pypdfium2', 'psutil', 'argparse', 'tarfile',
+            'multiprocessing', 'http.server', 'tempfile', 'work_queue', 'governor',
+            'shared_writer', 'extract_worker')
+
+
+def _python(*args):
+    # Bytecode must be written, or every run measures compiling the sources
+    env = {k: v for k, v in os.environ.items() if k != 'PYTHONDONTWRITEBYTECODE'}
+    return subprocess.run([sys.executable] + list(args), cwd=str(REPO), env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def test_import_time_budget():
+    _python('-c', 'import split_agreement')
+    timings = []
+    for _ in range(RUNS):
+        lines = _python('-X', 'importtime', '-c', 'import split_agreement').stderr.splitlines()
+        last = [line for line in lines if line.rstrip().endswith('| split_agreement')][-1]
+        timings.append(int(last.split('|')[1]))
+    assert min(timings) < BUDGET_US, f"import split_agreement took {min(timings) / 1000:.0f} ms"
+
+
+def test_heavy_modules_are_deferred():
+    loaded = _python('-c', 'import sys, split_agreement; print(" ".join(sys.modules))')
+    modules = set(loaded.stdout.split())
+    assert not [name for name in DEFERRED if name in modules]
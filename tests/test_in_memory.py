@@ -0,0 +1,42 @@
+"""
+split_in_memory takes a PDF as bytes or a file object and returns each
+section PDF as bytes, writing nothing to disk
+"""
+
+import io
+
+from PyPDF2 import PdfReader
+
+from split_agreement import split_in_memory
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte', 'Texte']
+
+
+def test_split_in_memory(tmp_path, text_pdf, monkeypatch):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    data = (tmp_path / 'doc.pdf').read_bytes()
+    work = tmp_path / 'work'
+    work.mkdir()
+    monkeypatch.chdir(work)
+
+    result = split_in_memory(data, name='contract.pdf')
+    assert result['success'] and result['input_file'] == 'contract.pdf'
+    assert [(s['type'], s['start_page'], s['end_page']) for s in result['sections']] == \
+        [('Articles', 0, 1), ('Annexe', 2, 4)]
+    for sec in result['sections']:
+        pages = PdfReader(io.BytesIO(sec['data'])).pages
+        assert len(pages) == sec['end_page'] - sec['start_page'] + 1
+        assert pages[0].extract_text().strip() == PAGES[sec['start_page']]
+    assert 'Document Analysis: contract.pdf' in result['report']
+
+    # A file object gives the same sections
+    again = split_in_memory(io.BytesIO(data))
+    assert [s['data'] for s in again['sections']] == [s['data'] for s in result['sections']]
+
+    assert list(work.iterdir()) == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['doc.pdf', 'work']
+
+
+def test_not_a_pdf():
+    result = split_in_memory(b'not a pdf')
+    assert not result['success'] and result['error']
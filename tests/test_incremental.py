@@ -0,0 +1,124 @@
+"""
+Incremental re-splitting (--previous) must notice pages whose drawing
+operators are unchanged but whose resources (scanned images) or annotations
+differ; fingerprints are only computed, and the index only rewritten, when needed
+"""
+
+import os
+from pathlib import Path
+
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DecodedStreamObject, DictionaryObject, NameObject,
+                            NumberObject, TextStringObject)
+
+import pdf_backend
+from incremental import PAGE_INDEX_NAME
+from pdf_backend import open_backend
+from split_agreement import AgreementSplitter, split_in_memory
+
+
+def scanned_pdf(path: Path, shade: int, pages: int = 4):
+    """Pages that only draw /Im0 over the whole page, /Im0 filled with shade"""
+    writer = PdfWriter()
+    for _ in range(pages):
+        page = PageObject.create_blank_page(None, 612, 792)
+        image = DecodedStreamObject()
+        image.set_data(bytes([shade]) * 64)
+        image.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Image'),
+            NameObject('/Width'): NumberObject(8),
+            NameObject('/Height'): NumberObject(8),
+            NameObject('/ColorSpace'): NameObject('/DeviceGray'),
+            NameObject('/BitsPerComponent'): NumberObject(8),
+        })
+        content = DecodedStreamObject()
+        content.set_data(b'q 612 0 0 792 0 0 cm /Im0 Do Q')
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/XObject'): DictionaryObject({NameObject('/Im0'): writer._add_object(image)})
+        })
+        page[NameObject('/Contents')] = writer._add_object(content)
+        writer.add_page(page)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def test_fingerprint_covers_images(tmp_path):
+    scanned_pdf(tmp_path / 'old.pdf', 0x20)
+    scanned_pdf(tmp_path / 'new.pdf', 0xE0)
+    old = open_backend(str(tmp_path / 'old.pdf'), 'pypdf2')
+    new = open_backend(str(tmp_path / 'new.pdf'), 'pypdf2')
+    assert [old.page_fingerprint(i) for i in range(4)] != \
+        [new.page_fingerprint(i) for i in range(4)]
+    again = open_backend(str(tmp_path / 'old.pdf'), 'pypdf2')
+    assert [old.page_fingerprint(i) for i in range(4)] == \
+        [again.page_fingerprint(i) for i in range(4)]
+
+
+def test_previous_edition_with_new_images_is_rewritten(tmp_path):
+    scanned_pdf(tmp_path / 'old.pdf', 0x20)
+    scanned_pdf(tmp_path / 'new.pdf', 0xE0)
+    first = AgreementSplitter(str(tmp_path / 'old.pdf'), str(tmp_path / 'out1')).process()
+    assert first['success']
+
+    second = AgreementSplitter(str(tmp_path / 'new.pdf'), str(tmp_path / 'out2'),
+                               previous_output=str(tmp_path / 'out1')).process()
+    assert second['success']
+    assert second['pages_rescanned'] == 4
+    assert second['files_unchanged'] == 0
+    for created in second['created_files']:
+        old_file = tmp_path / 'out1' / Path(created).name
+        assert not (old_file.exists() and os.path.samefile(created, old_file))
+        assert Path(created).read_bytes() != old_file.read_bytes()
+
+
+def annotated_pdf(source: Path, path: Path, note: str):
+    """Copy of source with a text note on the first page"""
+    writer = PdfWriter()
+    for page in PdfReader(str(source)).pages:
+        writer.add_page(page)
+    annot = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Annot'),
+        NameObject('/Subtype'): NameObject('/Text'),
+        NameObject('/Rect'): ArrayObject([NumberObject(v) for v in (72, 72, 92, 92)]),
+        NameObject('/Contents'): TextStringObject(note),
+        NameObject('/P'): writer.pages[0].indirect_reference,
+    }))
+    writer.pages[0][NameObject('/Annots')] = ArrayObject([annot])
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def test_fingerprint_covers_annotations(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'plain.pdf', ['SECTION 1', 'Texte'])
+    annotated_pdf(tmp_path / 'plain.pdf', tmp_path / 'a.pdf', 'first note')
+    annotated_pdf(tmp_path / 'plain.pdf', tmp_path / 'b.pdf', 'second note')
+    prints = [[open_backend(str(tmp_path / name), 'pypdf2').page_fingerprint(i) for i in range(2)]
+              for name in ('plain.pdf', 'a.pdf', 'b.pdf')]
+    assert len({p[0] for p in prints}) == 3
+    # The note points back at its page; other pages are not affected
+    assert len({p[1] for p in prints}) == 1
+
+
+def test_fingerprints_only_when_needed(tmp_path, text_pdf, monkeypatch):
+    text_pdf(tmp_path / 'doc.pdf', ['SECTION 1', 'Texte', 'SECTION 2', 'Texte'])
+    calls = []
+    original = pdf_backend.PyPDF2Backend.page_fingerprint
+    monkeypatch.setattr(pdf_backend.PyPDF2Backend, 'page_fingerprint',
+                        lambda self, i: calls.append(i) or original(self, i))
+    assert split_in_memory((tmp_path / 'doc.pdf').read_bytes(), min_pages=1)['success']
+    assert calls == []
+    assert AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'),
+                             min_pages=1).process()['success']
+    assert sorted(calls) == [0, 1, 2, 3]
+
+
+def test_unchanged_page_index_is_kept(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', ['SECTION 1', 'Texte', 'SECTION 2', 'Texte'])
+    index = tmp_path / 'out' / PAGE_INDEX_NAME
+    AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'), min_pages=1).process()
+    before = index.stat()
+    AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'), min_pages=1).process()
+    after = index.stat()
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
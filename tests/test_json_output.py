@@ -0,0 +1,44 @@
+"""
+analysis.json describes each document's sections with output hashes, and a
+batch with ndjson streams one JSON line per document instead of keeping results
+"""
+
+import json
+from pathlib import Path
+
+from json_output import ANALYSIS_NAME, file_sha256
+from split_agreement import AgreementSplitter, batch_process
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte']
+
+
+def test_analysis_json(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    result = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'),
+                               json_output=True).process()
+    assert result['success']
+    analysis = json.loads((tmp_path / 'out' / ANALYSIS_NAME).read_text(encoding='utf-8'))
+    assert analysis == result['analysis']
+    assert analysis['total_pages'] == 4
+    assert [(s['type'], s['start_page'], s['end_page']) for s in analysis['sections']] == \
+        [('Articles', 1, 2), ('Annexe', 3, 4)]
+    for sec in analysis['sections']:
+        path = tmp_path / 'out' / sec['file']
+        assert sec['sha256'] == file_sha256(path) and sec['bytes'] == path.stat().st_size
+    assert [d['page'] for d in analysis['detections']] == [1, 3]
+
+
+def test_batch_ndjson(tmp_path, text_pdf):
+    (tmp_path / 'in').mkdir()
+    for name in ('a.pdf', 'b.pdf'):
+        text_pdf(tmp_path / 'in' / name, PAGES + [name])
+    stream = tmp_path / 'results.ndjson'
+    results = batch_process(str(tmp_path / 'in'), str(tmp_path / 'out'), ndjson=str(stream))
+    assert results == []
+
+    records = [json.loads(line) for line in stream.read_text(encoding='utf-8').splitlines()]
+    assert sorted(Path(r['input_file']).name for r in records) == ['a.pdf', 'b.pdf']
+    assert all(r['success'] and r['files_created'] == 2 for r in records)
+    # ndjson implies analysis.json, included in each line
+    assert all(r['analysis']['sections'] for r in records)
+    assert all((tmp_path / 'out' / f'{name}_split' / ANALYSIS_NAME).exists() for name in 'ab')
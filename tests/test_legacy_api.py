@@ -0,0 +1,52 @@
+"""
+The methods PDFSplitter and PDFSplitterV2 had before they became presets
+still work, with a DeprecationWarning, through the cascade and the backend
+"""
+
+import warnings
+
+import pytest
+
+from pdf_splitter import PDFSplitter
+from pdf_splitter_v2 import PDFSplitterV2
+
+
+def test_pdf_splitter_wrappers(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', ['Texte', 'ANNEXE B'])
+    splitter = PDFSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'))
+
+    with pytest.deprecated_call():
+        text = splitter.extract_text_from_page(1)
+    assert text.strip() == 'ANNEXE B'
+    with pytest.deprecated_call():
+        page_text = splitter.extract_text_from_page(splitter.reader.pages[0])
+    assert page_text.strip() == 'TEXTE'
+
+    with pytest.deprecated_call():
+        assert splitter.detect_section('Texte\nVoir annexe B') == ('Annexe', 100)
+    with pytest.deprecated_call():
+        assert splitter.detect_section('Texte') is None
+    # The current two-argument form does not warn
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert splitter.detect_section('ANNEXE B', 1)[:2] == ('Annexe', 100)
+
+
+def test_pdf_splitter_v2_wrappers(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', ['Texte', 'ANNEXE B - Primes'])
+    splitter = PDFSplitterV2(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'))
+
+    with pytest.deprecated_call():
+        assert splitter.extract_text_from_page(1).strip() == 'ANNEXE B - Primes'
+    with pytest.deprecated_call():
+        assert splitter.get_first_significant_lines('12\n\nANNEXE B -\nSuite', 3) == \
+            ['ANNEXE B -', 'Suite']
+    with pytest.deprecated_call():
+        assert splitter.detect_major_section('ANNEXE B - Primes', 1) == \
+            splitter.detect_section('ANNEXE B - Primes', 1)
+
+    sections = [{'type': 'Annexe', 'start_page': 0, 'end_page': 0, 'confidence': 90},
+                {'type': 'Annexe', 'start_page': 2, 'end_page': 4, 'confidence': 80}]
+    with pytest.deprecated_call():
+        merged = splitter.merge_similar_sections(sections)
+    assert [(s['start_page'], s['end_page'], s['confidence']) for s in merged] == [(0, 4, 90)]
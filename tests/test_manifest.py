@@ -0,0 +1,48 @@
+"""
+A re-run leaves byte-identical section files untouched, removes sections
+no longer produced and keeps checksums.sha256 current
+"""
+
+import hashlib
+
+from manifest import MANIFEST_NAME, write_if_changed
+from split_agreement import AgreementSplitter
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte']
+
+
+def snapshot(folder):
+    return {p.name: (p.stat().st_ino, p.stat().st_mtime_ns) for p in folder.iterdir()}
+
+
+def test_write_if_changed(tmp_path):
+    path = tmp_path / 'f.bin'
+    assert write_if_changed(path, b'abc')
+    before = path.stat()
+    assert not write_if_changed(path, b'abc')
+    assert path.stat().st_ino == before.st_ino
+    assert write_if_changed(path, b'abd') and path.read_bytes() == b'abd'
+
+
+def test_rerun_keeps_unchanged_sections(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    out = tmp_path / 'out'
+    first = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(out)).process()
+    assert first['files_created'] == 2 and first['files_unchanged'] == 0
+    manifest = (out / MANIFEST_NAME).read_text(encoding='utf-8').splitlines()
+    assert manifest == [f"{hashlib.sha256((out / name).read_bytes()).hexdigest()}  {name}"
+                        for name in ('Articles_p1-2.pdf', 'Annexe_p3-4.pdf')]
+
+    before = snapshot(out)
+    second = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(out)).process()
+    assert second['files_unchanged'] == 2
+    assert snapshot(out) == before
+
+    # A page inserted: new files, the old ones are stale and removed
+    text_pdf(tmp_path / 'doc.pdf', PAGES[:2] + ['Texte'] + PAGES[2:])
+    third = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(out)).process()
+    assert third['files_created'] == 2 and third['files_unchanged'] == 0
+    assert sorted(p.name for p in out.glob('*.pdf')) == ['Annexe_p4-5.pdf', 'Articles_p1-3.pdf']
+    assert [line.split('  ')[1] for line in
+            (out / MANIFEST_NAME).read_text(encoding='utf-8').splitlines()] == \
+        ['Articles_p1-3.pdf', 'Annexe_p4-5.pdf']
@@ -0,0 +1,76 @@
+"""
+Metrics render in the Prometheus text format, merge across processes, count
+a batch's documents and pages, and are published to a file and over HTTP
+"""
+
+import urllib.request
+
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram, MetricsExporter, Registry
+from split_agreement import batch_process
+
+
+@pytest.fixture
+def registry():
+    metrics.REGISTRY.reset()
+    yield metrics.REGISTRY
+    metrics.REGISTRY.reset()
+
+
+def test_render_and_merge():
+    registry = Registry()
+    docs = registry.register(Counter('docs_total', 'Documents', ['status']))
+    depth = registry.register(Gauge('depth', 'Queue depth'))
+    seconds = registry.register(Histogram('seconds', 'Time', buckets=(0.1, 1)))
+    docs.inc(status='ok')
+    docs.inc(2, status='failed "x"')
+    depth.set(3)
+    seconds.observe(0.05)
+    seconds.observe(0.5)
+    with pytest.raises(ValueError):
+        docs.inc(kind='ok')
+
+    text = registry.render()
+    assert '# TYPE docs_total counter' in text
+    assert 'docs_total{status="failed \\"x\\""} 2' in text
+    assert 'depth 3' in text
+    assert 'seconds_bucket{le="0.1"} 1' in text and 'seconds_bucket{le="+Inf"} 2' in text
+    assert 'seconds_sum 0.55' in text and 'seconds_count 2' in text
+
+    # A worker process's counts are added to the parent's
+    other = Registry()
+    other.register(Counter('docs_total', 'Documents', ['status'])).inc(status='ok')
+    other.register(Histogram('seconds', 'Time', buckets=(0.1, 1))).observe(2)
+    registry.merge(other.snapshot())
+    assert docs.value(status='ok') == 2
+    assert 'seconds_count 3' in registry.render()
+
+
+def test_batch_metrics(tmp_path, text_pdf, registry):
+    (tmp_path / 'in').mkdir()
+    for name in ('a.pdf', 'b.pdf'):
+        text_pdf(tmp_path / 'in' / name, ['SECTION 1 - Objet', 'Texte', name])
+    (tmp_path / 'in' / 'broken.pdf').write_bytes(b'not a pdf')
+    batch_process(str(tmp_path / 'in'), str(tmp_path / 'out'))
+
+    assert metrics.DOCUMENTS.value(status='success') == 2
+    assert metrics.DOCUMENTS.value(status='failed') == 1
+    assert metrics.PAGES.value() == 6
+    assert metrics.BYTES_WRITTEN.value() == sum(
+        p.stat().st_size for p in (tmp_path / 'out').rglob('*_p*.pdf'))
+
+
+def test_exporter(tmp_path, registry):
+    metrics.PAGES.inc(5)
+    path = tmp_path / 'split.prom'
+    with MetricsExporter(str(path), port=0, interval=60) as exporter:
+        assert 'split_pages_total 5' in path.read_text(encoding='utf-8')
+        metrics.PAGES.inc()
+        with urllib.request.urlopen(f'http://127.0.0.1:{exporter.port}/metrics') as response:
+            assert response.headers['Content-Type'] == metrics.CONTENT_TYPE
+            assert 'split_pages_total 6' in response.read().decode('utf-8')
+        metrics.PAGES.inc()
+    # Final values are left in the file
+    assert 'split_pages_total 7' in path.read_text(encoding='utf-8')
@@ -0,0 +1,68 @@
+"""
+Image-only and blank pages are recognised from their content stream and
+resources, and the splitter reports them without extracting their text
+"""
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+import pdf_backend
+from page_classifier import BLANK, IMAGE, TEXT, classify_page
+from split_agreement import AgreementSplitter
+
+
+def add_image_page(writer: PdfWriter):
+    """A page that only draws an 8x8 grey image over itself"""
+    page = PageObject.create_blank_page(None, 612, 792)
+    image = DecodedStreamObject()
+    image.set_data(bytes([0x80]) * 64)
+    image.update({
+        NameObject('/Type'): NameObject('/XObject'),
+        NameObject('/Subtype'): NameObject('/Image'),
+        NameObject('/Width'): NumberObject(8),
+        NameObject('/Height'): NumberObject(8),
+        NameObject('/ColorSpace'): NameObject('/DeviceGray'),
+        NameObject('/BitsPerComponent'): NumberObject(8),
+    })
+    content = DecodedStreamObject()
+    content.set_data(b'q 612 0 0 792 0 0 cm /Im0 Do Q')
+    page[NameObject('/Resources')] = DictionaryObject({
+        NameObject('/XObject'): DictionaryObject({NameObject('/Im0'): writer._add_object(image)})
+    })
+    page[NameObject('/Contents')] = writer._add_object(content)
+    writer.add_page(page)
+
+
+def mixed_pdf(tmp_path, text_pdf):
+    """Pages: a section heading, a scanned image, blank, an annexe heading"""
+    text_pdf(tmp_path / 'text.pdf', ['SECTION 1 - Objet', 'ANNEXE A - Primes'])
+    text_pages = PdfReader(str(tmp_path / 'text.pdf')).pages
+    writer = PdfWriter()
+    writer.add_page(text_pages[0])
+    add_image_page(writer)
+    writer.add_blank_page(612, 792)
+    writer.add_page(text_pages[1])
+    with open(tmp_path / 'mixed.pdf', 'wb') as f:
+        writer.write(f)
+    return tmp_path / 'mixed.pdf'
+
+
+def test_classify_page(tmp_path, text_pdf):
+    pages = PdfReader(str(mixed_pdf(tmp_path, text_pdf))).pages
+    assert [classify_page(page) for page in pages] == [TEXT, IMAGE, BLANK, TEXT]
+
+
+def test_scan_skips_image_and_blank_pages(tmp_path, text_pdf, monkeypatch):
+    pdf = mixed_pdf(tmp_path, text_pdf)
+    extracted = []
+    original = pdf_backend.PyPDF2Backend.page_text
+    monkeypatch.setattr(pdf_backend.PyPDF2Backend, 'page_text',
+                        lambda self, i: extracted.append(i) or original(self, i))
+
+    splitter = AgreementSplitter(str(pdf), str(tmp_path / 'out'), min_pages=1, backend='pypdf2')
+    markers = splitter.find_all_sections()
+    assert extracted == [0, 3]
+    assert [m['page'] for m in markers] == [0, 3]
+    assert splitter.page_kinds == {TEXT: 2, IMAGE: 1, BLANK: 1}
+    assert splitter.image_pages == [1]
+    assert 'Needs OCR: pages 2' in splitter.create_report(splitter.build_sections(markers))
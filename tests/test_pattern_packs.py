@@ -0,0 +1,87 @@
+"""
+Pattern packs add section types from JSON/TOML files, are validated with a
+precise error, parsed once per content, and reloaded when edited
+"""
+
+import os
+import re
+import json
+
+import pytest
+
+import pattern_packs
+from pattern_packs import PackWatcher, PatternPackError, load_pack, load_packs
+from split_agreement import AgreementSplitter
+
+PACK = {
+    'name': 'cupe',
+    'patterns': {'Protocole': [['^PROTOCOLE\\s+D\'ACCORD', 95]]},
+}
+
+
+def write_pack(path, spec):
+    path.write_text(json.dumps(spec), encoding='utf-8')
+    return path
+
+
+def test_pack_adds_section_type(tmp_path, text_pdf):
+    packs = load_packs([write_pack(tmp_path / 'cupe.json', PACK)])
+    text_pdf(tmp_path / 'doc.pdf', ['SECTION 1 - Objet', 'Texte', "PROTOCOLE D'ACCORD", 'Texte'])
+    splitter = AgreementSplitter(str(tmp_path / 'doc.pdf'), packs=packs)
+    assert [(m['page'], m['type']) for m in splitter.find_all_sections()] == \
+        [(0, 'Articles'), (2, 'Protocole')]
+    assert splitter.patterns_digest() != AgreementSplitter.digest_for()
+
+    replacing = load_packs([write_pack(tmp_path / 'only.json', dict(PACK, replace=True))])
+    assert list(replacing.apply(AgreementSplitter.PATTERNS)) == ['Protocole']
+
+
+def test_toml_pack(tmp_path):
+    pytest.importorskip('tomllib')
+    (tmp_path / 'p.toml').write_text(
+        'name = "toml"\n[patterns]\nAvenant = [["^AVENANT\\\\s+\\\\d+", 90]]\n', encoding='utf-8')
+    assert load_pack(tmp_path / 'p.toml').patterns == {'Avenant': [('^AVENANT\\s+\\d+', 90)]}
+
+
+@pytest.mark.parametrize('spec, message', [
+    ({'patterns': {'Bad Type': [['X', 90]]}}, 'patterns.Bad Type'),
+    ({'patterns': {'T': [['(', 90]]}}, 'invalid regex'),
+    ({'patterns': {'T': [['X', 101]]}}, 'confidence must be 0-100'),
+    ({'patterns': {'T': [['X', 90]]}, 'extra': 1}, 'unknown key(s) extra'),
+    ({'name': 'empty'}, "no 'patterns'"),
+])
+def test_invalid_packs(tmp_path, spec, message):
+    with pytest.raises(PatternPackError, match=re.escape(message)):
+        load_pack(write_pack(tmp_path / 'bad.json', spec))
+
+
+def test_parsed_once_per_content(tmp_path, monkeypatch):
+    parsed = []
+    original = pattern_packs._parse
+    monkeypatch.setattr(pattern_packs, '_parse',
+                        lambda path, data: parsed.append(path.name) or original(path, data))
+    spec = dict(PACK, name='cached-once')
+    first = load_pack(write_pack(tmp_path / 'a.json', spec))
+    second = load_pack(write_pack(tmp_path / 'b.json', spec))
+    assert parsed == ['a.json'] and first.digest == second.digest
+
+
+def test_watcher_reloads_edited_pack(tmp_path):
+    path = write_pack(tmp_path / 'cupe.json', PACK)
+    watcher = PackWatcher([tmp_path], interval=0)
+    before = watcher.packs.digest
+    assert not watcher.poll()
+
+    def edit(spec):
+        write_pack(path, spec)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    # An edit that does not validate keeps the packs in use
+    edit({'patterns': {'T': [['(', 90]]}})
+    assert not watcher.poll() and watcher.packs.digest == before
+
+    edit(dict(PACK, patterns={'Protocole': [['^PROTOCOLE', 90]]}))
+    assert watcher.poll() and watcher.reloads == 1
+    assert watcher.packs.digest != before
+    assert watcher.packs.packs[0].patterns == {'Protocole': [('^PROTOCOLE', 90)]}
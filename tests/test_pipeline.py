@@ -0,0 +1,62 @@
+"""
+With - as input the CLI reads the PDF from stdin and writes a tar stream of
+the report and section PDFs to stdout, logging only to stderr
+"""
+
+import io
+import sys
+import json
+import tarfile
+import subprocess
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+
+from split_agreement import split_to_tar
+
+REPO = Path(__file__).resolve().parent.parent
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte']
+
+
+class WriteOnly:
+    """A pipe: no seek() or tell()"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+
+def test_split_to_tar(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    stream = WriteOnly()
+    result = split_to_tar((tmp_path / 'doc.pdf').read_bytes(), stream, 'doc.pdf',
+                          json_output=True)
+    assert result['success'] and result['files_created'] == 2
+
+    with tarfile.open(fileobj=io.BytesIO(stream.buffer.getvalue())) as tar:
+        names = tar.getnames()
+        assert names == ['analysis_report.txt'] + result['created_files'] + ['analysis.json']
+        analysis = json.load(tar.extractfile('analysis.json'))
+        for sec in analysis['sections']:
+            pdf = PdfReader(io.BytesIO(tar.extractfile(sec['file']).read()))
+            assert len(pdf.pages) == sec['pages']
+
+
+def test_cli_stdin_to_stdout(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    done = subprocess.run([sys.executable, str(REPO / 'split_agreement.py'), '-',
+                           '--name', 'contract.pdf'],
+                          input=(tmp_path / 'doc.pdf').read_bytes(), capture_output=True,
+                          cwd=str(tmp_path), timeout=120)
+    assert done.returncode == 0, done.stderr.decode(errors='replace')
+    with tarfile.open(fileobj=io.BytesIO(done.stdout)) as tar:
+        assert len(tar.getnames()) == 3
+        report = tar.extractfile('analysis_report.txt').read().decode('utf-8')
+    assert 'contract.pdf' in report
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['doc.pdf']
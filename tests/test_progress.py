@@ -0,0 +1,53 @@
+"""
+Progress callbacks see the scan, split and done phases with page counts;
+setting the cancel token from a callback stops processing
+"""
+
+from progress import DONE, SCAN, SPLIT, CancelToken, format_progress
+from split_agreement import AgreementSplitter
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte']
+
+
+def test_progress_phases(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    updates = []
+    result = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'),
+                               progress=updates.append,
+                               progress_context={'documents_done': 0,
+                                                 'documents_total': 1}).process()
+    assert result['success']
+
+    phases = [u['phase'] for u in updates]
+    assert phases[0] == SCAN and phases[-1] == DONE
+    assert phases.index(SPLIT) > phases.index(SCAN)
+    scan = [u['pages_done'] for u in updates if u['phase'] == SCAN]
+    assert scan == sorted(scan) and all(u['pages_total'] == 4 for u in updates)
+    assert updates[-1]['sections_written'] == result['files_created'] == 2
+    assert all(u['documents_total'] == 1 for u in updates)
+    assert format_progress(updates[-1]) == '[1/1] doc.pdf done: 2 section(s) written'
+
+
+def test_cancel_from_callback(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    cancel = CancelToken()
+    updates = []
+
+    def progress(info):
+        updates.append(info)
+        if info['phase'] == SCAN and info['pages_done'] >= 1:
+            cancel.cancel()
+
+    result = AgreementSplitter(str(tmp_path / 'doc.pdf'), str(tmp_path / 'out'),
+                               progress=progress, cancel=cancel).process()
+    assert result['cancelled'] and not result['success']
+    assert max(u['pages_done'] for u in updates) <= 2
+    assert not list((tmp_path / 'out').glob('*.pdf'))
+
+
+def test_child_token_follows_parent():
+    parent = CancelToken()
+    child = CancelToken(parent=parent)
+    assert not child.cancelled
+    parent.cancel()
+    assert child.cancelled
@@ -0,0 +1,61 @@
+"""
+Batches can run largest first, ordered by page counts read from the catalog;
+long documents are scanned in even page shards
+"""
+
+from pathlib import Path
+
+from scheduling import BatchSchedule, page_count, page_shards
+from split_agreement import AgreementSplitter, batch_process
+
+
+def test_page_shards():
+    assert page_shards(10, None) == [(0, 10)]
+    assert page_shards(10, 10) == [(0, 10)]
+    # Even shards: no 1-page straggler
+    assert page_shards(21, 10) == [(0, 7), (7, 14), (14, 21)]
+    assert page_shards(20, 10) == [(0, 10), (10, 20)]
+
+
+def test_largest_first(tmp_path, text_pdf):
+    for name, pages in (('a.pdf', 2), ('b.pdf', 5), ('c.pdf', 3)):
+        text_pdf(tmp_path / name, ['Texte'] * pages)
+    (tmp_path / 'broken.pdf').write_bytes(b'not a pdf')
+    assert page_count(tmp_path / 'b.pdf') == 5
+    assert page_count(tmp_path / 'broken.pdf') is None
+
+    schedule = BatchSchedule(shard_pages=2, jobs=2, seconds_per_page=1.0)
+    schedule.add(sorted(tmp_path.glob('*.pdf')))
+    assert [p.name for p in schedule.order] == ['b.pdf', 'c.pdf', 'a.pdf', 'broken.pdf']
+    # 5 pages in 3 shards on 2 processes
+    assert schedule.predicted_seconds(tmp_path / 'b.pdf') == 2.5
+    schedule.record(tmp_path / 'b.pdf', 1.25)
+    assert schedule.entry(tmp_path / 'b.pdf') == \
+        {'pages': 5, 'predicted_seconds': 2.5, 'seconds': 1.25}
+    assert schedule.entry(tmp_path / 'broken.pdf') == {'pages': None, 'predicted_seconds': None}
+
+
+def test_batch_runs_largest_first(tmp_path, text_pdf, monkeypatch):
+    (tmp_path / 'in').mkdir()
+    for name, pages in (('a.pdf', 2), ('b.pdf', 4), ('c.pdf', 3)):
+        text_pdf(tmp_path / 'in' / name, ['SECTION 1 - Objet'] + ['Texte'] * (pages - 1))
+    started = []
+    original = AgreementSplitter.find_all_sections
+    monkeypatch.setattr(AgreementSplitter, 'find_all_sections',
+                        lambda self: started.append(self.input_pdf.name) or original(self))
+
+    results = batch_process(str(tmp_path / 'in'), str(tmp_path / 'out'), largest_first=True)
+    assert started == ['b.pdf', 'c.pdf', 'a.pdf']
+    assert [(Path(r['input_file']).name, r['pages']) for r in results] == \
+        [('b.pdf', 4), ('c.pdf', 3), ('a.pdf', 2)]
+    assert all('predicted_seconds' in r and 'seconds' in r for r in results)
+
+
+def test_shards_match_sequential_scan(tmp_path, text_pdf):
+    pages = ['SECTION 1 - Objet', 'Texte', 'Texte', 'ANNEXE A - Primes', 'Texte',
+             'SECTION 2 - Fin', 'Texte']
+    text_pdf(tmp_path / 'doc.pdf', pages)
+    whole = AgreementSplitter(str(tmp_path / 'doc.pdf')).find_all_sections()
+    sharded = AgreementSplitter(str(tmp_path / 'doc.pdf'), shard_pages=3,
+                                shard_jobs=2).find_all_sections()
+    assert [(m['page'], m['type']) for m in sharded] == [(m['page'], m['type']) for m in whole]
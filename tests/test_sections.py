@@ -0,0 +1,44 @@
+"""
+Every page must end up in a section: pages before the first detected
+heading are written as Front_Matter
+"""
+
+from pathlib import Path
+
+import pytest
+
+from detectors import Detector
+from pdf_splitter import PDFSplitter
+from split_agreement import AgreementSplitter
+
+
+def test_pages_before_first_heading_are_kept(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'a.pdf', ['Convention collective', 'Texte', 'Texte',
+                                  "LETTRE D'ENTENTE NO 1", 'Texte'])
+    result = AgreementSplitter(str(tmp_path / 'a.pdf'), str(tmp_path / 'out')).process()
+    assert result['success']
+    names = sorted(Path(f).name for f in result['created_files'])
+    assert names == ['Front_Matter_p1-3.pdf', 'Lettres_Entente_p4-5.pdf']
+
+
+def test_heading_on_first_page_has_no_front_matter(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'a.pdf', ["LETTRE D'ENTENTE NO 1", 'Texte'])
+    splitter = AgreementSplitter(str(tmp_path / 'a.pdf'), str(tmp_path / 'out'))
+    sections = splitter.build_sections(splitter.find_all_sections())
+    assert [s['type'] for s in sections] == ['Lettres_Entente']
+
+
+def test_legacy_preset_keeps_straight_apostrophe_matching(tmp_path, text_pdf):
+    # The original patterns never matched a typographic apostrophe
+    text = 'Lettre d\u2019entente no 3\nTexte'
+    text_pdf(tmp_path / 'a.pdf', ['Texte'])
+    main = AgreementSplitter(str(tmp_path / 'a.pdf'), str(tmp_path / 'out'))
+    legacy = PDFSplitter(str(tmp_path / 'a.pdf'), str(tmp_path / 'out'))
+    assert main.detect_section(text, 0)[0] == 'Lettres_Entente'
+    assert legacy.detect_section(text, 0) is None
+    assert legacy.detect_section(text.replace('\u2019', "'"), 0)[0] == 'Lettre_Entente'
+
+
+def test_detector_is_abstract():
+    with pytest.raises(TypeError):
+        Detector()
@@ -0,0 +1,32 @@
+"""
+Article files written from shared objects list only the objects they hold
+in their xref table, and read back as standalone PDFs
+"""
+
+import io
+
+from PyPDF2 import PdfReader
+
+from shared_writer import SharedObjectWriter, _runs
+
+
+def test_runs():
+    assert _runs([]) == []
+    assert _runs([1, 2, 3, 7, 9, 10]) == [(1, 3), (7, 1), (9, 2)]
+
+
+def test_xref_has_no_free_entries_for_unused_objects(tmp_path, text_pdf):
+    lines = [f'ARTICLE {i}' for i in range(1, 41)]
+    text_pdf(tmp_path / 'a.pdf', lines)
+    writer = SharedObjectWriter(PdfReader(str(tmp_path / 'a.pdf')))
+
+    out = io.BytesIO()
+    writer.write_pages([30, 31], out, doc_id=b'\x01' * 16)
+    data = out.getvalue()
+    xref = data[data.rindex(b'\nxref\n'):data.rindex(b'trailer')]
+    # Only the head of the free list; the 30-odd skipped pages leave gaps
+    assert xref.count(b' f \n') == 1
+    assert len(xref) < 20 * 20
+
+    reader = PdfReader(io.BytesIO(data), strict=True)
+    assert [page.extract_text().strip() for page in reader.pages] == ['ARTICLE 31', 'ARTICLE 32']
@@ -0,0 +1,55 @@
+"""
+The parameter sweep scans each labelled document once, scores every grid
+setting against the expected boundaries and ranks the best first
+"""
+
+from split_agreement import AgreementSplitter
+from sweep import ground_truth_from_split_dirs, run_sweep, score
+
+PAGES = ['SECTION 1 - Objet', 'Texte', 'ANNEXE A - Primes', 'Texte', 'SECTION 2 - Fin', 'Texte']
+TRUTH = [{'type': 'Articles', 'start': 1, 'end': 2},
+         {'type': 'Annexe', 'start': 3, 'end': 4},
+         {'type': 'Articles', 'start': 5, 'end': 6}]
+
+
+def test_score():
+    predicted = [{'type': 'Articles', 'start': 1}, {'type': 'Articles', 'start': 4},
+                 {'type': 'Articles', 'start': 3}]
+    assert score(predicted, TRUTH) == (1, 2, 2)
+    # Off by one page: the second start matches the Articles at 5
+    assert score(predicted, TRUTH, tolerance=1) == (2, 1, 1)
+    # Types ignored: the third start matches the Annexe at 3
+    assert score(predicted, TRUTH, match_type=False) == (2, 1, 1)
+
+
+def test_ground_truth_from_split_dirs(tmp_path):
+    split = tmp_path / 'doc_split'
+    split.mkdir()
+    for name in ('Front_Matter_p1-1.pdf', '01_TOC_p2-4.pdf', 'Lettres_Entente_02_p9-12.pdf',
+                 'Annexe_p5-8.pdf', 'notes.pdf'):
+        (split / name).write_bytes(b'')
+    assert ground_truth_from_split_dirs(tmp_path) == {'doc.pdf': [
+        {'type': 'TOC', 'start': 2, 'end': 4},
+        {'type': 'Annexe', 'start': 5, 'end': 8},
+        {'type': 'Lettres_Entente', 'start': 9, 'end': 12},
+    ]}
+
+
+def test_sweep_scans_once(tmp_path, text_pdf, monkeypatch):
+    text_pdf(tmp_path / 'doc.pdf', PAGES)
+    scans = []
+    original = AgreementSplitter.find_all_sections
+    monkeypatch.setattr(AgreementSplitter, 'find_all_sections',
+                        lambda self: scans.append(self.input_pdf.name) or original(self))
+
+    results = run_sweep([tmp_path / 'doc.pdf', tmp_path / 'unlabelled.pdf'], {'doc.pdf': TRUTH},
+                        min_pages_grid=[1, 3], merge_gap_grid=[0, 5],
+                        confidence_grid=[80, 99])
+    assert len(results) == 8
+    assert scans == ['doc.pdf']
+    best = results[0]
+    assert (best['f1'], best['tp'], best['fp'], best['fn']) == (1.0, 3, 0, 0)
+    assert (best['min_pages'], best['min_confidence']) == (1, 80)
+    # Sections shorter than min_pages are not written, so not predicted
+    worst = results[-1]
+    assert worst['min_pages'] == 3 and worst['tp'] == 0
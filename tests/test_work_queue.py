@@ -0,0 +1,100 @@
+"""
+Several --worker processes on one tree must split each document once:
+one .done marker, one output folder, one reported result
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from work_queue import LEASE_DIR_NAME, LeaseQueue
+
+REPO = Path(__file__).resolve().parent.parent
+WORKERS = 3
+DOCUMENTS = 8
+
+
+def make_tree(root: Path, text_pdf) -> Path:
+    inputs = root / 'in'
+    inputs.mkdir()
+    for i in range(DOCUMENTS):
+        text_pdf(inputs / f'doc{i}.pdf', [f'ARTICLE 1 - DOCUMENT {i}', 'Texte', 'ANNEXE A',
+                                          'Texte', "LETTRE D'ENTENTE 1", 'Texte'])
+    return inputs
+
+
+def test_workers_split_each_document_once(tmp_path, text_pdf):
+    inputs = make_tree(tmp_path, text_pdf)
+    output = tmp_path / 'out'
+    workers = [subprocess.Popen(
+        [sys.executable, str(REPO / 'split_agreement.py'), str(inputs), '-b', '--worker',
+         '-o', str(output), '--worker-id', f'w{n}', '--lease-ttl', '2',
+         '--ndjson', str(tmp_path / f'w{n}.ndjson')],
+        cwd=str(REPO), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for n in range(WORKERS)]
+    for worker in workers:
+        _, stderr = worker.communicate(timeout=300)
+        assert worker.returncode == 0, stderr.decode(errors='replace')
+
+    done = [json.loads(p.read_text(encoding='utf-8'))
+            for p in (output / LEASE_DIR_NAME).glob('*.done')]
+    assert sorted(Path(d['input']).name for d in done) == \
+        sorted(f'doc{i}.pdf' for i in range(DOCUMENTS))
+    assert not list((output / LEASE_DIR_NAME).glob('*.lease'))
+
+    reported = []
+    for n in range(WORKERS):
+        path = tmp_path / f'w{n}.ndjson'
+        if path.exists():
+            reported += [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()
+                         if line.strip() and 'input_file' in json.loads(line)]
+    assert sorted(Path(r['input_file']).name for r in reported) == \
+        sorted(f'doc{i}.pdf' for i in range(DOCUMENTS))
+
+    folders = [p for p in output.iterdir() if p.is_dir() and p.name != LEASE_DIR_NAME]
+    assert sorted(p.name for p in folders) == sorted(f'doc{i}_split' for i in range(DOCUMENTS))
+    for folder in folders:
+        assert list(folder.glob('*.pdf'))
+
+
+def test_reclaimed_lease_is_not_marked_done(tmp_path, text_pdf):
+    text_pdf(tmp_path / 'a.pdf', ['ARTICLE 1'])
+    first = LeaseQueue(tmp_path, 'first', lease_ttl=0.2)
+    lease = first.try_claim(tmp_path / 'a.pdf', tmp_path)
+    lease._stop.set()       # a stalled holder: no more heartbeats
+    lease._thread.join()
+    time.sleep(0.3)
+
+    second = LeaseQueue(tmp_path, 'second', lease_ttl=0.2)
+    taken = second.try_claim(tmp_path / 'a.pdf', tmp_path)
+    assert taken is not None
+
+    assert lease.complete({'success': True}) is False
+    assert lease.lost
+    assert not second.is_done(taken.key)
+    assert taken.complete({'success': True}) is True
+    marker = json.loads((tmp_path / LEASE_DIR_NAME / f'{taken.key}.done').read_text())
+    assert marker['worker'] == 'second'
+
+
+def test_unreadable_lease_file_is_retried(tmp_path, monkeypatch, text_pdf):
+    text_pdf(tmp_path / 'a.pdf', ['ARTICLE 1'])
+    queue = LeaseQueue(tmp_path, 'w', lease_ttl=0.2)
+    real = queue._read_token
+    reads = []
+
+    def flaky(path):
+        # Two failed reads in a row, then the file is readable again
+        reads.append(path)
+        return None if len(reads) <= 2 else real(path)
+
+    monkeypatch.setattr(queue, '_read_token', flaky)
+    lease = queue.try_claim(tmp_path / 'a.pdf', tmp_path)
+    time.sleep(0.5)
+    assert len(reads) > 2
+    assert not lease.lost
+    assert lease.complete({'success': True}) is True
+    assert os.path.exists(tmp_path / LEASE_DIR_NAME / f'{lease.key}.done')
@@ -0,0 +1,277 @@
+"""
+Lease-based work queue over a shared filesystem
+Lets several splitter processes (on one host or many) share an input tree
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+LEASE_DIR_NAME = ".split_leases"
+# Consecutive unreadable lease files (e.g. NFS hiccups) before a lease is given up
+LOST_AFTER_FAILED_READS = 3
+
+
+def default_worker_id() -> str:
+    """Host name plus process id, unique across a cluster"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Lease:
+    """
+    A claimed document, kept alive by a heartbeat thread
+
+    When another worker reclaims the lease, lost_event is set: the holder
+    stops splitting (see worker_process) and complete() refuses to mark
+    the document done, so each document is finished by one worker only.
+    """
+
+    def __init__(self, queue: 'LeaseQueue', key: str, path: Path, token: str):
+        self.queue = queue
+        self.key = key
+        self.path = path
+        self.token = token
+        self.lost_event = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+
+    @property
+    def lost(self) -> bool:
+        return self.lost_event.is_set()
+
+    def _owner(self) -> Optional[str]:
+        """
+        Token in the lease file; None only after repeated failed reads
+
+        A missing or unreadable file is read again (one heartbeat apart)
+        before the lease is taken as gone.
+        """
+        for attempt in range(LOST_AFTER_FAILED_READS):
+            if attempt:
+                if self._stop.wait(self.queue.heartbeat_interval):
+                    return self.token
+            token = self.queue._read_token(self.lease_file)
+            if token is not None:
+                return token
+        return None
+
+    def _lose(self, reason: str):
+        logger.warning(f"Lease lost for {self.path.name} ({reason})")
+        self.lost_event.set()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.heartbeat_interval):
+            owner = self._owner()
+            if owner != self.token:
+                self._lose("reclaimed by another worker" if owner else "lease file gone")
+                return
+            try:
+                os.utime(self.lease_file, None)
+            except OSError as e:
+                logger.warning(f"Heartbeat failed for {self.path.name}: {e}")
+
+    @property
+    def lease_file(self) -> Path:
+        return self.queue.lease_dir / f"{self.key}.lease"
+
+    def complete(self, result: Dict) -> bool:
+        """
+        Mark the document done and drop the lease
+
+        Returns:
+            False if the lease was lost (or the document is already marked
+            done by another worker): the result must then be discarded
+        """
+        self._stop.set()
+        self._thread.join()
+        if self.lost or self.queue._read_token(self.lease_file) != self.token:
+            if not self.lost:
+                self._lose("reclaimed before the document was marked done")
+            return False
+        done = self.queue._mark_done(self.key, self.path, result)
+        self.release()
+        return done
+
+    def release(self):
+        """Drop the lease without marking the document done"""
+        self._stop.set()
+        if self.queue._read_token(self.lease_file) == self.token:
+            try:
+                self.lease_file.unlink()
+            except OSError:
+                pass
+
+
+class LeaseQueue:
+    """
+    Work queue where each document is claimed through an exclusive lease file
+
+    A lease file is created with O_EXCL, so only one worker can claim a
+    document. Holders refresh the lease's modification time; a lease older
+    than the TTL belongs to a dead worker and is reclaimed. Finished
+    documents get a .done marker and are never handed out again.
+    """
+
+    def __init__(self, root, worker_id: str = None, lease_ttl: float = 120.0):
+        """
+        Args:
+            root: Shared directory holding the lease folder
+            worker_id: Identifier written into leases (default: host-pid)
+            lease_ttl: Seconds without heartbeat before a lease expires
+        """
+        self.lease_dir = Path(root) / LEASE_DIR_NAME
+        self.lease_dir.mkdir(exist_ok=True, parents=True)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = max(lease_ttl / 4.0, 0.05)
+        # Documents claim_all() has still to look at or is waiting on
+        # (None while a streaming first pass has no count yet)
+        self.pending: Optional[int] = None
+
+    @staticmethod
+    def key_for(path, base) -> str:
+        """Stable lease name for a document, relative to the input tree"""
+        try:
+            rel = Path(path).resolve().relative_to(Path(base).resolve())
+        except ValueError:
+            rel = Path(path).resolve()
+        return hashlib.sha1(rel.as_posix().encode('utf-8')).hexdigest()[:20]
+
+    def _read_token(self, lease_file: Path) -> Optional[str]:
+        try:
+            with open(lease_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('token')
+        except (OSError, ValueError):
+            return None
+
+    def is_done(self, key: str) -> bool:
+        return (self.lease_dir / f"{key}.done").exists()
+
+    def _mark_done(self, key: str, path: Path, result: Dict) -> bool:
+        """Create the .done marker; False if another worker already created it"""
+        done_file = self.lease_dir / f"{key}.done"
+        tmp = self.lease_dir / f".{key}.{self.worker_id}.done"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                'input': str(path),
+                'worker': self.worker_id,
+                'success': bool(result.get('success')),
+                'files_created': result.get('files_created', 0),
+                'finished': time.time(),
+            }, f)
+        try:
+            # A link never replaces an existing marker
+            os.link(str(tmp), str(done_file))
+        except FileExistsError:
+            logger.warning(f"{path.name} was already marked done by another worker")
+            return False
+        except OSError:   # no hard links on this file system
+            os.replace(tmp, done_file)
+            return True
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return True
+
+    def _create_lease(self, lease_file: Path, path: Path) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(str(lease_file), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'token': token, 'worker': self.worker_id,
+                       'input': str(path), 'claimed': time.time()}, f)
+        return token
+
+    def _reclaim_expired(self, lease_file: Path) -> bool:
+        """Remove an expired lease; True if the slot is free again"""
+        try:
+            age = time.time() - lease_file.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        if age < self.lease_ttl:
+            return False
+
+        stale_token = self._read_token(lease_file)
+        grave = lease_file.with_name(f"{lease_file.name}.reclaim-{uuid.uuid4().hex}")
+        try:
+            os.rename(str(lease_file), str(grave))
+        except FileNotFoundError:
+            return True
+
+        if self._read_token(grave) != stale_token:
+            # Lost a race: we moved a lease another worker just took. Put it back.
+            try:
+                os.link(str(grave), str(lease_file))
+            except OSError:
+                pass
+            os.unlink(str(grave))
+            return False
+
+        logger.info(f"Reclaimed expired lease {lease_file.name} ({age:.0f}s old)")
+        os.unlink(str(grave))
+        return True
+
+    def try_claim(self, path, base) -> Optional[Lease]:
+        """Claim a document, or None if it is done or held by a live worker"""
+        path = Path(path)
+        key = self.key_for(path, base)
+        if self.is_done(key):
+            return None
+
+        lease_file = self.lease_dir / f"{key}.lease"
+        token = self._create_lease(lease_file, path)
+        if token is None and self._reclaim_expired(lease_file):
+            token = self._create_lease(lease_file, path)
+        if token is None:
+            return None
+
+        # A worker may have finished it between our done check and the claim
+        if self.is_done(key):
+            lease_file.unlink()
+            return None
+        return Lease(self, key, path, token)
+
+    def claim_all(self, pdfs: Iterable, base, poll_interval: float = None) -> Iterator[Lease]:
+        """
+        Yield leases until every document is done
+
+        Documents held by other workers are revisited after their lease
+        could have expired, so work from crashed workers is picked up.
+        """
+        # First pass consumes pdfs lazily (it may be a streaming discovery);
+        # only documents held by other workers are kept for later passes
+        pending = pdfs
+        poll_interval = poll_interval or self.heartbeat_interval
+
+        while True:
+            waiting = []
+            size = len(pending) if hasattr(pending, '__len__') else None
+            for position, pdf in enumerate(pending):
+                if self.is_done(self.key_for(pdf, base)):
+                    continue
+                lease = self.try_claim(pdf, base)
+                if lease is None:
+                    if not self.is_done(self.key_for(pdf, base)):
+                        waiting.append(pdf)
+                    continue
+                if size is not None:
+                    self.pending = size - position - 1 + len(waiting)
+                yield lease
+            if not waiting:
+                self.pending = 0
+                break
+            pending = waiting
+            logger.debug(f"{len(pending)} document(s) leased by other workers, waiting")
+            time.sleep(poll_interval)